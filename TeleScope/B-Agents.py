@@ -0,0 +1,64 @@
+import argparse
+from erlang import find_agents
+from simulation import simulate
+
+
+def find_agents_simulated(lambda_, mu, target_service_level, target_time, replications=10, seed=0, hours=24,
+                          **options):
+    """Find the number of agents whose simulated service level meets the target.
+
+    Brackets the answer with growing steps from the Erlang C answer, then bisects; every candidate
+    is simulated with the same seeds (common random numbers), so the comparison between them is
+    not blurred by noise.
+    """
+    if lambda_ == 0:
+        return 0  # no calls to simulate
+    interval_seconds = 1800
+    rates = [lambda_] * int(hours * 3600 / interval_seconds)
+    warmup = 10 / mu  # let the queue reach steady state from empty
+
+    def meets_target(s):
+        summary, _ = simulate(s, rates, interval_seconds, 1 / mu, target_time, replications=replications,
+                              seed=seed, warmup=warmup, **options)
+        return summary["service_level"][0] >= target_service_level
+
+    # low never meets the target (0 agents cannot), high does
+    s, step = find_agents(lambda_, mu, target_service_level, target_time), 1
+    if meets_target(s):
+        low, high = s - 1, s
+        while low > 0 and meets_target(low):
+            high, step = low, step * 2
+            low = max(high - step, 0)
+    else:
+        low, high = s, s + 1
+        while not meets_target(high):
+            low, step = high, step * 2
+            high = low + step
+
+    while high - low > 1:
+        mid = (low + high) // 2
+        if meets_target(mid):
+            high = mid
+        else:
+            low = mid
+    return high
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the Erlang C agents with simulated ones.")
+    parser.add_argument("--calls", type=float, default=10000, help="Calls per hour.")
+    parser.add_argument("--aht", type=float, default=300, help="Average handle time in seconds.")
+    parser.add_argument("--service-level", type=float, default=0.8, help="Target service level.")
+    parser.add_argument("--target-time", type=float, default=20, help="Target answer time in seconds.")
+    parser.add_argument("--patience", type=float, help="Average patience in seconds (enables abandonment).")
+    parser.add_argument("--service", default="exponential", help="Handle time distribution.")
+    parser.add_argument("--service-cv", type=float, default=1.0, help="Coefficient of variation of the handle time.")
+    parser.add_argument("--replications", type=int, default=10, help="Simulated days per candidate.")
+    args = parser.parse_args()
+
+    lambda_ = args.calls / 3600  # arrival rate (calls per second)
+    mu = 1 / args.aht  # service rate (calls per second)
+    analytic = find_agents(lambda_, mu, args.service_level, args.target_time)
+    simulated = find_agents_simulated(lambda_, mu, args.service_level, args.target_time, args.replications,
+                                      patience=args.patience, service=args.service, service_cv=args.service_cv)
+    print(f"Number of agents required (Erlang C): {analytic}")
+    print(f"Number of agents required (simulation): {simulated}")
@@ -0,0 +1,39 @@
+import argparse
+import time
+import numpy as np
+from simulation import simulate, DISTRIBUTIONS
+from staffing import load_forecast, INTERVAL_SECONDS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate days of a call center queue.")
+    parser.add_argument("--agents", type=int, default=848, help="Number of agents.")
+    parser.add_argument("--calls", type=float, default=10000, help="Calls per hour, when no forecast is given.")
+    parser.add_argument("--hours", type=float, default=24, help="Length of the day, when no forecast is given.")
+    parser.add_argument("--forecast", help="Forecast CSV whose 'calls' column gives the calls of every interval.")
+    parser.add_argument("--aht", type=float, default=300, help="Average handle time in seconds.")
+    parser.add_argument("--target-time", type=float, default=20, help="Service level target answer time in seconds.")
+    parser.add_argument("--service", default="exponential", choices=DISTRIBUTIONS, help="Handle time distribution.")
+    parser.add_argument("--service-cv", type=float, default=1.0, help="Coefficient of variation of the handle time.")
+    parser.add_argument("--patience", type=float, help="Average patience in seconds (enables abandonment).")
+    parser.add_argument("--replications", type=int, default=10, help="Number of simulated days.")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all CPUs).")
+    parser.add_argument("--seed", type=int, default=0, help="Root seed.")
+    args = parser.parse_args()
+
+    # Calls per second of every interval
+    if args.forecast:
+        _, columns = load_forecast(args.forecast)
+        rates = columns["calls"] / INTERVAL_SECONDS
+    else:
+        rates = np.full(int(args.hours * 3600 / INTERVAL_SECONDS), args.calls / 3600)
+
+    start = time.perf_counter()
+    summary, replications = simulate(args.agents, rates, INTERVAL_SECONDS, args.aht, args.target_time,
+                                     replications=args.replications, seed=args.seed, workers=args.workers,
+                                     service=args.service, service_cv=args.service_cv, patience=args.patience)
+    seconds = time.perf_counter() - start
+
+    calls = sum(result["offered"] for result in replications) / len(replications)
+    print(f"Simulated {args.replications} days of {calls:.0f} calls in {seconds:.2f} seconds")
+    for metric, (mean, half_width) in summary.items():
+        print(f"{metric:>14}: {mean:.4f} ± {half_width:.4f}")
@@ -0,0 +1,37 @@
+import time
+from erlang import erlang_c, waiting_time_probability, find_agents
+from simulation import simulate
+
+# M/M/s cases (calls per hour, handle time in seconds, target time in seconds); the simulation
+# must agree with Erlang C within its confidence intervals
+CASES = [(100, 180, 20), (500, 300, 20), (2000, 240, 30), (10000, 300, 20)]
+
+if __name__ == "__main__":
+    print(f"{'Calls/h':>8} {'Agents':>7} {'SL':>7} {'Sim SL':>16} {'ASA':>7} {'Sim ASA':>16} "
+          f"{'Occ':>6} {'Sim Occ':>16} {'Seconds':>8}")
+    failures = 0
+    for calls, aht, target_time in CASES:
+        lambda_, mu = calls / 3600, 1 / aht
+        a = lambda_ / mu
+        s = find_agents(lambda_, mu, 0.8, target_time)
+        pw = erlang_c(s, a)
+        expected = {
+            "service_level": waiting_time_probability(s, a, mu, target_time, pw),
+            "asa": pw / (s * mu - lambda_),
+            "occupancy": a / s,
+        }
+
+        start = time.perf_counter()
+        summary, _ = simulate(s, [lambda_] * 48, 1800, aht, target_time, replications=20, seed=calls,
+                              warmup=10 * aht)
+        seconds = time.perf_counter() - start
+
+        row = f"{calls:>8d} {s:>7d}"
+        for metric, value in expected.items():
+            mean, half_width = summary[metric]
+            # Wider than the 95% interval alone, so a correct simulator fails rarely
+            failures += abs(mean - value) > 1.5 * half_width
+            row += f" {value:>7.3f} {mean:>8.3f} ± {half_width:<5.3f}"
+        print(row + f" {seconds:>8.2f}")
+
+    print("Simulation agrees with Erlang C" if not failures else f"{failures} metrics outside their intervals")
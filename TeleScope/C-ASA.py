@@ -0,0 +1,4 @@
+from kpi import main
+
+if __name__ == "__main__":
+    main(("asa",), "Average speed of answer for a number of agents.")
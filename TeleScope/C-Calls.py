@@ -0,0 +1,4 @@
+from kpi import main
+
+if __name__ == "__main__":
+    main(("calls_handled",), "Calls handled per half-hour interval for a number of agents.")
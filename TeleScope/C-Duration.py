@@ -0,0 +1,4 @@
+from kpi import main
+
+if __name__ == "__main__":
+    main(("duration",), "Average call duration including the wait (time in system) for a number of agents.")
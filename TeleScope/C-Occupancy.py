@@ -0,0 +1,4 @@
+from kpi import main
+
+if __name__ == "__main__":
+    main(("occupancy",), "Agent occupancy for a number of agents.")
@@ -0,0 +1,4 @@
+from kpi import main
+
+if __name__ == "__main__":
+    main(("queue_length", "in_system"), "Expected calls in queue and in the system for a number of agents.")
@@ -0,0 +1,4 @@
+from kpi import main
+
+if __name__ == "__main__":
+    main(("service_level",), "Service level at the target time for a number of agents.")
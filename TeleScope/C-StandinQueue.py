@@ -0,0 +1,4 @@
+from kpi import main
+
+if __name__ == "__main__":
+    main(("p_wait", "wait_if_queued"), "Share of calls that queue and how long they stand in the queue.")
@@ -0,0 +1,33 @@
+import argparse
+import numpy as np
+from erlang import (erlang_b, find_trunks, max_load, erlang_b_batch, find_trunks_batch, max_load_batch,
+                    erlang_b_mpmath, validate)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Size trunks with the Erlang B model.")
+    parser.add_argument("--load", type=float, default=100, help="Offered load in Erlangs.")
+    parser.add_argument("--trunks", type=int, default=117, help="Number of trunks.")
+    parser.add_argument("--blocking", type=float, default=0.01, help="Target blocking probability.")
+    parser.add_argument("--validate", action="store_true", help="Check the float model against mpmath for large s.")
+    args = parser.parse_args()
+
+    # Single load
+    print(f"Blocking probability with {args.trunks} trunks and {args.load} Erlangs: "
+          f"{erlang_b(args.trunks, args.load):.6f}")
+    print(f"Trunks required for {args.load} Erlangs at {args.blocking:.2%} blocking: "
+          f"{find_trunks(args.load, args.blocking)}")
+    print(f"Maximum load on {args.trunks} trunks at {args.blocking:.2%} blocking: "
+          f"{max_load(args.trunks, args.blocking):.4f} Erlangs")
+
+    # Table over a range of loads
+    loads = np.array([1, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000], dtype=float)
+    trunks = find_trunks_batch(loads, args.blocking)
+    print(f"\n{'Erlangs':>10} {'Trunks':>8} {'Blocking':>10} {'Max load':>10}")
+    for load, n, blocking, capacity in zip(loads, trunks, erlang_b_batch(trunks, loads),
+                                           max_load_batch(trunks, args.blocking)):
+        print(f"{load:>10g} {n:>8d} {blocking:>10.6f} {capacity:>10.2f}")
+
+    if args.validate:
+        cases = [(s, s * ratio) for s in (10000, 20000, 50000) for ratio in (0.9, 0.95, 1.0, 1.05)]
+        worst, ok = validate(cases, function=erlang_b, reference_function=erlang_b_mpmath)
+        print(f"\nLargest relative error against mpmath: {worst:.2e} ({'ok' if ok else 'FAILED'})")
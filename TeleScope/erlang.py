@@ -0,0 +1,340 @@
+import math
+
+# The Erlang B recurrence forgets its starting value geometrically once it runs through the
+# region around the offered load, so it can start this many standard deviations (sqrt(a))
+# below the requested s from an approximate value instead of from s = 0
+WARM_START_SDS = 10
+
+
+def _warm_start(s, a):
+    """Return a starting number of servers k0 <= s and an approximation of B(k0, a)."""
+    k0 = int(min(s, a) - WARM_START_SDS * math.sqrt(a))
+    if k0 <= 0:
+        return 0, 1.0
+    # Fluid approximation of B(k0, a) for k0 well below the load
+    return k0, 1.0 - k0 / a
+
+
+class ErlangB:
+    """Erlang B blocking probabilities of one offered load, computed incrementally as s grows.
+
+    Uses the float recurrence B(s) = a B(s-1) / (s + a B(s-1)), which stays within [0, 1] and
+    needs no factorials or powers, so stepping from s to s + 1 costs one division.
+    """
+
+    def __init__(self, a, s=0):
+        self.a = a
+        self.s, self.b = _warm_start(s, a)
+        self.at(s)
+
+    def advance(self):
+        """Step to s + 1 servers and return its blocking probability."""
+        self.s += 1
+        ab = self.a * self.b
+        self.b = ab / (self.s + ab)
+        return self.b
+
+    def at(self, s):
+        """Return the blocking probability with s servers, continuing from the current s when possible."""
+        if s < self.s:
+            self.s, self.b = _warm_start(s, self.a)
+        while self.s < s:
+            self.advance()
+        return self.b
+
+
+def erlang_b(s, a):
+    """Calculate the Erlang B blocking probability for s servers and a Erlangs of offered load."""
+    return ErlangB(a, s).b
+
+
+def erlang_c_from_b(s, a, b):
+    """Convert the Erlang B blocking probability of (s, a) into the Erlang C probability of waiting."""
+    if a >= s:
+        return 1.0
+    return s * b / (s - a * (1 - b))
+
+
+def erlang_c(s, a):
+    """Calculate the Erlang C probability of waiting for s agents and a Erlangs of offered load."""
+    if a >= s:
+        return 1.0
+    return erlang_c_from_b(s, a, erlang_b(s, a))
+
+
+def waiting_time_probability(s, a, mu, t, pw=None):
+    """Calculate the probability that waiting time is less than or equal to t (pw: Erlang C if known)."""
+    if pw is None:
+        pw = erlang_c(s, a)
+    return 1 - pw * math.exp(-mu * (s - a) * t)
+
+
+def find_agents(lambda_, mu, target_service_level, target_time):
+    """Find the number of agents required to meet the target service level.
+
+    The Erlang B values are computed once, in increasing s, while an upper bound is bracketed
+    with growing steps; the minimum inside the bracket is then found by bisection on them.
+    An interval without calls needs no agents.
+    """
+    if lambda_ == 0:
+        return 0
+    a = lambda_ / mu  # offered load in Erlangs
+    s_min = max(math.ceil(a), 1)
+    erlang = ErlangB(a, s_min)
+    blocking = [erlang.b]  # blocking[i] is B(s_min + i)
+
+    def meets_target(s):
+        while len(blocking) <= s - s_min:
+            blocking.append(erlang.advance())
+        pw = erlang_c_from_b(s, a, blocking[s - s_min])
+        return waiting_time_probability(s, a, mu, target_time, pw) >= target_service_level
+
+    low, high, step = s_min, s_min, max(1, int(math.sqrt(a)))
+    while not meets_target(high):
+        low, high, step = high + 1, high + step, step * 2
+
+    while low < high:
+        mid = (low + high) // 2
+        if meets_target(mid):
+            high = mid
+        else:
+            low = mid + 1
+    return high
+
+
+def erlang_c_mpmath(s, a):
+    """Reference Erlang C in arbitrary precision with mpmath, summing the P0 series directly."""
+    import mpmath
+
+    a = mpmath.mpf(a)
+    rho = a / s
+    if rho >= 1:
+        return mpmath.mpf(1)
+
+    sum_terms = mpmath.mpf(0)
+    term = mpmath.mpf(1)
+    for n in range(int(s)):
+        sum_terms += term
+        term = term * a / (n + 1)
+
+    last_term = term / (1 - rho)
+    return last_term / (sum_terms + last_term)
+
+
+def erlang_b_mpmath(s, a):
+    """Reference Erlang B in arbitrary precision with mpmath, summing the a^k / k! series directly."""
+    import mpmath
+
+    a = mpmath.mpf(a)
+    sum_terms = mpmath.mpf(0)
+    term = mpmath.mpf(1)
+    for n in range(int(s)):
+        sum_terms += term
+        term = term * a / (n + 1)
+    return term / (sum_terms + term)
+
+
+def validate(cases, tolerance=1e-9, function=erlang_c, reference_function=erlang_c_mpmath):
+    """Compare a float Erlang function with its mpmath reference.
+
+    Args:
+        cases (iterable): (s, a) pairs.
+        tolerance (float): Largest accepted relative error.
+        function (callable): Float implementation, erlang_c or erlang_b.
+        reference_function (callable): mpmath reference, erlang_c_mpmath or erlang_b_mpmath.
+
+    Returns:
+        tuple: Largest relative error and whether it is within the tolerance.
+    """
+    worst = 0.0
+    for s, a in cases:
+        reference = reference_function(s, a)
+        if reference == 0:
+            error = abs(function(s, a))
+        else:
+            error = float(abs((function(s, a) - reference) / reference))
+        worst = max(worst, error)
+    return worst, worst <= tolerance
+
+
+def _warm_start_batch(s, a):
+    """Vector version of _warm_start: starting numbers of servers and their approximate B."""
+    import numpy as np
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = np.maximum((np.minimum(s, a) - WARM_START_SDS * np.sqrt(a)).astype(np.int64), 0)
+        b = np.where(k > 0, 1.0 - k / a, 1.0)
+    return k, b
+
+
+def find_agents_batch(lambda_, mu, target_service_level, target_time):
+    """Find the number of agents required for many intervals at once.
+
+    All arguments are scalars or arrays that broadcast to the number of intervals. Identical
+    intervals are sized once, and the Erlang B recurrences of all distinct intervals advance in
+    lockstep as NumPy vectors, from the same warm start as find_agents, so each interval gets the
+    same answer as find_agents. Intervals without calls need no agents.
+
+    Returns:
+        np.ndarray: Required agents per interval (int64).
+    """
+    import numpy as np
+
+    lambda_, mu, target_service_level, target_time = (
+        np.asarray(values, dtype=float)
+        for values in np.broadcast_arrays(lambda_, mu, target_service_level, target_time)
+    )
+    shape = lambda_.shape
+    params = np.stack([values.ravel() for values in (lambda_, mu, target_service_level, target_time)], axis=1)
+    unique_params, inverse = np.unique(params, axis=0, return_inverse=True)
+    lam, mu_, target, t = unique_params.T
+
+    a = lam / mu_
+    agents = np.zeros(len(a), dtype=np.int64)
+    busy = lam > 0
+    a, mu_, target, t = a[busy], mu_[busy], target[busy], t[busy]
+    s_min = np.maximum(np.ceil(a), 1).astype(np.int64)
+    k, b = _warm_start_batch(a, a)
+
+    # Indices of the unresolved intervals among the unique ones; resolved ones are dropped every step
+    active = np.flatnonzero(busy)
+    while len(active):
+        k += 1
+        ab = a * b
+        b = ab / (k + ab)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pw = np.where(a < k, k * b / (k - a * (1 - b)), 1.0)
+            service_level = 1 - pw * np.exp(-mu_ * (k - a) * t)
+        done = (k >= s_min) & (service_level >= target)
+        if done.any():
+            agents[active[done]] = k[done]
+            keep = ~done
+            active, a, mu_, target, t, s_min, k, b = (
+                values[keep] for values in (active, a, mu_, target, t, s_min, k, b)
+            )
+    return agents[inverse.ravel()].reshape(shape)
+
+
+def find_trunks(a, target_blocking):
+    """Find the minimum number of trunks whose Erlang B blocking is at most target_blocking.
+
+    B falls as trunks are added, so the recurrence is advanced one trunk at a time until it
+    reaches the target. Since B(s, a) >= 1 - s / a, the search starts at a (1 - target), where
+    the target is not met yet, rather than at no trunks.
+    """
+    if a <= 0:
+        return 0
+    start = max(int(a * (1 - target_blocking)), 0)
+    erlang = ErlangB(a, start)
+    if start > 0 and erlang.b <= target_blocking:
+        erlang = ErlangB(a)  # met exactly at the bound: rerun from no trunks
+    while erlang.b > target_blocking:
+        erlang.advance()
+    return erlang.s
+
+
+def max_load(s, target_blocking, tolerance=1e-9):
+    """Find the largest offered load (Erlangs) that s trunks carry with at most target_blocking.
+
+    B grows with the load, and B(s, a) >= 1 - s / a, so the answer lies in [0, s / (1 - target)]
+    and is found by bisection to a relative tolerance.
+    """
+    if s <= 0 or target_blocking <= 0:
+        return 0.0
+    if target_blocking >= 1:
+        return math.inf
+    low, high = 0.0, s / (1 - target_blocking)
+    while high - low > tolerance * high:
+        mid = (low + high) / 2
+        if erlang_b(s, mid) <= target_blocking:
+            low = mid
+        else:
+            high = mid
+    return low
+
+
+def erlang_b_batch(s, a):
+    """Calculate the Erlang B blocking probability for arrays of servers and loads.
+
+    The recurrences of all elements advance in lockstep from the same warm start as erlang_b,
+    dropping elements as they reach their s.
+
+    Returns:
+        np.ndarray: Blocking probabilities (float64).
+    """
+    import numpy as np
+
+    s, a = np.broadcast_arrays(np.asarray(s, dtype=np.int64), np.asarray(a, dtype=float))
+    shape = s.shape
+    s, a = s.ravel(), a.ravel()
+    k, b = _warm_start_batch(s, a)
+    blocking = np.where((a > 0) | (s == 0), b, 0.0)
+
+    active = np.flatnonzero((k < s) & (a > 0))
+    k, b, s, a = k[active], b[active], s[active], a[active]
+    while len(active):
+        k += 1
+        ab = a * b
+        b = ab / (k + ab)
+        done = k >= s
+        if done.any():
+            blocking[active[done]] = b[done]
+            keep = ~done
+            active, k, b, s, a = (values[keep] for values in (active, k, b, s, a))
+    return blocking.reshape(shape)
+
+
+def find_trunks_batch(a, target_blocking):
+    """Find the minimum number of trunks for arrays of loads and blocking targets.
+
+    Returns:
+        np.ndarray: Trunks per element (int64), the same as find_trunks.
+    """
+    import numpy as np
+
+    a, target_blocking = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(target_blocking, dtype=float))
+    shape = a.shape
+    trunks = np.zeros(a.size, dtype=np.int64)
+    active = np.flatnonzero(a.ravel() > 0)
+    a, target = a.ravel()[active], target_blocking.ravel()[active]
+    start = np.maximum(np.floor(a * (1 - target)), 0).astype(np.int64)
+    k, b = _warm_start_batch(start, a)
+
+    while len(active):
+        # Met exactly at the starting bound: rerun from no trunks, as find_trunks does
+        restart = (k == start) & (start > 0) & (b <= target)
+        if restart.any():
+            k[restart], b[restart], start[restart] = 0, 1.0, 0
+        done = (k >= start) & (b <= target)
+        if done.any():
+            trunks[active[done]] = k[done]
+            keep = ~done
+            active, k, b, a, target, start = (values[keep] for values in (active, k, b, a, target, start))
+        k += 1
+        ab = a * b
+        b = ab / (k + ab)
+    return trunks.reshape(shape)
+
+
+def max_load_batch(s, target_blocking, tolerance=1e-9):
+    """Find the largest offered load for arrays of trunks and blocking targets by lockstep bisection.
+
+    Returns:
+        np.ndarray: Largest load per element (float64), the same as max_load.
+    """
+    import numpy as np
+
+    s, target_blocking = np.broadcast_arrays(np.asarray(s, dtype=np.int64), np.asarray(target_blocking, dtype=float))
+    solvable = (s > 0) & (target_blocking > 0) & (target_blocking < 1)
+    low = np.zeros(s.shape)
+    with np.errstate(divide="ignore"):
+        high = np.where(solvable, s / (1 - target_blocking), 0.0)
+    while True:
+        bisecting = high - low > tolerance * high
+        if not bisecting.any():
+            break
+        mid = (low + high) / 2
+        meets = erlang_b_batch(np.where(bisecting, s, 0), mid) <= target_blocking
+        low = np.where(bisecting & meets, mid, low)
+        high = np.where(bisecting & ~meets, mid, high)
+    return np.where((s > 0) & (target_blocking >= 1), np.inf, low)
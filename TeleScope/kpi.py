@@ -0,0 +1,114 @@
+import argparse
+import math
+from erlang import ErlangB, erlang_b, erlang_c_from_b, find_agents
+from staffing import INTERVAL_SECONDS
+
+# KPI -> (column heading, format)
+KPIS = {
+    "agents": ("Agents", "{:>7d}"),
+    "p_wait": ("P(wait)", "{:>8.4f}"),
+    "service_level": ("Service", "{:>8.2%}"),
+    "asa": ("ASA (s)", "{:>9.2f}"),
+    "wait_if_queued": ("Queued wait (s)", "{:>16.2f}"),
+    "duration": ("Duration (s)", "{:>13.2f}"),
+    "occupancy": ("Occupancy", "{:>10.2%}"),
+    "queue_length": ("Queue", "{:>9.2f}"),
+    "in_system": ("In system", "{:>10.2f}"),
+    "calls_handled": ("Calls handled", "{:>14.1f}"),
+}
+
+
+def kpis_from_b(s, lambda_, mu, target_time, b, interval_seconds=INTERVAL_SECONDS):
+    """Derive every M/M/s KPI of s agents from the Erlang B blocking probability of (s, a).
+
+    P(wait) is computed once from B; ASA, service level, queue length and the rest follow from it
+    in closed form. An overloaded queue (a >= s) never empties, so its waits and queue are infinite.
+
+    Returns:
+        dict: The KPIS of s agents; times in seconds, calls handled per interval.
+    """
+    a = lambda_ / mu  # offered load in Erlangs
+    pw = erlang_c_from_b(s, a, b)
+    stable = a < s
+    excess_rate = s * mu - lambda_  # rate at which the queue drains
+    asa = pw / excess_rate if stable else math.inf
+    queue_length = pw * a / (s - a) if stable else math.inf
+    return {
+        "agents": s,
+        "p_wait": pw,
+        "service_level": max(1 - pw * math.exp(-mu * (s - a) * target_time), 0.0) if stable else 0.0,
+        "asa": asa,
+        "wait_if_queued": 1 / excess_rate if stable else math.inf,
+        "duration": asa + 1 / mu,
+        "occupancy": min(a / s, 1.0),
+        "queue_length": queue_length,
+        "in_system": queue_length + min(a, s),
+        "calls_handled": min(lambda_, s * mu) * interval_seconds,
+    }
+
+
+def kpis(s, lambda_, mu, target_time, interval_seconds=INTERVAL_SECONDS):
+    """Calculate every KPI of s agents (see kpis_from_b)."""
+    return kpis_from_b(s, lambda_, mu, target_time, erlang_b(s, lambda_ / mu), interval_seconds)
+
+
+def kpi_table(lambda_, mu, target_time, agents=None, interval_seconds=INTERVAL_SECONDS):
+    """Calculate the KPIs for a range of agents in one incremental Erlang B sweep.
+
+    Args:
+        lambda_ (float): Arrival rate (calls per second).
+        mu (float): Service rate (calls per second).
+        target_time (float): Service level target answer time in seconds.
+        agents (range): Agents to tabulate, increasing; defaults to 10 either side of the agents
+            find_agents requires for an 80% service level.
+        interval_seconds (float): Interval over which calls handled are counted.
+
+    Returns:
+        list: One KPI dict per number of agents.
+    """
+    if agents is None:
+        required = find_agents(lambda_, mu, 0.8, target_time)
+        agents = range(max(required - 10, 1), required + 11)
+    agents = list(agents)
+    if not agents:
+        return []
+
+    erlang = ErlangB(lambda_ / mu, agents[0])
+    rows = []
+    for s in agents:
+        rows.append(kpis_from_b(s, lambda_, mu, target_time, erlang.at(s), interval_seconds))
+    return rows
+
+
+def format_table(rows, columns=tuple(KPIS)):
+    """Render KPI rows as a fixed-width text table."""
+    widths = [len(KPIS[column][1].format(0 if column == "agents" else 0.0)) for column in columns]
+    lines = [" ".join(f"{KPIS[column][0]:>{width}}" for column, width in zip(columns, widths))]
+    for row in rows:
+        lines.append(" ".join(KPIS[column][1].format(row[column]) for column in columns))
+    return "\n".join(lines)
+
+
+def main(columns, description):
+    """Command line of the C-*.py KPI scripts: print the columns for one number of agents or a table."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--calls", type=float, default=10500, help="Calls per hour.")
+    parser.add_argument("--aht", type=float, default=3000, help="Average handle time in seconds.")
+    parser.add_argument("--target-time", type=float, default=30, help="Service level target answer time in seconds.")
+    parser.add_argument("--agents", type=int, help="Number of agents; omit for a table around the required agents.")
+    parser.add_argument("--range", type=int, nargs=2, metavar=("FIRST", "LAST"), help="Table of these agents.")
+    args = parser.parse_args()
+
+    lambda_ = args.calls / 3600  # arrival rate (calls per second)
+    mu = 1 / args.aht  # service rate (calls per second)
+    if args.agents:
+        row = kpis(args.agents, lambda_, mu, args.target_time)
+        for column in columns:
+            print(f"{KPIS[column][0]}: {KPIS[column][1].format(row[column]).strip()}")
+    else:
+        agents = range(args.range[0], args.range[1] + 1) if args.range else None
+        print(format_table(kpi_table(lambda_, mu, args.target_time, agents), ("agents",) + tuple(columns)))
+
+
+if __name__ == "__main__":
+    main(tuple(KPIS)[1:], "Print every Erlang C KPI against the number of agents.")
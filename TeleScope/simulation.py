@@ -0,0 +1,191 @@
+import math
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from statistics import NormalDist
+import numpy as np
+
+METRICS = ("service_level", "asa", "occupancy", "abandon_rate")
+
+
+def _exponential(rng, mean, cv, size):
+    return rng.exponential(mean, size)
+
+
+def _deterministic(rng, mean, cv, size):
+    return np.full(size, float(mean))
+
+
+def _lognormal(rng, mean, cv, size):
+    sigma2 = math.log1p(cv * cv)
+    return rng.lognormal(math.log(mean) - sigma2 / 2, math.sqrt(sigma2), size)
+
+
+def _gamma(rng, mean, cv, size):
+    return rng.gamma(1 / (cv * cv), mean * cv * cv, size)
+
+
+# Distribution name -> sampler(rng, mean, cv, size); cv (standard deviation / mean) is ignored
+# by the exponential (cv = 1) and deterministic (cv = 0) ones
+DISTRIBUTIONS = {
+    "exponential": _exponential,
+    "deterministic": _deterministic,
+    "lognormal": _lognormal,
+    "gamma": _gamma,
+}
+
+
+def sample(rng, distribution, mean, size, cv=1.0):
+    """Draw size durations with the given mean from one of DISTRIBUTIONS."""
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution '{distribution}'. Expected one of {tuple(DISTRIBUTIONS)}.")
+    return DISTRIBUTIONS[distribution](rng, mean, cv, size)
+
+
+def arrival_times(rng, arrival_rates, interval_seconds):
+    """Draw Poisson arrivals whose rate is constant within each interval (an intraday ramp).
+
+    Args:
+        rng (np.random.Generator): Random stream.
+        arrival_rates (array): Calls per second of every interval.
+        interval_seconds (float): Length of an interval in seconds.
+
+    Returns:
+        np.ndarray: Sorted arrival times in seconds from the start of the day.
+    """
+    arrival_rates = np.atleast_1d(np.asarray(arrival_rates, dtype=float))
+    counts = rng.poisson(arrival_rates * interval_seconds)
+    starts = np.repeat(np.arange(len(arrival_rates)) * interval_seconds, counts)
+    return np.sort(starts + rng.uniform(0, interval_seconds, len(starts)))
+
+
+def simulate_day(seed, agents, arrival_rates, interval_seconds, aht, target_time, service="exponential",
+                 service_cv=1.0, patience=None, patience_distribution="exponential", patience_cv=1.0, warmup=0.0):
+    """Simulate one day of an s-agent FIFO queue and measure it.
+
+    The calls are kept as arrays (arrival, handle time, patience, answer time). The event calendar
+    is a heap with the time every agent next becomes free; arrivals are drawn in time order up
+    front, and since calls are answered first come first served by identical agents, each call is
+    answered by the agent at the top of the heap, or abandons if that is later than its patience.
+
+    Args:
+        seed (np.random.SeedSequence or int): Seed of the replication's random stream.
+        agents (int): Number of agents.
+        arrival_rates (array): Calls per second of every interval of the day.
+        interval_seconds (float): Length of an interval in seconds.
+        aht (float): Average handle time in seconds.
+        target_time (float): Service level target answer time in seconds.
+        service (str): Handle time distribution, a key of DISTRIBUTIONS.
+        service_cv (float): Coefficient of variation of the handle time.
+        patience (float): Average time callers wait before abandoning; None for no abandonment.
+        patience_distribution (str): Patience distribution, a key of DISTRIBUTIONS.
+        patience_cv (float): Coefficient of variation of the patience.
+        warmup (float): Seconds at the start of the day left out of the measurements.
+
+    Returns:
+        dict: Offered, answered and abandoned calls, service level (share of the offered calls
+            answered within target_time), ASA, occupancy and abandon rate.
+    """
+    if agents < 1:
+        raise ValueError("At least one agent is required.")
+    rng = np.random.default_rng(seed)
+    horizon = len(np.atleast_1d(arrival_rates)) * interval_seconds
+    arrivals = arrival_times(rng, arrival_rates, interval_seconds)
+    handle_times = sample(rng, service, aht, len(arrivals), service_cv)
+    if patience is None:
+        patiences = np.full(len(arrivals), np.inf)
+    else:
+        patiences = sample(rng, patience_distribution, patience, len(arrivals), patience_cv)
+
+    answer_times = np.full(len(arrivals), np.nan)
+    free = [0.0] * agents  # agent release times; all zeros is a valid heap
+    for i, (arrival, handle_time, call_patience) in enumerate(
+            zip(arrivals.tolist(), handle_times.tolist(), patiences.tolist())):
+        answered = free[0] if free[0] > arrival else arrival
+        if answered - arrival > call_patience:
+            continue  # abandons before an agent is free
+        heapq.heapreplace(free, answered + handle_time)
+        answer_times[i] = answered
+
+    measured = arrivals >= warmup
+    waits = (answer_times - arrivals)[measured]
+    answered = ~np.isnan(waits)
+    offered = int(measured.sum())
+    handled = int(answered.sum())
+
+    # Agent time spent on calls within the measured part of the day, whoever they arrived before
+    talking = ~np.isnan(answer_times)
+    busy_from = np.clip(answer_times[talking], warmup, horizon)
+    busy_to = np.clip(answer_times[talking] + handle_times[talking], warmup, horizon)
+    measured_seconds = agents * (horizon - warmup)
+
+    return {
+        "offered": offered,
+        "answered": handled,
+        "abandoned": offered - handled,
+        "service_level": float(np.sum(waits[answered] <= target_time) / offered) if offered else math.nan,
+        "asa": float(waits[answered].mean()) if handled else math.nan,
+        "occupancy": float((busy_to - busy_from).sum() / measured_seconds) if measured_seconds > 0 else math.nan,
+        "abandon_rate": (offered - handled) / offered if offered else math.nan,
+    }
+
+
+def _t_quantile(p, df):
+    """Student t quantile from the normal one (Cornish-Fisher expansion, within 1e-3 for df >= 3)."""
+    z = NormalDist().inv_cdf(p)
+    return (z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * df ** 4))
+
+
+def summarize(replications, confidence=0.95):
+    """Mean and confidence interval half-width of every metric over independent replications.
+
+    Returns:
+        dict: Metric -> (mean, half width); the half width is nan for a single replication.
+    """
+    summary = {}
+    for metric in METRICS:
+        values = np.array([result[metric] for result in replications], dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            summary[metric] = (math.nan, math.nan)
+            continue
+        half_width = math.nan
+        if len(values) > 1:
+            half_width = _t_quantile((1 + confidence) / 2, len(values) - 1) * values.std(ddof=1) / math.sqrt(len(values))
+        summary[metric] = (float(values.mean()), float(half_width))
+    return summary
+
+
+def simulate(agents, arrival_rates, interval_seconds, aht, target_time, replications=10, seed=0, workers=None,
+             confidence=0.95, **options):
+    """Run independent replications of simulate_day, in parallel processes, and summarize them.
+
+    Every replication gets its own stream spawned from one SeedSequence, so a seed gives the same
+    results whatever the number of workers, and runs with different agents use common random numbers.
+
+    Args:
+        agents (int): Number of agents.
+        arrival_rates (array): Calls per second of every interval of the day.
+        interval_seconds (float): Length of an interval in seconds.
+        aht (float): Average handle time in seconds.
+        target_time (float): Service level target answer time in seconds.
+        replications (int): Number of simulated days.
+        seed (int): Root seed.
+        workers (int): Worker processes; 1 runs in this process, None uses all CPUs.
+        confidence (float): Confidence level of the intervals.
+        **options: Further simulate_day arguments (service, patience, warmup, ...).
+
+    Returns:
+        tuple: Summary (metric -> (mean, half width)) and the per-replication results.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(replications)
+    run = partial(simulate_day, agents=agents, arrival_rates=arrival_rates, interval_seconds=interval_seconds,
+                  aht=aht, target_time=target_time, **options)
+    if workers == 1 or replications == 1:
+        results = [run(child) for child in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run, seeds))
+    return summarize(results, confidence), results
@@ -0,0 +1,63 @@
+import csv
+import numpy as np
+from erlang import find_agents_batch
+
+INTERVAL_SECONDS = 1800  # half-hour planning intervals
+FORECAST_COLUMNS = ("calls", "aht", "service_level", "target_time")
+
+
+def load_forecast(path):
+    """Load a forecast CSV.
+
+    Every row is one interval of one queue. The 'calls' (calls offered in the interval), 'aht'
+    (average handle time in seconds), 'service_level' (fraction answered within the target) and
+    'target_time' (seconds) columns are required; any other columns (queue, day, interval, ...)
+    are kept as labels.
+
+    Returns:
+        tuple: List of row dicts and a dict of the required columns as float arrays.
+    """
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    missing = [column for column in FORECAST_COLUMNS if rows and column not in rows[0]]
+    if missing:
+        raise ValueError(f"Forecast {path} is missing the columns {missing}.")
+    columns = {column: np.array([float(row[column]) for row in rows]) for column in FORECAST_COLUMNS}
+    return rows, columns
+
+
+def staff_intervals(calls, aht, service_level, target_time, interval_seconds=INTERVAL_SECONDS):
+    """Calculate the required agents of every interval of a forecast.
+
+    Args:
+        calls (array): Calls offered per interval.
+        aht (array): Average handle time in seconds.
+        service_level (array): Target fraction of calls answered within target_time.
+        target_time (array): Target answer time in seconds.
+        interval_seconds (float): Length of an interval in seconds.
+
+    Returns:
+        np.ndarray: Required agents per interval.
+    """
+    arrival_rate = np.asarray(calls, dtype=float) / interval_seconds
+    service_rate = 1 / np.asarray(aht, dtype=float)
+    return find_agents_batch(arrival_rate, service_rate, service_level, target_time)
+
+
+def staff_forecast(path, output_path=None, interval_seconds=INTERVAL_SECONDS):
+    """Size every interval of a forecast CSV and optionally write it back with an 'agents' column.
+
+    Returns:
+        list: The forecast rows with their required agents.
+    """
+    rows, columns = load_forecast(path)
+    agents = staff_intervals(*(columns[column] for column in FORECAST_COLUMNS), interval_seconds=interval_seconds)
+    for row, required in zip(rows, agents):
+        row["agents"] = int(required)
+
+    if output_path and rows:
+        with open(output_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    return rows
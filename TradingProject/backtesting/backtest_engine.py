@@ -1,7 +1,12 @@
 # backtesting/backtest_engine.py
 import pandas as pd
+import numpy as np
 
-def backtest_strategy(data, signal_column="Signal", initial_balance=10000, kelly_params=None, use_kelly=False):
+BACKTEST_ENGINES = ("vectorized", "loop")
+
+
+def backtest_strategy(data, signal_column="Signal", initial_balance=10000, kelly_params=None, use_kelly=False,
+                      engine="vectorized"):
     """
     Perform backtesting on the given data.
     Args:
@@ -10,32 +15,29 @@ def backtest_strategy(data, signal_column="Signal", initial_balance=10000, kelly
         initial_balance (float): Starting portfolio balance.
         kelly_params (dict): Parameters required for Kelly Criterion calculation.
         use_kelly (bool): Whether to apply the Kelly Criterion.
+        engine (str): "vectorized" simulates the portfolio on NumPy arrays in one pass,
+            "loop" runs the original row-by-row reference simulation.
     Returns:
         pd.DataFrame: Backtest results with portfolio values and returns.
     """
-    # Flatten MultiIndex for easier access (if necessary)
-    if isinstance(data.columns, pd.MultiIndex):
-        data.columns = ['_'.join(filter(None, col)).strip('_') for col in data.columns]
-
-    # Identify the required columns dynamically
-    close_col = next((col for col in data.columns if "Close" in col), None)
-    signal_col = signal_column
+    if engine not in BACKTEST_ENGINES:
+        raise ValueError(f"Unknown backtest engine '{engine}'. Expected one of {BACKTEST_ENGINES}.")
 
-    if close_col is None or signal_col not in data.columns:
-        raise ValueError(f"Required columns ('Close' and '{signal_col}') not found in the DataFrame!")
-
-    # Initialize portfolio simulation columns
-    data["Portfolio Value"] = initial_balance
-    data["Portfolio Value"] = data["Portfolio Value"].astype(float)  # Ensure float dtype
-    data["Position"] = data[signal_col].shift(1).fillna(0).astype(float)
+    data, close_col = prepare_backtest(data, signal_column, initial_balance)
 
     # Compute Kelly Criterion position multiplier if enabled
     kelly_multiplier = 1  # Default to no leverage
     if use_kelly and kelly_params:
-        win_rate = kelly_params.get("win_rate", 0.5)
-        avg_win = kelly_params.get("avg_win", 0.01)
-        avg_loss = kelly_params.get("avg_loss", 0.01)
-        kelly_multiplier = max(0, win_rate - ((1 - win_rate) / (avg_win / abs(avg_loss))))
+        kelly_multiplier = compute_kelly_multiplier(kelly_params)
+
+    if engine == "vectorized":
+        data["Portfolio Value"] = simulate_portfolio(
+            data[close_col].to_numpy(dtype=float),
+            data["Position"].to_numpy(),
+            initial_balance,
+            kelly_multiplier,
+        )
+        return calculate_returns(data)
 
     # Iterate through the rows to simulate portfolio value
     for i in range(1, len(data)):
@@ -58,6 +60,137 @@ def backtest_strategy(data, signal_column="Signal", initial_balance=10000, kelly
     return data
 
 
+def prepare_backtest(data, signal_column="Signal", initial_balance=10000):
+    """
+    Flatten the columns and add the 'Portfolio Value' and 'Position' columns of a backtest.
+    Args:
+        data (pd.DataFrame): Stock data with columns including 'Close' and the specified 'Signal'.
+        signal_column (str): Name of the signal column.
+        initial_balance (float): Starting portfolio balance.
+    Returns:
+        tuple: The updated DataFrame and the name of its close column.
+    """
+    # Flatten MultiIndex for easier access (if necessary)
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = ['_'.join(filter(None, col)).strip('_') for col in data.columns]
+
+    # Identify the required columns dynamically
+    close_col = next((col for col in data.columns if "Close" in col), None)
+    signal_col = signal_column
+
+    if close_col is None or signal_col not in data.columns:
+        raise ValueError(f"Required columns ('Close' and '{signal_col}') not found in the DataFrame!")
+
+    # Initialize portfolio simulation columns
+    data["Portfolio Value"] = initial_balance
+    data["Portfolio Value"] = data["Portfolio Value"].astype(float)  # Ensure float dtype
+    data["Position"] = data[signal_col].shift(1).fillna(0).astype(float)
+    return data, close_col
+
+
+def compute_kelly_multiplier(kelly_params):
+    """
+    Compute the Kelly Criterion position multiplier.
+    Args:
+        kelly_params (dict): 'win_rate', 'avg_win' and 'avg_loss' of the strategy.
+    Returns:
+        float: Fraction of the position to take (never negative).
+    """
+    win_rate = kelly_params.get("win_rate", 0.5)
+    avg_win = kelly_params.get("avg_win", 0.01)
+    avg_loss = kelly_params.get("avg_loss", 0.01)
+    return max(0, win_rate - ((1 - win_rate) / (avg_win / abs(avg_loss))))
+
+
+def simulate_portfolio(close, position, initial_balance=10000, kelly_multiplier=1, skip_missing=False):
+    """
+    Simulate the portfolio value on contiguous arrays.
+    Produces exactly the values of the row-by-row loop: the stock is only held when the
+    previous position is 1, and each step adds the price change scaled by the Kelly multiplier.
+    2-D inputs simulate one independent portfolio per column.
+    Args:
+        close (np.ndarray): Close prices with shape (n_bars,) or (n_bars, n_tickers).
+        position (np.ndarray): Position held at each bar (signal shifted by one bar).
+        initial_balance (float): Starting portfolio balance.
+        kelly_multiplier (float): Position multiplier from the Kelly Criterion (per column for 2-D inputs).
+        skip_missing (bool): Treat price changes involving a missing close as zero instead of
+            propagating NaN into the portfolio value.
+    Returns:
+        np.ndarray: Portfolio value for every bar.
+    """
+    close = np.asarray(close, dtype=float)
+    position = np.asarray(position, dtype=float)
+    if len(close) == 0:
+        return np.empty(close.shape, dtype=float)
+
+    prev_position = position[:-1]
+    steps = np.zeros(close.shape, dtype=float)
+    steps[0] = initial_balance
+    steps[1:] = np.where(
+        prev_position == 1,
+        (close[1:] - close[:-1]) * prev_position * kelly_multiplier,
+        0.0,
+    )
+    if skip_missing:
+        steps[1:] = np.nan_to_num(steps[1:], nan=0.0)
+    # np.cumsum accumulates row by row, so every value is prev_value + step as in the loop
+    return np.cumsum(steps, axis=0)
+
+
+def backtest_panel(close, signals, initial_balance=10000, kelly_multiplier=1):
+    """
+    Backtest every ticker of a panel at once.
+    Each column is simulated like backtest_strategy on a single ticker. Bars where the close
+    or the previous close is missing (e.g. before a ticker was listed) add no profit or loss.
+    Args:
+        close (pd.DataFrame): Close prices, dates x tickers.
+        signals (pd.DataFrame): Signals with the same shape, e.g. from a strategy's generate_panel_signals.
+        initial_balance (float): Starting balance of every ticker's portfolio.
+        kelly_multiplier (float or pd.Series): Kelly position multiplier, optionally per ticker.
+    Returns:
+        dict: 'Portfolio Value', 'Position' and 'Returns' as dates x tickers DataFrames.
+    """
+    signals = signals.reindex(index=close.index, columns=close.columns)
+    position = signals.shift(1).fillna(0).astype(float)
+    if isinstance(kelly_multiplier, pd.Series):
+        kelly_multiplier = kelly_multiplier.reindex(close.columns).fillna(1).to_numpy(dtype=float)
+
+    portfolio_value = pd.DataFrame(
+        simulate_portfolio(close.to_numpy(dtype=float), position.to_numpy(), initial_balance, kelly_multiplier,
+                           skip_missing=True),
+        index=close.index,
+        columns=close.columns,
+    )
+    return {
+        "Portfolio Value": portfolio_value,
+        "Position": position,
+        "Returns": portfolio_value.pct_change().fillna(0).astype(float),
+    }
+
+
+def signal_returns(close, signals):
+    """
+    Compute next-bar strategy returns for one or many signal vectors.
+    Mirrors the optimizers' pandas pipeline: the position is the signal shifted by one bar
+    (0 on the first bar) and is multiplied by the close-to-close percentage change.
+    Args:
+        close (np.ndarray): Close prices with shape (n_bars,).
+        signals (np.ndarray): Signals with shape (n_bars,) or (n_combinations, n_bars).
+    Returns:
+        np.ndarray: Strategy returns with the same shape as signals; the first bar is NaN.
+    """
+    close = np.asarray(close, dtype=float)
+    signals = np.asarray(signals)
+
+    daily_returns = np.empty_like(close)
+    daily_returns[0] = np.nan
+    daily_returns[1:] = close[1:] / close[:-1] - 1
+
+    position = np.zeros(signals.shape, dtype=float)
+    position[..., 1:] = signals[..., :-1]
+    return position * daily_returns
+
+
 def calculate_returns(data):
     """
     Calculate daily returns based on the 'Portfolio Value'.
@@ -1,6 +1,108 @@
 # backtesting/performance.py
 import pandas as pd
 import numpy as np
+from instrumentation import record_error
+
+METRIC_COLUMNS = [
+    "Profit",
+    "Hit Ratio",
+    "Maximum Drawdown",
+    "Average Positive Trade (%)",
+    "Average Negative Trade (%)",
+    "Avg. Profit/Avg Loss",
+    "Variation of Returns (%)",
+    "Sharpe Ratio",
+    "Sortino Ratio",
+    "Calmar Ratio",
+]
+
+# Metrics that are plain ratios, printed without the percent sign of the others
+RATIO_METRICS = ("Sharpe Ratio", "Sortino Ratio", "Calmar Ratio")
+
+
+def format_metric(name, value):
+    """
+    Format a metric for printing: ratios as plain numbers, the other metrics with a percent sign.
+    """
+    return f"{value:.2f}" if name in RATIO_METRICS else f"{value:.2f}%"
+
+
+def evaluate_curves(portfolio_values=None, returns=None, labels=None, periods_per_year=252, initial_balance=10000):
+    """
+    Compute every performance metric for many equity curves in one vectorized pass.
+    Curves are rows of 2-D arrays, e.g. one per parameter pair of a grid; a DataFrame of dates x
+    curves (such as backtest_panel's 'Portfolio Value') is used column-wise with its columns as labels.
+    Args:
+        portfolio_values (np.ndarray or pd.DataFrame): Portfolio values with shape (n_curves, n_bars).
+            Compounded from the returns when None.
+        returns (np.ndarray or pd.DataFrame): Returns per bar in the same layout. Computed from the
+            portfolio values like calculate_returns when None.
+        labels (iterable): Index of the result (defaults to the DataFrame columns or 0..n_curves-1).
+        periods_per_year (int): Number of bars per year used for annualization.
+        initial_balance (float): Starting value of curves compounded from returns.
+    Returns:
+        pd.DataFrame: One row per curve with the METRIC_COLUMNS, in the units of calculate_metrics.
+    """
+    if portfolio_values is None and returns is None:
+        raise ValueError("Either portfolio_values or returns is required.")
+    for frame in (portfolio_values, returns):
+        if isinstance(frame, pd.DataFrame) and labels is None:
+            labels = frame.columns
+    if isinstance(portfolio_values, pd.DataFrame):
+        portfolio_values = portfolio_values.to_numpy(dtype=float).T
+    if isinstance(returns, pd.DataFrame):
+        returns = returns.to_numpy(dtype=float).T
+
+    if returns is None:
+        values = np.atleast_2d(np.asarray(portfolio_values, dtype=float))
+        returns = np.zeros(values.shape)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns[:, 1:] = values[:, 1:] / values[:, :-1] - 1
+    returns = np.atleast_2d(np.asarray(returns, dtype=float))
+    if portfolio_values is None:
+        values = initial_balance * np.cumprod(1 + np.nan_to_num(returns), axis=1)
+    else:
+        values = np.atleast_2d(np.asarray(portfolio_values, dtype=float))
+    n_bars = returns.shape[1]
+
+    valid = ~np.isnan(returns)
+    positive = returns > 0
+    negative = returns <= 0
+    count = valid.sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hit_ratio = positive.sum(axis=1) / max(n_bars, 1) * 100
+        avg_positive = np.where(positive, returns, 0.0).sum(axis=1) / positive.sum(axis=1) * 100
+        avg_negative = np.where(negative, returns, 0.0).sum(axis=1) / negative.sum(axis=1) * 100
+        profit_loss_ratio = np.where(avg_negative != 0, avg_positive / np.abs(avg_negative), np.inf)
+
+        # Two-pass mean and standard deviation, as in sharpe_ratios
+        mean = np.where(valid, returns, 0.0).sum(axis=1) / count
+        squared = np.where(valid, (mean[:, None] - returns) ** 2, 0.0)
+        std = np.sqrt(squared.sum(axis=1) / (count - 1))
+        std[count <= 1] = np.nan
+        downside = np.sqrt(np.where(valid, np.minimum(returns, 0.0) ** 2, 0.0).sum(axis=1) / count)
+
+        profit = (values[:, -1] / values[:, 0] - 1) * 100
+        peak = np.fmax.accumulate(values, axis=1)
+        max_drawdown = np.fmin.reduce((values - peak) / peak, axis=1)
+        years = (n_bars - 1) / periods_per_year
+        annual_return = (values[:, -1] / values[:, 0]) ** (1 / years) - 1 if years > 0 else np.full(len(values), np.nan)
+
+        metrics = pd.DataFrame({
+            "Profit": profit,
+            "Hit Ratio": hit_ratio,
+            "Maximum Drawdown": max_drawdown * 100,
+            "Average Positive Trade (%)": avg_positive,
+            "Average Negative Trade (%)": avg_negative,
+            "Avg. Profit/Avg Loss": profit_loss_ratio,
+            "Variation of Returns (%)": std * 100,
+            "Sharpe Ratio": mean / std * (periods_per_year ** 0.5),
+            "Sortino Ratio": mean / downside * (periods_per_year ** 0.5),
+            "Calmar Ratio": annual_return / np.abs(max_drawdown),
+        }, index=labels)
+    return metrics
+
 
 def calculate_metrics(data):
     """
@@ -15,41 +117,67 @@ def calculate_metrics(data):
         if 'Returns' not in data.columns or 'Portfolio Value' not in data.columns:
             raise ValueError("Missing required columns: 'Returns' or 'Portfolio Value'")
 
-        # Basic metrics
-        total_trades = len(data)
-        positive_trades = len(data[data['Returns'] > 0])
-        hit_ratio = (positive_trades / total_trades) * 100 if total_trades > 0 else 0
-
-        avg_positive_trade = data[data['Returns'] > 0]['Returns'].mean() * 100
-        avg_negative_trade = data[data['Returns'] <= 0]['Returns'].mean() * 100
-        avg_profit_loss_ratio = (
-            avg_positive_trade / abs(avg_negative_trade)
-            if avg_negative_trade != 0
-            else float('inf')
-        )
+        metrics = evaluate_curves(data['Portfolio Value'].to_numpy(dtype=float), data['Returns'].to_numpy(dtype=float))
+        return {metric: float(value) for metric, value in metrics.iloc[0].items()}
+    except Exception as e:
+        print(f"Error calculating metrics: {e}")
+        record_error("calculate_metrics", e)
+        return None
 
-        variation_of_returns = data['Returns'].std() * 100
+def sharpe_ratios(returns, periods_per_year=252, zero_std_value=None):
+    """
+    Annualized Sharpe ratio of every row of a returns matrix.
+    NaNs are skipped and the sums follow pandas' two-pass mean/std, so each row gives the
+    same value as `returns.mean() / returns.std() * (252 ** 0.5)` on a Series.
+    Args:
+        returns (np.ndarray): Strategy returns with shape (n_bars,) or (n_rows, n_bars).
+        periods_per_year (int): Number of bars per year used for annualization.
+        zero_std_value (float): Value used where the standard deviation is zero.
+            None keeps the raw ratio (NaN or inf).
+    Returns:
+        np.ndarray: Sharpe ratio per row.
+    """
+    returns = np.atleast_2d(np.asarray(returns, dtype=float))
+    mask = np.isnan(returns)
+    values = np.where(mask, 0.0, returns)
+    count = (~mask).sum(axis=1).astype(float)
 
-        # Cumulative return (Profit)
-        profit = (data['Portfolio Value'].iloc[-1] / data['Portfolio Value'].iloc[0] - 1) * 100
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = values.sum(axis=1) / count
+        squared = (mean[:, None] - values) ** 2
+        squared[mask] = 0.0
+        std = np.sqrt(squared.sum(axis=1) / (count - 1))
+        std[count <= 1] = np.nan
+        sharpe = mean / std * (periods_per_year ** 0.5)
 
-        # Maximum drawdown
-        rolling_max = data['Portfolio Value'].cummax()
-        drawdown = (data['Portfolio Value'] - rolling_max) / rolling_max
-        max_drawdown = drawdown.min() * 100
+    if zero_std_value is not None:
+        sharpe[std == 0] = zero_std_value
+    return sharpe
+
+
+def yearly_breakdown(returns, signals, years):
+    """
+    Sum returns per year, in total and split by the signal of each bar, for many curves at once.
+    Args:
+        returns (np.ndarray): Returns with shape (n_curves, n_bars) or (n_bars,); NaNs count as zero.
+        signals (np.ndarray): Signals in the same shape.
+        years (np.ndarray): Year of every bar (NaN for unknown dates, which are left out).
+    Returns:
+        tuple: Sorted years, and total, BUY (signal 1) and SELL (signal 0) sums with shape (n_curves, n_years).
+    """
+    returns = np.nan_to_num(np.atleast_2d(np.asarray(returns, dtype=float)))
+    signals = np.atleast_2d(np.asarray(signals))
+    codes, unique_years = pd.factorize(years, sort=True)
+
+    # One-hot bar -> year matrix, so every sum is a single matrix product
+    membership = np.zeros((len(codes), len(unique_years)))
+    known = codes >= 0
+    membership[np.flatnonzero(known), codes[known]] = 1.0
+    total = returns @ membership
+    buy = np.where(signals == 1, returns, 0.0) @ membership
+    sell = np.where(signals == 0, returns, 0.0) @ membership
+    return unique_years, total, buy, sell
 
-        return {
-            "Profit": profit,
-            "Hit Ratio": hit_ratio,
-            "Maximum Drawdown": max_drawdown,
-            "Average Positive Trade (%)": avg_positive_trade,
-            "Average Negative Trade (%)": avg_negative_trade,
-            "Avg. Profit/Avg Loss": avg_profit_loss_ratio,
-            "Variation of Returns (%)": variation_of_returns,
-        }
-    except Exception as e:
-        print(f"Error calculating metrics: {e}")
-        return None
 
 def calculate_yearly_returns(data):
     """
@@ -60,25 +188,23 @@ def calculate_yearly_returns(data):
         pd.DataFrame: A DataFrame containing yearly returns.
     """
     try:
-        # Ensure the 'Date' column is in datetime format
-        data['Date'] = pd.to_datetime(data['Date'], errors='coerce')
-
-        # Extract year from the date
-        data['Year'] = data['Date'].dt.year
-
-        # Calculate yearly returns
-        yearly_returns = data.groupby('Year').agg(
-            Total_Returns=('Returns', 'sum'),
-            BUY_Returns=('Returns', lambda x: x[data['Signal'] == 1].sum()),
-            SELL_Returns=('Returns', lambda x: x[data['Signal'] == 0].sum()),
+        # Extract the year from the dates, ignoring unparsable ones
+        years = pd.to_datetime(data['Date'], errors='coerce').dt.year.to_numpy()
+        unique_years, total, buy, sell = yearly_breakdown(
+            data['Returns'].to_numpy(dtype=float), data['Signal'].to_numpy(), years
         )
 
         # Convert to percentage
-        yearly_returns = yearly_returns * 100
+        yearly_returns = pd.DataFrame({
+            "Total_Returns": total[0],
+            "BUY_Returns": buy[0],
+            "SELL_Returns": sell[0],
+        }, index=pd.Index(unique_years, name="Year")) * 100
 
         return yearly_returns
     except Exception as e:
         print(f"Error calculating yearly returns: {e}")
+        record_error("calculate_yearly_returns", e)
         return None
 
 def evaluate_strategy(data):
@@ -101,28 +227,48 @@ def evaluate_strategy(data):
 
     except Exception as e:
         print(f"Error in evaluate_strategy: {e}")
+        record_error("evaluate_strategy", e)
         return {}
 
 if __name__ == "__main__":
-    # Example usage (this part is typically not needed if called from main.py)
-    backtest_file = "backtest_results_PLTR.csv"
-    backtest_data = pd.read_csv(backtest_file)
+    import argparse
+    from backtesting.results_store import get_default_results_store
+
+    parser = argparse.ArgumentParser(description="Evaluate stored backtest results.")
+    parser.add_argument("strategy", help="Strategy name, e.g. moving_average.")
+    parser.add_argument("ticker", help="Stock ticker symbol.")
+    parser.add_argument("--run", help="Run id (default: the latest run).")
+    parser.add_argument("--csv", help="Evaluate an exported backtest_results CSV instead of the results store.")
+    args = parser.parse_args()
 
-    # Debugging the loaded data
-    print("Loaded Backtest Data:")
-    print(backtest_data.head())
+    if args.csv:
+        backtest_data = pd.read_csv(args.csv)
+        dates = None
+        if "Date" in backtest_data.columns:
+            dates = pd.DatetimeIndex(pd.to_datetime(backtest_data["Date"], errors="coerce"))
+        columns = {column: backtest_data[column].to_numpy() for column in backtest_data.columns}
+    else:
+        # The columns stay memory-mapped: nothing is parsed or copied before the metrics pass
+        try:
+            dates, columns, meta = get_default_results_store().read(args.strategy, args.ticker, args.run)
+        except FileNotFoundError as e:
+            print(e)
+            exit()
+        print(f"Loaded run {meta['run']} of {args.strategy} on {args.ticker} "
+              f"({meta['rows']} bars, parameters {meta['params']})")
 
     # Calculate metrics
     print("\nCalculating Performance Metrics...")
-    metrics = calculate_metrics(backtest_data)
-    if metrics:
-        print("\nPerformance Metrics:")
-        for key, value in metrics.items():
-            print(f"{key}: {value:.2f}%")
+    metrics = evaluate_curves(columns["Portfolio Value"][None, :], columns["Returns"][None, :]).iloc[0]
+    print("\nPerformance Metrics:")
+    for key, value in metrics.items():
+        print(f"{key}: {format_metric(key, value)}")
 
     # Calculate yearly returns
-    print("\nCalculating Yearly Returns...")
-    yearly_returns = calculate_yearly_returns(backtest_data)
-    if yearly_returns is not None:
+    if dates is not None:
+        print("\nCalculating Yearly Returns...")
+        years, total, buy, sell = yearly_breakdown(columns["Returns"], columns["Signal"], dates.year.to_numpy())
+        yearly_returns = pd.DataFrame({"Total_Returns": total[0], "BUY_Returns": buy[0], "SELL_Returns": sell[0]},
+                                      index=pd.Index(years, name="Year")) * 100
         print("\nYearly Returns:")
         print(yearly_returns)
@@ -0,0 +1,141 @@
+# backtesting/portfolio.py
+import pandas as pd
+import numpy as np
+from backtesting.backtest_engine import compute_kelly_multiplier
+
+ALLOCATION_RULES = ("equal", "volatility", "kelly")
+
+
+def compute_atr_panel(close, high, low, window=14):
+    """
+    Compute the Average True Range of every ticker, as in the screeners.
+    Args:
+        close (pd.DataFrame): Close prices, dates x tickers.
+        high (pd.DataFrame): High prices with the same shape.
+        low (pd.DataFrame): Low prices with the same shape.
+        window (int): ATR window.
+    Returns:
+        pd.DataFrame: ATR per date and ticker.
+    """
+    prev_close = close.shift(1).to_numpy()
+    high_values, low_values = high.to_numpy(), low.to_numpy()
+    with np.errstate(invalid="ignore"):
+        true_range = np.fmax(
+            high_values - low_values,
+            np.fmax(np.abs(high_values - prev_close), np.abs(low_values - prev_close)),
+        )
+    return pd.DataFrame(true_range, index=close.index, columns=close.columns).rolling(window=window).mean()
+
+
+def allocation_weights(close, signals, allocation="equal", atr=None, kelly_params=None):
+    """
+    Compute target portfolio weights from per-ticker signals.
+    Only tickers with a long signal (1) and a price are held. Weights sum to at most 1; the
+    rest of the capital is kept in cash.
+    Args:
+        close (pd.DataFrame): Close prices, dates x tickers.
+        signals (pd.DataFrame): Signals with the same shape.
+        allocation (str): "equal" splits capital equally, "volatility" weights by inverse ATR as a
+            fraction of price, "kelly" scales equal weights by each ticker's Kelly multiplier.
+        atr (pd.DataFrame or pd.Series): ATR per date and ticker, or one value per ticker
+            (e.g. the 'atr' column of the screener output). Required for "volatility".
+        kelly_params (dict): Kelly parameters shared by all tickers, or a dict of ticker to
+            Kelly parameters. Required for "kelly".
+    Returns:
+        pd.DataFrame: Target weight per date and ticker.
+    """
+    if allocation not in ALLOCATION_RULES:
+        raise ValueError(f"Unknown allocation rule '{allocation}'. Expected one of {ALLOCATION_RULES}.")
+
+    signals = signals.reindex(index=close.index, columns=close.columns)
+    held = (signals.to_numpy() == 1) & ~np.isnan(close.to_numpy(dtype=float))
+
+    if allocation == "volatility":
+        if atr is None:
+            raise ValueError("The 'volatility' allocation requires ATR values.")
+        if isinstance(atr, pd.Series):
+            atr = pd.DataFrame([atr.reindex(close.columns)] * len(close), index=close.index)
+        atr = atr.reindex(index=close.index, columns=close.columns).to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = close.to_numpy(dtype=float) / atr
+        held &= np.isfinite(scores) & (scores > 0)
+    else:
+        scores = np.ones(close.shape)
+
+    raw = np.where(held, scores, 0.0)
+    totals = raw.sum(axis=1, keepdims=True)
+    weights = np.divide(raw, totals, out=np.zeros_like(raw), where=totals > 0)
+
+    if allocation == "kelly":
+        if kelly_params is None:
+            raise ValueError("The 'kelly' allocation requires kelly_params.")
+        if all(isinstance(value, dict) for value in kelly_params.values()):
+            multipliers = [compute_kelly_multiplier(kelly_params.get(ticker, {})) for ticker in close.columns]
+        else:
+            multipliers = [compute_kelly_multiplier(kelly_params)] * len(close.columns)
+        weights = weights * np.minimum(np.array(multipliers, dtype=float), 1.0)
+
+    return pd.DataFrame(weights, index=close.index, columns=close.columns)
+
+
+def backtest_portfolio(close, signals, allocation="equal", rebalance_every=1, initial_capital=10000,
+                       high=None, low=None, atr=None, kelly_params=None):
+    """
+    Backtest one combined portfolio across many tickers.
+    At every rebalancing bar the capital is split by the allocation rule using that bar's signals;
+    between rebalancing bars the holdings drift with their prices. Like the single-ticker engine,
+    weights set at a bar's close earn the next bar's return. The simulation is vectorized across
+    assets and rebalancing periods.
+    Args:
+        close (pd.DataFrame): Close prices, dates x tickers.
+        signals (pd.DataFrame): Signals with the same shape, e.g. from a strategy's generate_panel_signals.
+        allocation (str): "equal", "volatility" or "kelly" (see allocation_weights).
+        rebalance_every (int): Number of bars between rebalancings.
+        initial_capital (float): Starting portfolio value.
+        high (pd.DataFrame): High prices, used to compute the ATR for "volatility" when atr is not given.
+        low (pd.DataFrame): Low prices, used to compute the ATR for "volatility" when atr is not given.
+        atr (pd.DataFrame or pd.Series): ATR values for "volatility".
+        kelly_params (dict): Kelly parameters for "kelly".
+    Returns:
+        tuple: DataFrame with 'Portfolio Value', 'Returns' and 'Invested' per date, and the
+            DataFrame of target weights at each rebalancing date.
+    """
+    if allocation == "volatility" and atr is None and (high is None or low is None):
+        raise ValueError("The 'volatility' allocation requires atr or high and low prices.")
+    n_bars = len(close)
+    if not n_bars:
+        results = pd.DataFrame({"Portfolio Value": [], "Returns": [], "Invested": []}, index=close.index, dtype=float)
+        return results, pd.DataFrame(index=close.index, columns=close.columns, dtype=float)
+    if allocation == "volatility" and atr is None:
+        atr = compute_atr_panel(close, high, low)
+
+    rebalance_bars = np.arange(0, n_bars, rebalance_every)
+    weights = allocation_weights(close, signals, allocation, atr=atr, kelly_params=kelly_params).iloc[rebalance_bars]
+    target = weights.to_numpy()
+    cash = 1 - target.sum(axis=1)
+
+    # Cumulative growth of every asset; a missing return counts as no change
+    prices = close.to_numpy(dtype=float)
+    asset_returns = np.zeros(prices.shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        asset_returns[1:] = prices[1:] / prices[:-1] - 1
+    growth = np.cumprod(1 + np.nan_to_num(asset_returns, nan=0.0), axis=0)
+
+    # Every bar after a rebalancing belongs to that rebalancing's holding period
+    period = np.searchsorted(rebalance_bars, np.arange(n_bars), side="left") - 1
+    period[0] = 0
+    start_growth = growth[rebalance_bars]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative_growth = np.where(start_growth[period] > 0, growth / start_growth[period], 0.0)
+    multiple = (target[period] * relative_growth).sum(axis=1) + cash[period]
+    multiple[0] = 1.0
+
+    # Value at each rebalancing is the previous rebalancing's value times its holding period multiple
+    period_multiple = multiple[np.minimum(rebalance_bars[1:], n_bars - 1)]
+    start_value = initial_capital * np.concatenate([[1.0], np.cumprod(period_multiple)])[:len(rebalance_bars)]
+    portfolio_value = start_value[period] * multiple
+
+    results = pd.DataFrame({"Portfolio Value": portfolio_value}, index=close.index)
+    results["Returns"] = results["Portfolio Value"].pct_change().fillna(0).astype(float)
+    results["Invested"] = (1 - cash)[period]
+    return results, weights
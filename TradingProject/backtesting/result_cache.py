@@ -0,0 +1,243 @@
+# backtesting/result_cache.py
+import os
+import sys
+import uuid
+import pickle
+import inspect
+import hashlib
+import importlib
+import numpy as np
+import pandas as pd
+from backtesting.backtest_engine import backtest_strategy
+from instrumentation import count
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache",
+                                 "results")
+DEFAULT_MAX_BYTES = 512 * 2 ** 20
+
+# Modules whose code every optimizer and backtest result depends on
+ENGINE_MODULES = ("backtesting.backtest_engine", "backtesting.performance", "backtesting.search")
+
+
+def fingerprint(*parts):
+    """
+    Hash any mix of DataFrames, Series, arrays, modules and plain values into a hex digest.
+    DataFrames and Series are hashed by their index, column names and values; modules by their
+    source code, so editing a strategy or engine changes every key that depends on it.
+    Args:
+        *parts: Values to hash, in order.
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            digest.update(b"frame")
+            digest.update(repr(list(part.columns) if isinstance(part, pd.DataFrame) else part.name).encode())
+            digest.update(np.ascontiguousarray(part.index.to_numpy()).view(np.uint8) if len(part)
+                          else b"empty")
+            values = np.ascontiguousarray(part.to_numpy(dtype=float))
+            digest.update(values.view(np.uint8))
+        elif isinstance(part, np.ndarray):
+            digest.update(b"array")
+            digest.update(str(part.dtype).encode())
+            digest.update(np.ascontiguousarray(part).view(np.uint8))
+        elif inspect.ismodule(part):
+            digest.update(b"module")
+            digest.update(inspect.getsource(part).encode())
+        else:
+            digest.update(b"value")
+            digest.update(repr(part).encode())
+        digest.update(b"|")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache of optimizer and backtest results.
+    Entries are pickled under the hash of everything they depend on, so a changed input simply
+    misses. The cache is kept under max_bytes by evicting the least recently used entries;
+    reading an entry refreshes its modification time, which serves as the access time.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+
+    def get(self, key, default=None):
+        """
+        Read an entry.
+        Args:
+            key (str): Entry key (see fingerprint).
+            default: Value returned on a miss.
+        Returns:
+            The stored value, or default.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+            return value
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+
+    def put(self, key, value):
+        """
+        Store an entry, replacing any previous value, and evict old entries if over the size limit.
+        Args:
+            key (str): Entry key.
+            value: Picklable value.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temporary name, so concurrent writers (e.g. batch workers) never mix their files
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def entries(self):
+        """
+        List the cached entries.
+        Returns:
+            list: (modification time, size in bytes, path) per entry.
+        """
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(shard_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """
+        Delete the least recently used entries until the cache fits in max_bytes.
+        """
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """
+        Delete every entry.
+        """
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """
+    Return the shared result cache, creating it on first use.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
+
+
+def set_default_cache(cache):
+    """
+    Replace the shared result cache, e.g. with a ResultCache in a temporary directory.
+    Args:
+        cache (ResultCache): Cache used by cached_best_params and cached_backtest.
+    """
+    global _default_cache
+    _default_cache = cache
+
+
+def _engine_modules():
+    return [sys.modules.get(name) or importlib.import_module(name) for name in ENGINE_MODULES]
+
+
+def cached_best_params(strategy_module, data, ticker, cache=None, return_surface=False, **options):
+    """
+    get_best_params through the cache.
+    The grid search stores the Sharpe surface it computes along with the best parameters. Other
+    searches have no surface; it is computed, and added to the entry, only when asked for.
+    Args:
+        strategy_module (module): Strategy module.
+        data (pd.DataFrame): Historical stock data.
+        ticker (str): Stock ticker symbol.
+        cache (ResultCache): Cache to use; defaults to the shared cache.
+        return_surface (bool): Also return the Sharpe surface of PARAM_GRID.
+        **options: Passed to the strategy's get_best_params (e.g. search, max_evals).
+    Returns:
+        dict: Best parameters. With return_surface, a tuple of the best parameters and the surface.
+    """
+    cache = cache or get_default_cache()
+    grids = (getattr(strategy_module, "PARAM_GRID", None), getattr(strategy_module, "SEARCH_SPACE", None))
+    key = fingerprint("best_params", strategy_module, *_engine_modules(), grids, sorted(options.items()), ticker, data)
+
+    entry = cache.get(key)
+    if entry is not None:
+        count("result_cache_hits")
+    else:
+        count("result_cache_misses")
+        best_params, surface = strategy_module.get_best_params(data, ticker, return_surface=True, **options)
+        entry = {"best_params": best_params, "surface": surface}
+        cache.put(key, entry)
+
+    if not return_surface:
+        return entry["best_params"]
+    if entry["surface"] is None and hasattr(strategy_module, "signal_grid"):
+        from backtesting.search import sharpe_surface
+
+        entry["surface"] = sharpe_surface(strategy_module, data, ticker)
+        cache.put(key, entry)
+    return entry["best_params"], entry["surface"]
+
+
+def cached_backtest(strategy_module, ticker, best_params, data, cache=None, **backtest_options):
+    """
+    backtest_strategy through the cache.
+    Args:
+        strategy_module (module): Strategy module that generated the signals.
+        ticker (str): Stock ticker symbol.
+        best_params (dict): Parameters the signals were generated with.
+        data (pd.DataFrame): Stock data with the 'Signal' column.
+        cache (ResultCache): Cache to use; defaults to the shared cache.
+        **backtest_options: Passed to backtest_strategy (e.g. kelly_params, use_kelly).
+    Returns:
+        pd.DataFrame: Backtest results.
+    """
+    cache = cache or get_default_cache()
+    key = fingerprint("backtest", strategy_module, *_engine_modules(), ticker, sorted(best_params.items()),
+                      sorted(backtest_options.items()), data)
+    results = cache.get(key)
+    if results is not None:
+        count("result_cache_hits")
+        return results
+    count("result_cache_misses")
+
+    results = backtest_strategy(data.copy(), **backtest_options)
+    cache.put(key, results)
+    return results
@@ -0,0 +1,177 @@
+# backtesting/results_store.py
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "results")
+
+# Derived backtest column -> (file name, stored dtype). The inputs (OHLCV and indicators) are not
+# stored; the run's metadata refers to the data they came from instead.
+RESULT_COLUMNS = {
+    "Signal": ("signal", np.int8),
+    "Position": ("position", np.int8),
+    "Portfolio Value": ("portfolio_value", np.float64),
+    "Returns": ("returns", np.float64),
+}
+
+
+class ResultsStore:
+    """
+    On-disk store of backtest results indexed by (strategy, ticker, run).
+    Every run keeps only the derived columns, one .npy file each plus the dates, so they can be
+    memory-mapped without parsing; a meta.json records the parameters and the input data.
+    """
+
+    def __init__(self, results_dir=DEFAULT_RESULTS_DIR):
+        self.results_dir = results_dir
+
+    def _run_dir(self, strategy, ticker, run):
+        return os.path.join(self.results_dir, strategy, ticker, run)
+
+    def save(self, strategy, ticker, results, params=None, data_ref=None, run=None):
+        """
+        Store the results of one backtest run.
+        Args:
+            strategy (str): Strategy name.
+            ticker (str): Stock ticker symbol.
+            results (pd.DataFrame): backtest_strategy output with a DatetimeIndex.
+            params (dict): Strategy parameters of the run.
+            data_ref (dict): Description of the input data (e.g. source, period and interval).
+            run (str): Run id; defaults to the current time.
+        Returns:
+            str: The run id.
+        """
+        run = run or time.strftime("%Y%m%d_%H%M%S") + f"_{time.time_ns() % 10 ** 9:09d}"
+        run_dir = self._run_dir(strategy, ticker, run)
+        os.makedirs(run_dir, exist_ok=True)
+
+        arrays = {"dates": results.index.to_numpy(dtype="datetime64[ns]").view("int64")}
+        for column, (name, dtype) in RESULT_COLUMNS.items():
+            if column in results.columns:
+                arrays[name] = results[column].to_numpy(dtype=dtype)
+        for name, values in arrays.items():
+            tmp_path = os.path.join(run_dir, f"{name}.tmp.npy")
+            np.save(tmp_path, values)
+            os.replace(tmp_path, os.path.join(run_dir, f"{name}.npy"))
+
+        meta = {
+            "strategy": strategy,
+            "ticker": ticker,
+            "run": run,
+            "rows": len(results),
+            "columns": [column for column in RESULT_COLUMNS if column in results.columns],
+            "first_date": str(results.index[0]) if len(results) else None,
+            "last_date": str(results.index[-1]) if len(results) else None,
+            "params": params or {},
+            "data": data_ref or {},
+            "saved_at": time.time(),
+        }
+        tmp_path = os.path.join(run_dir, "meta.tmp.json")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, default=str)
+        os.replace(tmp_path, os.path.join(run_dir, "meta.json"))
+        return run
+
+    def runs(self, strategy=None, ticker=None):
+        """
+        List the stored runs.
+        Args:
+            strategy (str): Only list runs of this strategy.
+            ticker (str): Only list runs for this ticker.
+        Returns:
+            pd.DataFrame: Run metadata indexed by (strategy, ticker, run), oldest run first.
+        """
+        rows = []
+        strategies = [strategy] if strategy else _subdirs(self.results_dir)
+        for strategy_name in strategies:
+            tickers = [ticker] if ticker else _subdirs(os.path.join(self.results_dir, strategy_name))
+            for ticker_name in tickers:
+                for run in _subdirs(os.path.join(self.results_dir, strategy_name, ticker_name)):
+                    meta_path = os.path.join(self._run_dir(strategy_name, ticker_name, run), "meta.json")
+                    if os.path.exists(meta_path):
+                        with open(meta_path) as f:
+                            rows.append(json.load(f))
+
+        columns = ["strategy", "ticker", "run", "rows", "first_date", "last_date", "params", "data", "saved_at"]
+        runs = pd.DataFrame(rows, columns=columns).sort_values(["strategy", "ticker", "saved_at", "run"])
+        return runs.set_index(["strategy", "ticker", "run"])
+
+    def latest_run(self, strategy, ticker):
+        """
+        Return the id of the most recent run of a strategy on a ticker, or None.
+        """
+        runs = self.runs(strategy, ticker)
+        return runs.index[-1][2] if len(runs) else None
+
+    def read(self, strategy, ticker, run=None):
+        """
+        Memory-map the columns of a run without copying them.
+        Args:
+            strategy (str): Strategy name.
+            ticker (str): Stock ticker symbol.
+            run (str): Run id; defaults to the latest run.
+        Returns:
+            tuple: Dates (pd.DatetimeIndex), dict of column name to read-only memory-mapped array,
+                and the run metadata.
+        """
+        run = run or self.latest_run(strategy, ticker)
+        if run is None:
+            raise FileNotFoundError(f"No stored results for {strategy} on {ticker}.")
+        run_dir = self._run_dir(strategy, ticker, run)
+        with open(os.path.join(run_dir, "meta.json")) as f:
+            meta = json.load(f)
+
+        dates = np.load(os.path.join(run_dir, "dates.npy"), mmap_mode="r")
+        columns = {
+            column: np.load(os.path.join(run_dir, f"{RESULT_COLUMNS[column][0]}.npy"), mmap_mode="r")
+            for column in meta["columns"]
+        }
+        index = pd.DatetimeIndex(dates.view("datetime64[ns]"), name="Date")
+        return index, columns, meta
+
+    def load(self, strategy, ticker, run=None):
+        """
+        Load a run as a DataFrame.
+        Args:
+            strategy (str): Strategy name.
+            ticker (str): Stock ticker symbol.
+            run (str): Run id; defaults to the latest run.
+        Returns:
+            pd.DataFrame: The stored columns indexed by date.
+        """
+        index, columns, _ = self.read(strategy, ticker, run)
+        return pd.DataFrame(columns, index=index)
+
+    def export_csv(self, strategy, ticker, path, run=None):
+        """
+        Write a run to CSV, with the dates as the first column.
+        Args:
+            strategy (str): Strategy name.
+            ticker (str): Stock ticker symbol.
+            path (str): Output file.
+            run (str): Run id; defaults to the latest run.
+        """
+        self.load(strategy, ticker, run).to_csv(path)
+
+
+def _subdirs(path):
+    if not os.path.isdir(path):
+        return []
+    return sorted(name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name)))
+
+
+_default_results_store = None
+
+
+def get_default_results_store():
+    """
+    Return the shared ResultsStore.
+    Returns:
+        ResultsStore: Store in the default results directory.
+    """
+    global _default_results_store
+    if _default_results_store is None:
+        _default_results_store = ResultsStore()
+    return _default_results_store
@@ -0,0 +1,183 @@
+# backtesting/search.py
+import math
+import time
+import itertools
+import numpy as np
+import pandas as pd
+from data.market_data import normalize_bars
+from backtesting.backtest_engine import signal_returns
+from backtesting.performance import sharpe_ratios
+from backtesting.walk_forward import grid_signals
+from instrumentation import count
+
+SEARCH_METHODS = ("grid", "random", "halving")
+
+
+def parameter_combinations(param_grid):
+    """
+    List every combination of a parameter grid in grid order.
+    Args:
+        param_grid (dict): Parameter name to values.
+    Returns:
+        list: Tuples of parameter values, the last parameter varying fastest.
+    """
+    return list(itertools.product(*param_grid.values()))
+
+
+def score_combinations(strategy_module, data, ticker, combinations):
+    """
+    Compute the Sharpe ratio of arbitrary parameter combinations of a strategy.
+    Combinations are grouped on all but their last parameter so each group is one call to the
+    strategy's signal_grid, which computes the group's indicator once.
+    Args:
+        strategy_module (module): Strategy module with PARAM_GRID and signal_grid.
+        data (pd.DataFrame): Historical stock data.
+        ticker (str): Stock ticker symbol.
+        combinations (list): Tuples of parameter values in PARAM_GRID order.
+    Returns:
+        np.ndarray: Sharpe ratio per combination; -inf where the strategy never trades and NaN
+            for combinations the strategy rejects (e.g. a short window not below the long window).
+    """
+    close = normalize_bars(data, ticker)["Close"].to_numpy(dtype=float)
+    *group_names, last_name = strategy_module.PARAM_GRID
+
+    groups = {}
+    for index, combination in enumerate(combinations):
+        groups.setdefault(tuple(combination[:-1]), []).append((index, combination[-1]))
+
+    count("optimizer_evaluations", len(combinations))
+    scores = np.full(len(combinations), np.nan)
+    for group, members in groups.items():
+        grid = {name: [value] for name, value in zip(group_names, group)}
+        grid[last_name] = [last for _, last in members]
+        sharpe = {}
+        for pairs, signals in grid_signals(strategy_module, data, ticker, grid):
+            sharpe.update(zip(map(tuple, pairs), sharpe_ratios(signal_returns(close, signals), zero_std_value=-np.inf)))
+        for index, last in members:
+            scores[index] = sharpe.get(group + (last,), np.nan)
+    return scores
+
+
+def sharpe_surface(strategy_module, data, ticker, param_grid=None):
+    """
+    Compute the Sharpe ratio of every combination of a parameter grid.
+    Args:
+        strategy_module (module): Strategy module with PARAM_GRID and signal_grid.
+        data (pd.DataFrame): Historical stock data.
+        ticker (str): Stock ticker symbol.
+        param_grid (dict): Parameter name to values; defaults to the strategy's PARAM_GRID.
+    Returns:
+        pd.DataFrame: Sharpe ratios with the last parameter as columns and the others as rows
+            (a MultiIndex when there are more than two); -inf where the strategy never trades,
+            as in the grid optimizers, and NaN for combinations the strategy rejects.
+    """
+    param_grid = param_grid or strategy_module.PARAM_GRID
+    *row_names, column_name = param_grid
+    *row_values, column_values = (list(values) for values in param_grid.values())
+    close = normalize_bars(data, ticker)["Close"].to_numpy(dtype=float)
+
+    if len(row_names) == 1:
+        index = pd.Index(row_values[0], name=row_names[0])
+        row_positions = {(value,): position for position, value in enumerate(row_values[0])}
+    else:
+        index = pd.MultiIndex.from_product(row_values, names=row_names)
+        row_positions = {tuple(key): position for position, key in enumerate(index)}
+    column_positions = {value: position for position, value in enumerate(column_values)}
+
+    values = np.full((len(index), len(column_values)), np.nan)
+    for pairs, signals in grid_signals(strategy_module, data, ticker, param_grid):
+        count("optimizer_evaluations", len(pairs))
+        sharpe = sharpe_ratios(signal_returns(close, signals), zero_std_value=-np.inf)
+        rows = [row_positions[tuple(pair[:-1])] for pair in pairs]
+        columns = [column_positions[pair[-1]] for pair in pairs]
+        values[rows, columns] = sharpe
+    return pd.DataFrame(values, index=index, columns=pd.Index(column_values, name=column_name))
+
+
+def search_params(strategy_module, data, ticker, method="halving", param_grid=None, max_evals=300,
+                  time_budget=None, eta=2, min_fraction=0.25, seed=0):
+    """
+    Search a strategy's parameter space for the best Sharpe ratio within a budget.
+    Args:
+        strategy_module (module): Strategy module with PARAM_GRID and signal_grid.
+        data (pd.DataFrame): Historical stock data.
+        ticker (str): Stock ticker symbol.
+        method (str): "grid" scores every combination; "random" scores randomly drawn combinations
+            on the full history; "halving" (successive halving) scores many candidates on the most
+            recent bars and keeps the best 1/eta of them while the data grows by eta up to the
+            full history.
+        param_grid (dict): Parameter name to values to search; defaults to the strategy's PARAM_GRID.
+        max_evals (int): Budget in full-history evaluations. Halving spends it on more candidates
+            scored on shorter data. Ignored by "grid".
+        time_budget (float): Seconds after which "random" stops drawing and "halving" goes
+            straight to its final full-history round. None for no limit.
+        eta (int): Halving rate of the candidates and growth rate of the data.
+        min_fraction (float): Fraction of the history scored in the first halving round.
+        seed (int): Seed of the random draws.
+    Returns:
+        dict: Best parameters and their full-history 'sharpe_ratio'. A ValueError is raised when no
+            searched combination trades, as there is then no best one.
+    """
+    if method not in SEARCH_METHODS:
+        raise ValueError(f"Unknown search method '{method}'. Expected one of {SEARCH_METHODS}.")
+
+    param_grid = param_grid or strategy_module.PARAM_GRID
+    combinations = parameter_combinations(param_grid)
+    deadline = time.perf_counter() + time_budget if time_budget is not None else math.inf
+    rng = np.random.default_rng(seed)
+
+    if method == "grid":
+        candidates, scores = combinations, score_combinations(strategy_module, data, ticker, combinations)
+    elif method == "random":
+        candidates, scores = _random_search(strategy_module, data, ticker, combinations, max_evals, deadline, rng)
+    else:
+        candidates, scores = _successive_halving(strategy_module, data, ticker, combinations, max_evals,
+                                                 deadline, rng, eta, min_fraction)
+
+    valid = np.where(np.isnan(scores), -np.inf, scores)
+    if not len(valid) or valid.max() == -np.inf:
+        raise ValueError(f"No parameter combination searched by '{method}' trades on {ticker}; "
+                         f"try more history, a larger max_evals or the grid search.")
+    best = int(np.argmax(valid))
+    return {**dict(zip(param_grid, candidates[best])), "sharpe_ratio": scores[best]}
+
+
+def _random_search(strategy_module, data, ticker, combinations, max_evals, deadline, rng, batch_size=64):
+    """
+    Score randomly drawn combinations, without replacement, in batches until the budget is spent.
+    """
+    order = rng.permutation(len(combinations))[:max_evals]
+    candidates, scores = [], []
+    for start in range(0, len(order), batch_size):
+        batch = [combinations[index] for index in sorted(order[start:start + batch_size])]
+        candidates.extend(batch)
+        scores.append(score_combinations(strategy_module, data, ticker, batch))
+        if time.perf_counter() > deadline:
+            break
+    return candidates, np.concatenate(scores) if scores else np.array([])
+
+
+def _successive_halving(strategy_module, data, ticker, combinations, max_evals, deadline, rng, eta, min_fraction):
+    """
+    Successive halving over growing windows of the most recent bars.
+    Every round costs about max_evals / n_rounds full-history evaluations: the candidates shrink by
+    eta while the data grows by eta.
+    """
+    n_rounds = math.ceil(math.log(1 / min_fraction, eta) - 1e-9) + 1
+    n_candidates = min(len(combinations), int(max_evals / (n_rounds * min_fraction)))
+    candidates = [combinations[index] for index in sorted(rng.choice(len(combinations), n_candidates, replace=False))]
+
+    fraction = min_fraction
+    while True:
+        if time.perf_counter() > deadline:
+            fraction = 1.0
+        window = data.iloc[-max(2, math.ceil(fraction * len(data))):]
+        scores = score_combinations(strategy_module, window, ticker, candidates)
+        if fraction >= 1:
+            return candidates, scores
+
+        # Keep the best 1/eta, in their original order so ties resolve like the exhaustive grid
+        keep = max(1, math.ceil(len(candidates) / eta))
+        ranked = np.argsort(-np.where(np.isnan(scores), -np.inf, scores), kind="stable")[:keep]
+        candidates = [candidates[index] for index in sorted(ranked)]
+        fraction = min(1.0, fraction * eta)
@@ -0,0 +1,199 @@
+# backtesting/walk_forward.py
+import inspect
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from data.market_data import normalize_bars
+from backtesting.backtest_engine import signal_returns
+from backtesting.performance import sharpe_ratios
+from instrumentation import count
+
+WALK_FORWARD_MODES = ("shared", "refit")
+
+
+def walk_forward_folds(n_bars, train_size=504, test_size=63, anchored=False):
+    """
+    Split a series into consecutive train/test folds.
+    Test windows follow each other without overlap, so their out-of-sample results can be stitched.
+    Args:
+        n_bars (int): Length of the series.
+        train_size (int): Number of bars in each training window.
+        test_size (int): Number of bars in each test window.
+        anchored (bool): Start every training window at the first bar instead of rolling it.
+    Returns:
+        list: (train_start, test_start, test_end) bar positions per fold.
+    """
+    if train_size <= 1 or test_size <= 0:
+        raise ValueError("train_size must be larger than 1 and test_size must be positive.")
+    if train_size >= n_bars:
+        raise ValueError(f"train_size ({train_size}) must be smaller than the series length ({n_bars}).")
+
+    folds = []
+    for test_start in range(train_size, n_bars, test_size):
+        train_start = 0 if anchored else test_start - train_size
+        folds.append((train_start, test_start, min(test_start + test_size, n_bars)))
+    return folds
+
+
+def grid_signals(strategy_module, data, ticker, param_grid=None):
+    """
+    Call a strategy's signal_grid with its parameter grid.
+    Args:
+        strategy_module (module): Strategy module with PARAM_GRID and signal_grid.
+        data (pd.DataFrame): Historical stock data.
+        ticker (str): Stock ticker symbol.
+        param_grid (dict): Parameter name to values; defaults to the strategy's PARAM_GRID.
+    Returns:
+        generator: (pairs, signals) blocks from the strategy's signal_grid.
+    """
+    param_grid = param_grid or strategy_module.PARAM_GRID
+    if "ticker" in inspect.signature(strategy_module.signal_grid).parameters:
+        return strategy_module.signal_grid(data, *param_grid.values(), ticker=ticker)
+    return strategy_module.signal_grid(data, *param_grid.values())
+
+
+def walk_forward(strategy_name, data, ticker, train_size=504, test_size=63, anchored=False, mode="shared",
+                 param_grid=None, max_workers=None, initial_capital=10000):
+    """
+    Walk-forward optimization: pick parameters on each training window, trade them on the
+    following test window and stitch the out-of-sample returns into one equity curve.
+    Args:
+        strategy_name (str): Name of the strategy module in the strategies folder.
+        data (pd.DataFrame): Historical stock data.
+        ticker (str): Stock ticker symbol.
+        train_size (int): Number of bars in each training window.
+        test_size (int): Number of bars in each test window.
+        anchored (bool): Start every training window at the first bar instead of rolling it.
+        mode (str): "shared" computes the signals of every parameter combination once over the full
+            history and scores all folds from prefix sums of their returns; "refit" calls the
+            strategy's get_best_params on each training slice, so indicators start cold in every fold.
+        param_grid (dict): Parameter grid for "shared"; defaults to the strategy's PARAM_GRID.
+        max_workers (int): Worker processes for "refit" folds; None fits the folds one after another.
+        initial_capital (float): Starting value of the out-of-sample equity curve.
+    Returns:
+        tuple: DataFrame of the test bars with 'Fold', 'Position', 'Returns' and 'Portfolio Value',
+            and a DataFrame with one row per fold (dates, parameters, train and test Sharpe ratio).
+    """
+    if mode not in WALK_FORWARD_MODES:
+        raise ValueError(f"Unknown walk-forward mode '{mode}'. Expected one of {WALK_FORWARD_MODES}.")
+
+    strategy_module = importlib.import_module(f"strategies.{strategy_name}")
+    close = normalize_bars(data, ticker)["Close"].to_numpy(dtype=float)
+    folds = walk_forward_folds(len(close), train_size, test_size, anchored)
+
+    if mode == "shared":
+        fold_params = _fit_shared(strategy_module, data, ticker, close, folds, param_grid)
+    else:
+        fold_params = _fit_refit(strategy_name, data, ticker, folds, max_workers)
+
+    param_names = list((param_grid or strategy_module.PARAM_GRID).keys())
+    results, summary = [], []
+    for fold, ((train_start, test_start, test_end), (params, train_sharpe)) in enumerate(zip(folds, fold_params)):
+        # Signals are causal, so the full-history signals of the chosen parameters are the live signals
+        grid = {name: [params[name]] for name in param_names}
+        _, signals = next(grid_signals(strategy_module, data, ticker, grid))
+        returns = signal_returns(close, signals[0])
+
+        test = pd.DataFrame({
+            "Fold": fold,
+            "Position": np.concatenate([[0], signals[0, :-1]])[test_start:test_end],
+            "Returns": np.nan_to_num(returns[test_start:test_end], nan=0.0),
+        }, index=data.index[test_start:test_end])
+        results.append(test)
+        summary.append({
+            "fold": fold,
+            "train_start": data.index[train_start],
+            "test_start": data.index[test_start],
+            "test_end": data.index[test_end - 1],
+            **{name: params[name] for name in param_names},
+            "train_sharpe": train_sharpe,
+            "test_sharpe": sharpe_ratios(returns[test_start:test_end])[0],
+        })
+
+    results = pd.concat(results)
+    results["Portfolio Value"] = (1 + results["Returns"]).cumprod() * initial_capital
+    return results, pd.DataFrame(summary)
+
+
+def _fit_shared(strategy_module, data, ticker, close, folds, param_grid):
+    """
+    Pick the best parameters of every fold from one pass over the strategy's signal grid.
+    Each block's returns are reduced to prefix sums, so scoring a training window costs O(1) per
+    combination whatever its length. Combinations are visited in grid order and only a strictly
+    better Sharpe ratio replaces the current best, as in the strategies' optimizers.
+    """
+    param_names = list((param_grid or strategy_module.PARAM_GRID).keys())
+    starts = np.array([train_start for train_start, _, _ in folds])
+    ends = np.array([test_start for _, test_start, _ in folds])
+
+    daily_returns = signal_returns(close, np.ones(len(close)))
+    valid_counts = np.concatenate([[0], np.cumsum(~np.isnan(daily_returns))])
+    n = (valid_counts[ends] - valid_counts[starts]).astype(float)
+
+    best_sharpe = np.full(len(folds), -np.inf)
+    best_params = [None] * len(folds)
+
+    for pairs, signals in grid_signals(strategy_module, data, ticker, param_grid):
+        count("optimizer_evaluations", len(pairs))
+        returns = np.nan_to_num(signal_returns(close, signals), nan=0.0)
+        zeros = np.zeros((len(pairs), 1))
+        sums = np.concatenate([zeros, np.cumsum(returns, axis=1)], axis=1)
+        squares = np.concatenate([zeros, np.cumsum(returns * returns, axis=1)], axis=1)
+
+        total = sums[:, ends] - sums[:, starts]
+        total_squared = squares[:, ends] - squares[:, starts]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = total / n
+            std = np.sqrt(np.maximum(total_squared - total * mean, 0.0) / (n - 1))
+            sharpe = np.where(std > 0, mean / std * (252 ** 0.5), -np.inf)
+
+        best = np.argmax(np.nan_to_num(sharpe, nan=-np.inf), axis=0)
+        for fold, row in enumerate(best):
+            if sharpe[row, fold] > best_sharpe[fold]:
+                best_sharpe[fold] = sharpe[row, fold]
+                best_params[fold] = dict(zip(param_names, pairs[row]))
+
+    for fold, params in enumerate(best_params):
+        if params is None:
+            raise ValueError(f"No parameters with a defined Sharpe ratio in fold {fold}.")
+    return list(zip(best_params, best_sharpe))
+
+
+def _fit_refit(strategy_name, data, ticker, folds, max_workers):
+    """
+    Run the strategy's own optimizer on every training slice, optionally in parallel.
+    """
+    train_slices = [data.iloc[train_start:test_start] for train_start, test_start, _ in folds]
+    if not max_workers:
+        return [_fit_fold(strategy_name, train_data, ticker) for train_data in train_slices]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_fit_fold, [strategy_name] * len(folds), train_slices, [ticker] * len(folds)))
+
+
+def _fit_fold(strategy_name, train_data, ticker):
+    strategy_module = importlib.import_module(f"strategies.{strategy_name}")
+    best_params = strategy_module.get_best_params(train_data, ticker)
+
+    # Score the chosen parameters on the training slice itself
+    close = normalize_bars(train_data, ticker)["Close"].to_numpy(dtype=float)
+    grid = {name: [best_params[name]] for name in strategy_module.PARAM_GRID}
+    _, signals = next(grid_signals(strategy_module, train_data, ticker, grid))
+    return best_params, sharpe_ratios(signal_returns(close, signals))[0]
+
+
+if __name__ == "__main__":
+    from data.market_data import fetch_stock_data
+
+    stock_ticker = "KO"
+    stock_data = fetch_stock_data(stock_ticker)
+    if stock_data is None:
+        print("Failed to fetch data.")
+        exit()
+
+    for name in ("moving_average", "break_out", "mean_reverting_strategy"):
+        results, summary = walk_forward(name, stock_data, stock_ticker)
+        print(f"\n{name}: {len(summary)} folds")
+        print(summary.to_string(index=False))
+        print(f"Out-of-sample Sharpe ratio: {sharpe_ratios(results['Returns'].to_numpy())[0]:.2f}, "
+              f"final value: {results['Portfolio Value'].iloc[-1]:.2f}")
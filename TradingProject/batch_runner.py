@@ -0,0 +1,188 @@
+import os
+import time
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from data.market_data import fetch_stock_data
+from data.feature_store import get_default_feature_store
+from backtesting.backtest_engine import backtest_strategy
+from backtesting.performance import evaluate_strategy
+from backtesting.search import SEARCH_METHODS
+from backtesting.result_cache import cached_best_params, cached_backtest
+from main import load_strategy, list_strategies, generate_strategy_signals
+
+DEFAULT_TICKER_FILES = ("breakout_stocks.csv", "moving_average_stocks.csv")
+
+
+def load_tickers(ticker_files=DEFAULT_TICKER_FILES):
+    """
+    Load the unique tickers from the screener output files.
+    Args:
+        ticker_files (iterable): CSV files with a 'ticker' column.
+    Returns:
+        list: Tickers in order of first appearance.
+    """
+    tickers = []
+    for ticker_file in ticker_files:
+        if not os.path.exists(ticker_file):
+            print(f"Ticker file '{ticker_file}' not found, skipping.")
+            continue
+        for ticker in pd.read_csv(ticker_file)["ticker"]:
+            if ticker not in tickers:
+                tickers.append(ticker)
+    return tickers
+
+
+def run_job(strategy_name, ticker, use_kelly=False, search="grid", max_evals=300, use_cache=True):
+    """
+    Run the full pipeline (fetch, optimize, signals, backtest, evaluate) for one strategy and ticker.
+    Never raises: failures are reported in the returned row so one bad ticker cannot stop a batch.
+    Args:
+        strategy_name (str): Name of the strategy module.
+        ticker (str): Stock ticker symbol.
+        use_kelly (bool): Whether to apply the Kelly Criterion in the backtest.
+        search (str): Parameter search method passed to the strategy's get_best_params.
+        max_evals (int): Evaluation budget of the "random" and "halving" searches.
+        use_cache (bool): Reuse optimizer and backtest results from the result cache and indicators
+            from the feature store.
+    Returns:
+        dict: Result row with status, error, stage timings, best parameters and metrics.
+    """
+    row = {"strategy": strategy_name, "ticker": ticker, "status": "ok", "error": ""}
+    job_start = time.perf_counter()
+    stage_start = job_start
+    stage = "load"
+
+    def finish_stage(name):
+        nonlocal stage_start
+        now = time.perf_counter()
+        row[f"{name}_seconds"] = now - stage_start
+        stage_start = now
+
+    try:
+        strategy_module = load_strategy(strategy_name)
+        if strategy_module is None:
+            raise ModuleNotFoundError(f"Strategy '{strategy_name}' not found.")
+        finish_stage("load")
+
+        stage = "fetch"
+        stock_data = fetch_stock_data(ticker)
+        if stock_data is None:
+            raise ValueError(f"Failed to fetch data for {ticker}.")
+        finish_stage("fetch")
+
+        stage = "optimize"
+        if use_cache:
+            best_params = cached_best_params(strategy_module, stock_data, ticker, search=search,
+                                             max_evals=max_evals)
+        else:
+            best_params = strategy_module.get_best_params(stock_data, ticker, search=search, max_evals=max_evals)
+        row.update({key: value for key, value in best_params.items() if key != "kelly_params"})
+        finish_stage("optimize")
+
+        stage = "backtest"
+        optimized_data = generate_strategy_signals(strategy_module, strategy_name, stock_data, best_params, ticker,
+                                                   features=get_default_feature_store() if use_cache else None)
+        backtest = partial(cached_backtest, strategy_module, ticker, best_params) if use_cache else backtest_strategy
+        backtest_results = backtest(
+            optimized_data,
+            kelly_params=best_params.get("kelly_params", None),
+            use_kelly=use_kelly
+        )
+        finish_stage("backtest")
+
+        stage = "evaluate"
+        metrics = evaluate_strategy(backtest_results)
+        if not metrics:
+            raise ValueError("evaluate_strategy returned no metrics.")
+        row.update(metrics)
+        finish_stage("evaluate")
+    except Exception as e:
+        row["status"] = "failed"
+        row["error"] = f"{stage}: {e}"
+
+    row["total_seconds"] = time.perf_counter() - job_start
+    return row
+
+
+def run_batch(strategies, tickers, max_workers=None, output_file="batch_results.csv", use_kelly=False,
+              search="grid", max_evals=300, use_cache=True):
+    """
+    Run every (strategy, ticker) job in parallel and write one consolidated results table.
+    Args:
+        strategies (list): Strategy names to run.
+        tickers (list): Stock tickers to run each strategy on.
+        max_workers (int): Number of worker processes (defaults to the CPU count).
+        output_file (str): CSV file for the consolidated results.
+        use_kelly (bool): Whether to apply the Kelly Criterion in the backtests.
+        search (str): Parameter search method passed to each strategy's get_best_params.
+        max_evals (int): Evaluation budget of the "random" and "halving" searches.
+        use_cache (bool): Reuse optimizer and backtest results from the result cache and indicators
+            from the feature store.
+    Returns:
+        pd.DataFrame: One row per job.
+    """
+    jobs = [(strategy, ticker) for strategy in strategies for ticker in tickers]
+    if not jobs:
+        print("No jobs to run: no strategies or no tickers selected.")
+        return pd.DataFrame(columns=["strategy", "ticker", "status", "error"])
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"Running {len(jobs)} jobs ({len(strategies)} strategies x {len(tickers)} tickers) "
+          f"on {max_workers} workers...")
+
+    batch_start = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(run_job, strategy, ticker, use_kelly, search, max_evals, use_cache): (strategy, ticker)
+            for strategy, ticker in jobs
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            strategy, ticker = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. out of memory)
+                row = {"strategy": strategy, "ticker": ticker, "status": "failed", "error": f"worker: {e}"}
+            rows.append(row)
+
+            if row["status"] == "ok":
+                print(f"[{done}/{len(jobs)}] {strategy} {ticker}: ok in {row['total_seconds']:.2f}s")
+            else:
+                print(f"[{done}/{len(jobs)}] {strategy} {ticker}: FAILED ({row['error']})")
+
+    results = pd.DataFrame(rows).sort_values(["strategy", "ticker"]).reset_index(drop=True)
+    results.to_csv(output_file, index=False)
+
+    failed = results[results["status"] != "ok"]
+    print(f"\nFinished {len(jobs)} jobs in {time.perf_counter() - batch_start:.2f}s "
+          f"with {max_workers} workers: {len(results) - len(failed)} succeeded, {len(failed)} failed.")
+    for _, row in failed.iterrows():
+        print(f"  {row['strategy']} {row['ticker']}: {row['error']}")
+    print(f"Results saved to {output_file}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest every strategy against every screened ticker.")
+    parser.add_argument("--strategies", nargs="+", help="Strategies to run (default: all in strategies/).")
+    parser.add_argument("--tickers", nargs="+", help="Tickers to run (default: read from the ticker files).")
+    parser.add_argument("--ticker-files", nargs="+", default=list(DEFAULT_TICKER_FILES),
+                        help="Screener CSVs with a 'ticker' column.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes.")
+    parser.add_argument("--output", default="batch_results.csv", help="Consolidated results CSV.")
+    parser.add_argument("--use-kelly", action="store_true", help="Apply the Kelly Criterion in backtests.")
+    parser.add_argument("--search", choices=SEARCH_METHODS, default="grid", help="Parameter search method.")
+    parser.add_argument("--max-evals", type=int, default=300, help="Evaluation budget of adaptive searches.")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute instead of using the result cache and feature store.")
+    args = parser.parse_args()
+
+    strategies = args.strategies or list_strategies()
+    tickers = args.tickers or load_tickers(args.ticker_files)
+    if not tickers:
+        print("No tickers to run.")
+        exit()
+
+    run_batch(strategies, tickers, max_workers=args.workers, output_file=args.output, use_kelly=args.use_kelly,
+              search=args.search, max_evals=args.max_evals, use_cache=not args.no_cache)
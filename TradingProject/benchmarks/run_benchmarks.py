@@ -0,0 +1,299 @@
+# benchmarks/run_benchmarks.py
+import os
+import sys
+import json
+import time
+import inspect
+import platform
+import argparse
+import importlib
+import subprocess
+import tracemalloc
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import synthetic_universe
+from data.market_data import build_price_panel, normalize_bars
+from data.screening import stack_panel, compute_screen_metrics
+from backtesting.backtest_engine import backtest_strategy, backtest_panel, signal_returns
+from backtesting.performance import evaluate_strategy, evaluate_curves, calculate_metrics, sharpe_ratios
+from backtesting.portfolio import backtest_portfolio
+from backtesting.walk_forward import walk_forward, walk_forward_folds, grid_signals
+from streaming.signals import create_stream
+from main import generate_strategy_signals
+
+STRATEGIES = ("moving_average", "break_out", "mean_reverting_strategy")
+STAGES = ("signals", "optimize", "backtest", "metrics", "streaming", "walk_forward", "panel")
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Parameters used to benchmark signal generation and backtests
+SIGNAL_PARAMS = {
+    "moving_average": {"short_window": 12, "long_window": 50},
+    "break_out": {"breakout_window": 20, "confirmation_window": 2},
+    "mean_reverting_strategy": {"lookback_window": 20, "threshold": 0.03},
+}
+
+
+def measure(func, repeat=3, memory=True):
+    """
+    Time a function and record its peak memory.
+    The timing runs do not trace memory; the peak is taken from one extra run under tracemalloc.
+    Args:
+        func (callable): Function without arguments.
+        repeat (int): Number of timed runs; the fastest is reported.
+        memory (bool): Whether to measure the peak memory.
+    Returns:
+        tuple: Result of the first run, fastest time in seconds and peak memory in MB (None if not measured).
+    """
+    result, best = None, np.inf
+    for run in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        best = min(best, time.perf_counter() - start)
+        if run == 0:
+            result = value
+
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return result, best, peak_mb
+
+
+def reduced_grid(param_grid, size=4):
+    """
+    Take about `size` evenly spaced values of every parameter, for reference runs of slow loops.
+    """
+    reduced = {}
+    for name, values in param_grid.items():
+        values = list(values)
+        reduced[name] = values[::max(1, len(values) // size)][:size]
+    return reduced
+
+
+def optimize(strategy_module, data, ticker, param_grid, engine):
+    """
+    Call a strategy's optimize_strategy on a parameter grid with the given engine.
+    """
+    if "ticker" in inspect.signature(strategy_module.optimize_strategy).parameters:
+        return strategy_module.optimize_strategy(data, *param_grid.values(), ticker=ticker, engine=engine)
+    return strategy_module.optimize_strategy(data, *param_grid.values(), engine=engine)
+
+
+def best_fold_sharpes(strategy_module, data, ticker, folds):
+    """
+    Reference for walk-forward "shared" mode: score every combination on every training window
+    directly with sharpe_ratios.
+    Returns:
+        tuple: Best Sharpe ratio per fold and a dict of every combination's Sharpe ratio per fold.
+    """
+    close = normalize_bars(data, ticker)["Close"].to_numpy(dtype=float)
+    scores = {}
+    for pairs, signals in grid_signals(strategy_module, data, ticker):
+        returns = signal_returns(close, signals)
+        fold_sharpes = np.column_stack([sharpe_ratios(returns[:, train_start:test_start], zero_std_value=-np.inf)
+                                        for train_start, test_start, _ in folds])
+        scores.update(zip(pairs, fold_sharpes))
+    best = np.nanmax(np.array(list(scores.values())), axis=0)
+    return best, scores
+
+
+def run_benchmarks(n_bars, n_tickers=1, stages=STAGES, strategies=STRATEGIES, repeat=3, reference_max_bars=20_000,
+                   seed=0, memory=True):
+    """
+    Benchmark every stage on synthetic data of one size.
+    Reference implementations (loop engines and streaming replay) only run up to reference_max_bars,
+    where their results are also checked against the fast paths.
+    Args:
+        n_bars (int): Number of bars per ticker.
+        n_tickers (int): Number of tickers for the panel stages.
+        stages (iterable): Stages to run (see STAGES).
+        strategies (iterable): Strategy modules to benchmark.
+        repeat (int): Timed runs per measurement.
+        reference_max_bars (int): Largest series for which reference implementations run.
+        seed (int): Seed of the synthetic data.
+        memory (bool): Whether to record peak memory.
+    Returns:
+        tuple: List of timing records and list of correctness check records.
+    """
+    universe = synthetic_universe(n_bars, n_tickers, seed)
+    ticker = next(iter(universe))
+    data = universe[ticker]
+    run_reference = n_bars <= reference_max_bars
+    records, checks = [], []
+
+    def record(stage, name, strategy, func, runs=repeat):
+        result, seconds, peak_mb = measure(func, runs, memory)
+        records.append({"stage": stage, "name": name, "strategy": strategy, "n_bars": n_bars,
+                        "n_tickers": n_tickers, "seconds": seconds, "peak_mb": peak_mb})
+        print(f"  {stage:10s} {name:40s} {strategy or '':24s} {seconds:10.4f}s"
+              + (f" {peak_mb:10.1f} MB" if peak_mb is not None else ""))
+        return result
+
+    def check(name, strategy, passed):
+        checks.append({"check": name, "strategy": strategy, "n_bars": n_bars, "passed": bool(passed)})
+        if not passed:
+            print(f"  CHECK FAILED: {name} ({strategy})")
+
+    print(f"\n{n_bars} bars x {n_tickers} tickers")
+    for strategy_name in strategies:
+        strategy_module = importlib.import_module(f"strategies.{strategy_name}")
+        params = SIGNAL_PARAMS[strategy_name]
+        signals = generate_strategy_signals(strategy_module, strategy_name, data, params, ticker)
+
+        if "signals" in stages:
+            record("signals", "generate_signals", strategy_name,
+                   lambda: generate_strategy_signals(strategy_module, strategy_name, data, params, ticker))
+
+        if "optimize" in stages:
+            record("optimize", "get_best_params", strategy_name,
+                   lambda: strategy_module.get_best_params(data, ticker), runs=1)
+            if run_reference:
+                grid = reduced_grid(strategy_module.PARAM_GRID)
+                fast = record("optimize", "optimize_strategy[reduced grid]", strategy_name,
+                              lambda: optimize(strategy_module, data, ticker, grid, "vectorized"))
+                slow = record("optimize", "optimize_strategy[reduced grid, loop]", strategy_name,
+                              lambda: optimize(strategy_module, data, ticker, grid, "loop"), runs=1)
+                check("optimize vectorized == loop", strategy_name,
+                      all(fast[name] == slow[name] for name in grid))
+
+        if "backtest" in stages:
+            results = record("backtest", "backtest_strategy", strategy_name, lambda: backtest_strategy(signals))
+            if run_reference:
+                reference = record("backtest", "backtest_strategy[loop]", strategy_name,
+                                   lambda: backtest_strategy(signals, engine="loop"), runs=1)
+                check("backtest vectorized == loop", strategy_name,
+                      np.array_equal(results["Portfolio Value"].to_numpy(), reference["Portfolio Value"].to_numpy()))
+
+        if "metrics" in stages:
+            results = backtest_strategy(signals)
+            record("metrics", "evaluate_strategy", strategy_name, lambda: evaluate_strategy(results))
+
+        if "streaming" in stages and run_reference:
+            bars = data.droplevel(1, axis=1)
+
+            def replay():
+                stream = create_stream(strategy_name, params)
+                return np.array([stream.push(bar) for bar in bars.to_dict("records")], dtype=np.int8)
+
+            streamed = record("streaming", "push per bar", strategy_name, replay, runs=1)
+            check("streaming == generate_signals", strategy_name,
+                  np.array_equal(streamed, signals["Signal"].to_numpy()))
+
+        if "walk_forward" in stages:
+            _, summary = record("walk_forward", "walk_forward[shared]", strategy_name,
+                                lambda: walk_forward(strategy_name, data, ticker), runs=1)
+            if run_reference:
+                folds = walk_forward_folds(len(data))
+                best, scores = best_fold_sharpes(strategy_module, data, ticker, folds)
+                chosen = np.array([scores[tuple(row[name] for name in strategy_module.PARAM_GRID)][fold]
+                                   for fold, row in summary.iterrows()])
+                check("walk_forward shared == per-fold grid", strategy_name,
+                      len(summary) == len(folds) and np.allclose(chosen, best, rtol=1e-9)
+                      and np.allclose(summary["train_sharpe"].to_numpy(dtype=float), chosen, rtol=1e-9))
+
+    if "panel" in stages:
+        from strategies.moving_average import generate_panel_signals
+
+        panel = record("panel", "build_price_panel", None, lambda: build_price_panel(universe))
+        close = panel["Close"]
+        panel_signals = record("panel", "generate_panel_signals[moving_average]", None,
+                               lambda: generate_panel_signals(close, **SIGNAL_PARAMS["moving_average"]))
+        panel_results = record("panel", "backtest_panel", None, lambda: backtest_panel(close, panel_signals))
+        panel_metrics = record("panel", "evaluate_curves", None, lambda: evaluate_curves(panel_results["Portfolio Value"]))
+        single_metrics = calculate_metrics(pd.DataFrame({"Portfolio Value": panel_results["Portfolio Value"][ticker],
+                                                         "Returns": panel_results["Returns"][ticker]}))
+        check("evaluate_curves == calculate_metrics", None,
+              np.allclose(panel_metrics.loc[ticker, list(single_metrics)].to_numpy(dtype=float),
+                          list(single_metrics.values()), rtol=1e-12, equal_nan=True))
+        record("panel", "backtest_portfolio[volatility]", None,
+               lambda: backtest_portfolio(close, panel_signals, "volatility", high=panel["High"], low=panel["Low"]))
+        record("panel", "screen metrics", None, lambda: compute_screen_metrics(*stack_panel(universe)))
+
+        single = generate_strategy_signals(importlib.import_module("strategies.moving_average"), "moving_average",
+                                           data, SIGNAL_PARAMS["moving_average"], ticker)
+        check("panel signals == generate_signals", "moving_average",
+              np.array_equal(panel_signals[ticker].to_numpy(), single["Signal"].to_numpy()))
+
+    return records, checks
+
+
+def environment():
+    """
+    Describe the code version and machine, so results from different runs can be compared.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(records, baseline_file):
+    """
+    Print the speed-up of every stage against the records of an earlier run.
+    """
+    with open(baseline_file) as f:
+        baseline = json.load(f)["records"]
+
+    def key(rec):
+        return rec["stage"], rec["name"], rec["strategy"], rec["n_bars"], rec["n_tickers"]
+
+    previous = {key(rec): rec["seconds"] for rec in baseline}
+    print(f"\nComparison with {baseline_file} (baseline / current):")
+    for rec in records:
+        if key(rec) in previous and rec["seconds"] > 0:
+            print(f"  {rec['stage']:10s} {rec['name']:40s} {rec['strategy'] or '':24s} {rec['n_bars']:>10d} bars "
+                  f"{previous[key(rec)] / rec['seconds']:8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark strategies, optimizers and backtests on synthetic data.")
+    parser.add_argument("--bars", type=int, nargs="+", default=[1_000, 10_000], help="Series lengths to run.")
+    parser.add_argument("--tickers", type=int, default=20, help="Number of tickers for the panel stages.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per measurement.")
+    parser.add_argument("--reference-max-bars", type=int, default=20_000,
+                        help="Largest series for which the reference implementations run and are checked.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory measurements.")
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/<commit>_<time>.json).")
+    parser.add_argument("--compare", help="Earlier JSON results file to compare against.")
+    args = parser.parse_args()
+
+    records, checks = [], []
+    for n_bars in args.bars:
+        size_records, size_checks = run_benchmarks(n_bars, args.tickers, args.stages, args.strategies, args.repeat,
+                                                   args.reference_max_bars, args.seed, not args.no_memory)
+        records.extend(size_records)
+        checks.extend(size_checks)
+
+    report = {"environment": environment(), "config": vars(args), "records": records, "checks": checks}
+    output_file = args.output
+    if output_file is None:
+        os.makedirs(DEFAULT_OUTPUT_DIR, exist_ok=True)
+        stamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+        output_file = os.path.join(DEFAULT_OUTPUT_DIR, f"{report['environment']['commit'] or 'nogit'}_{stamp}.json")
+    with open(output_file, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output_file}")
+
+    if args.compare:
+        compare(records, args.compare)
+
+    failed = [c for c in checks if not c["passed"]]
+    print(f"{len(checks) - len(failed)}/{len(checks)} correctness checks passed.")
+    sys.exit(1 if failed else 0)
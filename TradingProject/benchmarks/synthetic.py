@@ -0,0 +1,54 @@
+# benchmarks/synthetic.py
+import numpy as np
+import pandas as pd
+from data.market_data import to_yfinance_format
+
+# Business-day indexes run out of timestamps past this many bars, so longer series use minute bars
+MAX_DAILY_BARS = 50_000
+
+
+def synthetic_bars(n_bars, seed=0, start_price=100.0, drift=0.0003, volatility=0.015, freq=None,
+                   start="2000-01-03"):
+    """
+    Generate deterministic OHLCV bars from a geometric Brownian motion.
+    Args:
+        n_bars (int): Number of bars.
+        seed (int): Random seed; the same seed always gives the same bars.
+        start_price (float): First open price.
+        drift (float): Mean log return per bar.
+        volatility (float): Standard deviation of the log returns per bar.
+        freq (str): Bar frequency of the index; business days up to MAX_DAILY_BARS bars and
+            minutes beyond when None.
+        start (str): First timestamp.
+    Returns:
+        pd.DataFrame: Bars with 'Open', 'High', 'Low', 'Close' and 'Volume' columns.
+    """
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(drift - volatility ** 2 / 2, volatility, n_bars)))
+    previous_close = np.concatenate([[start_price], close[:-1]])
+    open_ = previous_close * np.exp(rng.normal(0, volatility / 4, n_bars))
+
+    spread = np.abs(rng.normal(0, volatility / 2, (2, n_bars)))
+    high = np.maximum(open_, close) * (1 + spread[0])
+    low = np.minimum(open_, close) * (1 - spread[1])
+    volume = np.round(rng.lognormal(14, 0.5, n_bars))
+
+    freq = freq or ("B" if n_bars <= MAX_DAILY_BARS else "min")
+    index = pd.date_range(start, periods=n_bars, freq=freq, name="Date")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+
+
+def synthetic_universe(n_bars, n_tickers=1, seed=0):
+    """
+    Generate a universe of synthetic tickers in the layout returned by fetch_stock_data.
+    Args:
+        n_bars (int): Number of bars per ticker.
+        n_tickers (int): Number of tickers.
+        seed (int): Base random seed; ticker i uses seed + i.
+    Returns:
+        dict: Ticker ('SYN000', 'SYN001', ...) to bars with yfinance MultiIndex columns.
+    """
+    return {
+        f"SYN{i:03d}": to_yfinance_format(synthetic_bars(n_bars, seed=seed + i), f"SYN{i:03d}")
+        for i in range(n_tickers)
+    }
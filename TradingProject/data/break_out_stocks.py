@@ -1,26 +1,6 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
-
-
-def fetch_stock_data(ticker, period="5y", interval="1d"):
-    """
-    Fetch historical stock data from Yahoo Finance.
-    Args:
-        ticker (str): Stock symbol (e.g., "AAPL").
-        period (str): Lookback period (e.g., "6mo").
-        interval (str): Data interval (e.g., "1d").
-    Returns:
-        pd.DataFrame: Historical stock data.
-    """
-    try:
-        data = yf.download(ticker, period=period, interval=interval, progress=False)
-        if data.empty:
-            raise ValueError(f"No data found for {ticker}")
-        return data
-    except Exception as e:
-        print(f"Error fetching data for {ticker}: {e}")
-        return None
+from data.screening import stack_panel, compute_screen_metrics, screen_stocks, SCREENS, MIN_ROWS
 
 
 def calculate_metrics(data, ticker):
@@ -33,41 +13,13 @@ def calculate_metrics(data, ticker):
         dict: Metrics including average volume, volatility, ATR, and proximity to breakout levels.
     """
     try:
-        # Flatten MultiIndex columns if needed
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = [f"{col[0]}_{ticker}" if col[1] else col[0] for col in data.columns]
+        metrics = compute_screen_metrics(*stack_panel({ticker: data})).iloc[0]
 
         # Ensure sufficient data
-        if len(data) < 50:
-            raise ValueError("Insufficient data for analysis (less than 50 rows)")
-
-        # Calculate average volume
-        avg_volume = data[f"Volume_{ticker}"].mean()
+        if metrics["rows"] < MIN_ROWS:
+            raise ValueError(f"Insufficient data for analysis (less than {MIN_ROWS} rows)")
 
-        # Calculate daily percentage volatility
-        daily_pct_change = data[f"Close_{ticker}"].pct_change()
-        volatility = daily_pct_change.std() * 100
-
-        # Calculate ATR (Average True Range)
-        high_low = data[f"High_{ticker}"] - data[f"Low_{ticker}"]
-        high_close = abs(data[f"High_{ticker}"] - data[f"Close_{ticker}"].shift())
-        low_close = abs(data[f"Low_{ticker}"] - data[f"Close_{ticker}"].shift())
-        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        atr = true_range.rolling(window=14).mean().iloc[-1] if len(data) >= 14 else 0
-
-        # Calculate proximity to 20-day high
-        recent_high = data[f"Close_{ticker}"].rolling(window=20).max().iloc[-1]
-        current_price = data[f"Close_{ticker}"].iloc[-1]
-        proximity_to_high = (recent_high - current_price) / recent_high
-
-        return {
-            "avg_volume": avg_volume,
-            "volatility": volatility,
-            "atr": atr,
-            "recent_high": recent_high,
-            "current_price": current_price,
-            "proximity_to_high": proximity_to_high,
-        }
+        return metrics[SCREENS["breakout"][1]].to_dict()
     except Exception as e:
         print(f"Error calculating metrics for {ticker}: {e}")
         return None
@@ -93,7 +45,12 @@ def filter_breakout_stocks(
     volume_threshold=1_000_000,
     volatility_threshold=2,
     atr_threshold=1.5,
-    proximity_threshold=0.05
+    proximity_threshold=0.05,
+    max_workers=None,
+    timeout=60,
+    retries=2,
+    batch_size=None,
+    features=None
 ):
     """
     Filter stocks suitable for a breakout strategy.
@@ -103,48 +60,20 @@ def filter_breakout_stocks(
         volatility_threshold (float): Minimum daily volatility (%).
         atr_threshold (float): Minimum ATR value.
         proximity_threshold (float): Maximum distance from recent high/low as a percentage.
+        max_workers (int): Download this many tickers concurrently; None downloads one after another.
+        timeout (float): Seconds per ticker before a concurrent download is given up.
+        retries (int): Retries per ticker for concurrent downloads.
+        batch_size (int): Download uncached tickers in multi-symbol batches of this size.
+        features (FeatureStore): Serve the screen indicators from this store.
     Returns:
         pd.DataFrame: Filtered stocks and their metrics.
     """
-    filtered_stocks = []
-
-    for ticker in stock_list:
-        print(f"Processing {ticker}...")
-
-        try:
-            # Fetch stock data
-            data = fetch_stock_data(ticker)
-            if data is None:
-                print(f"Failed to fetch data for {ticker}.")
-                continue
-
-            # Calculate stock metrics
-            metrics = calculate_metrics(data, ticker)
-            if metrics is None:
-                print(f"Failed to calculate metrics for {ticker}.")
-                continue
-
-            # Filter criteria for breakout strategy
-            if (
-                metrics["avg_volume"] >= volume_threshold
-                and metrics["volatility"] >= volatility_threshold
-                and metrics["atr"] >= atr_threshold
-                and metrics["proximity_to_high"] <= proximity_threshold
-            ):
-                filtered_stocks.append({
-                    "ticker": ticker,
-                    "avg_volume": metrics["avg_volume"],
-                    "volatility": metrics["volatility"],
-                    "atr": metrics["atr"],
-                    "recent_high": metrics["recent_high"],
-                    "current_price": metrics["current_price"],
-                    "proximity_to_high": metrics["proximity_to_high"]
-                })
-
-        except Exception as e:
-            print(f"Error processing {ticker}: {e}")
-
-    return pd.DataFrame(filtered_stocks)
+    return screen_stocks(
+        stock_list,
+        {"breakout": dict(volume_threshold=volume_threshold, volatility_threshold=volatility_threshold,
+                          atr_threshold=atr_threshold, proximity_threshold=proximity_threshold)},
+        features=features, max_workers=max_workers, timeout=timeout, retries=retries, batch_size=batch_size,
+    )["breakout"]
 
 
 if __name__ == "__main__":
@@ -158,7 +87,9 @@ if __name__ == "__main__":
         volume_threshold=2_000_000,
         volatility_threshold=2.5,
         atr_threshold=2,
-        proximity_threshold=0.02
+        proximity_threshold=0.02,
+        max_workers=16,
+        batch_size=100
     )
 
     # Save filtered stocks to a CSV file
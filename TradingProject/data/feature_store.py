@@ -0,0 +1,323 @@
+# data/feature_store.py
+import os
+import json
+import time
+import uuid
+import shutil
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+from streaming.indicators import StreamingEMA, RollingExtreme, RollingMean
+from data.market_data import remove_stale_entries
+from instrumentation import count
+
+DEFAULT_FEATURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "features")
+
+# Bars at the end of a series that may still be revised by the next download (the last bar is
+# refetched by MarketDataStore), so they are recomputed instead of trusted when extending
+REVISABLE_BARS = 1
+
+# Indicator series a FeatureStore keeps in memory; the oldest is dropped beyond this
+MEMORY_ENTRIES = 1024
+
+# Series of a start date not written for this long are removed (a week of a sliding window's days)
+UNUSED_WINDOW_SECONDS = 7 * 24 * 3600
+
+# Indicator name -> (streaming indicator factory, default input field; None for the true range,
+# equivalent pandas computation on a Series of inputs)
+INDICATORS = {
+    "ema": (StreamingEMA, "Close", lambda values, window: values.ewm(span=window, adjust=False).mean()),
+    "sma": (RollingMean, "Close", lambda values, window: values.rolling(window).mean()),
+    "rolling_max": (lambda window: RollingExtreme(window, "max"), "High",
+                    lambda values, window: values.rolling(window).max()),
+    "rolling_min": (lambda window: RollingExtreme(window, "min"), "Low",
+                    lambda values, window: values.rolling(window).min()),
+    "atr": (RollingMean, None, lambda values, window: values.rolling(window).mean()),
+}
+
+
+def price_values(data, field, ticker):
+    """
+    Look up one field of a ticker's bars as a float array, whatever the column layout.
+    Args:
+        data (pd.DataFrame): Bars with yfinance MultiIndex, '{field}_{ticker}' or plain columns.
+        field (str): Price field (e.g. "Close").
+        ticker (str): Stock ticker symbol.
+    Returns:
+        np.ndarray: Field values.
+    """
+    for key in ((field, ticker), f"{field}_{ticker}", field):
+        if key in data.columns:
+            values = data[key]
+            if isinstance(values, pd.DataFrame):
+                values = values.iloc[:, 0]
+            return values.to_numpy(dtype=float)
+    raise KeyError(f"No '{field}' column for {ticker}.")
+
+
+def true_range(high, low, close):
+    """
+    True range per bar: the largest of high - low and the gaps from the previous close.
+    The first bar has no previous close and uses high - low, as in the screeners.
+    """
+    prev_close = np.concatenate([[np.nan], close[:-1]])
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def indicator_input(data, indicator, ticker, field=None):
+    """
+    The series an indicator is computed from.
+    Args:
+        data (pd.DataFrame): Historical stock data.
+        indicator (str): Indicator name (a key of INDICATORS).
+        ticker (str): Stock ticker symbol.
+        field (str): Price field, overriding the indicator's default.
+    Returns:
+        np.ndarray: Input values, one per bar.
+    """
+    if indicator not in INDICATORS:
+        raise ValueError(f"Unknown indicator '{indicator}'. Expected one of {tuple(INDICATORS)}.")
+    if indicator == "atr":
+        return true_range(*(price_values(data, name, ticker) for name in ("High", "Low", "Close")))
+    return price_values(data, field or INDICATORS[indicator][1], ticker)
+
+
+def _hash_prefix(dates, values, rows):
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(dates[:rows]).view(np.uint8))
+    digest.update(np.ascontiguousarray(values[:rows]).view(np.uint8))
+    return digest.hexdigest()
+
+
+def _run(stream, values):
+    out = np.empty(len(values), dtype=float)
+    for i, x in enumerate(values.tolist()):
+        out[i] = stream.update(x)
+    return out
+
+
+def remove_unused_windows(directory, max_age=UNUSED_WINDOW_SECONDS):
+    """
+    Delete the series of window start dates that have not been written for max_age seconds,
+    e.g. those of the earlier days of a sliding window.
+    Args:
+        directory (str): Directory of one ticker's indicator, holding a directory per start date.
+        max_age (float): Age in seconds after which a start date's series is removed.
+    """
+    now = time.time()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if now - os.path.getmtime(path) <= max_age:
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+        except OSError:
+            # Removed by a concurrent writer
+            continue
+
+
+class FeatureStore:
+    """
+    On-disk store of indicator series per (ticker, indicator, window), shared by strategies and
+    screeners.
+    A series is stored per start date of the requested bars and always holds the values of a pandas
+    pass over those bars, so the strategies and screeners get the same numbers with or without the
+    store, and the same ones their optimizers scored. A start date seen for the first time (e.g. a
+    sliding "5y" window on a new day) is computed with pandas. When the same bars come back with
+    more bars appended, the series is rebuilt with the streaming indicator (see
+    streaming.indicators), whose pickled state is kept, so later runs only compute the new tail.
+    Each series is a memory-mappable .npy file in a uniquely named entry directory that meta.json
+    is switched to, so concurrent writers cannot mix their files. Series are also kept in memory by
+    the hash of their inputs, so repeated requests in one process skip the disk.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_FEATURE_DIR, memory_entries=MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self._series = {}  # (feature directory, input hash) -> indicator values
+
+    def _feature_dir(self, ticker, indicator, window, field, interval, start):
+        name = f"{indicator}_{window}" + (f"_{field}" if field else "")
+        return os.path.join(self.cache_dir, interval, ticker, name, pd.Timestamp(start).strftime("%Y%m%d%H%M%S"))
+
+    def get(self, ticker, data, indicator, window, field=None, interval="1d"):
+        """
+        Return an indicator series for the bars, computing only what the store is missing.
+        Args:
+            ticker (str): Stock ticker symbol.
+            data (pd.DataFrame): Historical stock data (yfinance MultiIndex or flat columns).
+            indicator (str): "ema", "sma", "rolling_max", "rolling_min" or "atr".
+            window (int): Span or window of the indicator.
+            field (str): Price field, overriding the indicator's default (e.g. "Close" for "rolling_max").
+            interval (str): Bar interval, so daily and intraday series are stored apart.
+        Returns:
+            pd.Series: Indicator values aligned with data.index, equal to a pandas pass over data.
+        """
+        name = f"{indicator}_{window}"
+        values = indicator_input(data, indicator, ticker, field)
+        if not len(values):
+            return INDICATORS[indicator][2](pd.Series(values, index=data.index), window).rename(name)
+
+        dates = data.index.to_numpy(dtype="datetime64[ns]").view("int64")
+        feature_dir = self._feature_dir(ticker, indicator, window, field, interval, dates[0])
+        full_hash = _hash_prefix(dates, values, len(values))
+        result = self._series.get((feature_dir, full_hash))
+        if result is not None:
+            count("feature_store_hits")
+        else:
+            result = self.series(feature_dir, dates, values, indicator, window, full_hash)
+            if len(self._series) >= self.memory_entries:
+                self._series.pop(next(iter(self._series)))
+            self._series[(feature_dir, full_hash)] = result
+        return pd.Series(np.asarray(result), index=data.index, name=name)
+
+    def series(self, feature_dir, dates, values, indicator, window, full_hash):
+        """
+        Return the stored indicator series of some bars, extending or recomputing it as needed.
+        Args:
+            feature_dir (str): Directory of the series of bars with this start date.
+            dates (np.ndarray): int64 dates of the bars.
+            values (np.ndarray): Indicator inputs of the bars.
+            indicator (str): Indicator name (a key of INDICATORS).
+            window (int): Span or window of the indicator.
+            full_hash (str): Hash of all the dates and inputs.
+        Returns:
+            np.ndarray: Indicator values, one per bar.
+        """
+        rows = len(values)
+        meta = self.read_meta(feature_dir)
+
+        if meta is not None and meta["rows"] == rows and meta["full_hash"] == full_hash:
+            stored, _ = self.read(feature_dir, meta, with_state=False)
+            if stored is not None:
+                count("feature_store_hits")
+                return stored
+
+        if meta is None:
+            # Most new start dates are a sliding window's new day and never extended, so no state
+            count("feature_store_misses")
+            result = INDICATORS[indicator][2](pd.Series(values), window).to_numpy(dtype=float)
+            self.write(feature_dir, result, None, {
+                "rows": rows,
+                "checkpoint": 0,
+                "checkpoint_hash": _hash_prefix(dates, values, 0),
+                "full_hash": full_hash,
+            })
+            remove_unused_windows(os.path.dirname(feature_dir))
+            return result
+
+        checkpoint = meta["checkpoint"]
+        stored = stream = None
+        if 0 < checkpoint <= rows and meta["checkpoint_hash"] == _hash_prefix(dates, values, checkpoint):
+            stored, stream = self.read(feature_dir, meta)
+        if stream is not None:
+            count("feature_store_extensions")
+            head = stored[:checkpoint]
+        else:
+            count("feature_store_misses")
+            checkpoint = 0
+            head = np.empty(0)
+            stream = INDICATORS[indicator][0](window)
+
+        # Run up to the new checkpoint, save the state there, then finish the revisable bars
+        new_checkpoint = max(rows - REVISABLE_BARS, checkpoint)
+        middle = _run(stream, values[checkpoint:new_checkpoint])
+        state = pickle.dumps(stream, protocol=pickle.HIGHEST_PROTOCOL)
+        tail = _run(stream, values[new_checkpoint:])
+        result = np.concatenate([head, middle, tail])
+
+        self.write(feature_dir, result, state, {
+            "rows": rows,
+            "checkpoint": new_checkpoint,
+            "checkpoint_hash": _hash_prefix(dates, values, new_checkpoint),
+            "full_hash": full_hash,
+        })
+        return result
+
+    def read_meta(self, feature_dir):
+        """
+        Read the metadata of a stored series, or None.
+        """
+        try:
+            with open(os.path.join(feature_dir, "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def read(self, feature_dir, meta, with_state=True):
+        """
+        Read a stored series.
+        Args:
+            feature_dir (str): Directory of the series.
+            meta (dict): Its metadata, from read_meta().
+            with_state (bool): Also unpickle the streaming indicator.
+        Returns:
+            tuple: Memory-mapped values and the streaming indicator at the checkpoint (None without
+                with_state), or (None, None) if the entry cannot be read.
+        """
+        entry_dir = os.path.join(feature_dir, meta.get("version", ""))
+        try:
+            values = np.load(os.path.join(entry_dir, "values.npy"), mmap_mode="r")
+            stream = None
+            if with_state:
+                with open(os.path.join(entry_dir, "state.pkl"), "rb") as f:
+                    stream = pickle.load(f)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            return None, None
+        if len(values) != meta["rows"]:
+            # Interrupted write: treat the entry as missing
+            return None, None
+        return values, stream
+
+    def write(self, feature_dir, values, state, meta):
+        """
+        Write a series, replacing the previous one. The files go to a new entry directory and
+        meta.json is switched to it last, so readers and concurrent writers never mix two entries.
+        Args:
+            feature_dir (str): Directory of the series.
+            values (np.ndarray): Indicator values.
+            state (bytes): Pickled streaming indicator at meta["checkpoint"], or None if not kept.
+            meta (dict): Row count, checkpoint and hashes of the input prefixes.
+        """
+        version = uuid.uuid4().hex
+        entry_dir = os.path.join(feature_dir, version)
+        os.makedirs(entry_dir)
+        np.save(os.path.join(entry_dir, "values.npy"), values)
+        if state is not None:
+            with open(os.path.join(entry_dir, "state.pkl"), "wb") as f:
+                f.write(state)
+
+        tmp_path = os.path.join(feature_dir, f"meta.{version}.tmp.json")
+        with open(tmp_path, "w") as f:
+            json.dump({**meta, "version": version}, f)
+        os.replace(tmp_path, os.path.join(feature_dir, "meta.json"))
+        remove_stale_entries(feature_dir, keep=version)
+
+
+_default_feature_store = None
+
+
+def get_default_feature_store():
+    """
+    Return the shared FeatureStore.
+    Returns:
+        FeatureStore: Store in the default cache directory.
+    """
+    global _default_feature_store
+    if _default_feature_store is None:
+        _default_feature_store = FeatureStore()
+    return _default_feature_store
+
+
+def set_default_feature_store(store):
+    """
+    Replace the shared feature store, e.g. with one in a temporary directory.
+    Args:
+        store (FeatureStore): Store to use for subsequent get_default_feature_store calls.
+    """
+    global _default_feature_store
+    _default_feature_store = store
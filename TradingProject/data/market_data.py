@@ -0,0 +1,525 @@
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pandas as pd
+from instrumentation import record_error
+
+FIELDS = ("Close", "High", "Low", "Open", "Volume")
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+# Replaced cache entries are deleted once they are this old, so readers that looked up the
+# previous entry just before it was replaced can still load it
+STALE_ENTRY_SECONDS = 300
+
+
+class YahooSource:
+    """
+    Download daily or intraday bars from Yahoo Finance.
+    """
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+
+    def fetch(self, ticker, start=None, period=None, interval="1d"):
+        """
+        Download bars for a single ticker.
+        Args:
+            ticker (str): Stock symbol (e.g., "AAPL").
+            start (pd.Timestamp): First date to download (takes precedence over period).
+            period (str): Lookback period (e.g., "5y") used when no start is given.
+            interval (str): Data interval (e.g., "1d").
+        Returns:
+            pd.DataFrame: Bars with single-level OHLCV columns and a DatetimeIndex.
+        """
+        import yfinance as yf
+
+        if start is not None:
+            data = yf.download(ticker, start=start, interval=interval, progress=False, timeout=self.timeout)
+        else:
+            data = yf.download(ticker, period=period, interval=interval, progress=False, timeout=self.timeout)
+        return normalize_bars(data, ticker)
+
+    def fetch_many(self, tickers, period=None, interval="1d"):
+        """
+        Download many tickers in one multi-symbol request and split the result per ticker.
+        Args:
+            tickers (list): Stock symbols.
+            period (str): Lookback period (e.g., "5y").
+            interval (str): Data interval (e.g., "1d").
+        Returns:
+            dict: Ticker to bars with single-level OHLCV columns (empty if Yahoo returned nothing).
+        """
+        import yfinance as yf
+
+        data = yf.download(list(tickers), period=period, interval=interval, progress=False,
+                           group_by="column", timeout=self.timeout)
+        bars = {}
+        for ticker in tickers:
+            if not isinstance(data.columns, pd.MultiIndex) or ticker not in data.columns.get_level_values(1):
+                bars[ticker] = pd.DataFrame()
+                continue
+            # The combined frame spans every ticker's dates, so drop rows this ticker has no bar for
+            ticker_data = data.xs(ticker, axis=1, level=1).dropna(how="all")
+            bars[ticker] = normalize_bars(ticker_data, ticker)
+        return bars
+
+
+class CsvSource:
+    """
+    Read bars from local '{ticker}.csv' files with a 'Date' column, e.g. test fixtures.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, ticker, start=None, period=None, interval="1d"):
+        """
+        Read bars for a single ticker from its CSV file.
+        Args:
+            ticker (str): Stock symbol.
+            start (pd.Timestamp): First date to return.
+            period (str): Lookback period counted back from the last bar in the file.
+            interval (str): Unused, kept for compatibility with other sources.
+        Returns:
+            pd.DataFrame: Bars with single-level OHLCV columns and a DatetimeIndex.
+        """
+        path = os.path.join(self.directory, f"{ticker}.csv")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No fixture file for {ticker} at {path}")
+
+        data = pd.read_csv(path, index_col="Date", parse_dates=True)
+        if start is None and period is not None and len(data):
+            start = period_start(period, data.index[-1])
+        if start is not None:
+            data = data[data.index >= start]
+        return normalize_bars(data, ticker)
+
+    def fetch_many(self, tickers, period=None, interval="1d"):
+        """
+        Read many tickers; a missing file yields an empty DataFrame.
+        Args:
+            tickers (list): Stock symbols.
+            period (str): Lookback period counted back from each file's last bar.
+            interval (str): Unused, kept for compatibility with other sources.
+        Returns:
+            dict: Ticker to bars with single-level OHLCV columns.
+        """
+        bars = {}
+        for ticker in tickers:
+            try:
+                bars[ticker] = self.fetch(ticker, period=period, interval=interval)
+            except FileNotFoundError:
+                bars[ticker] = pd.DataFrame()
+        return bars
+
+
+def normalize_bars(data, ticker):
+    """
+    Convert downloaded bars to single-level OHLCV columns.
+    Args:
+        data (pd.DataFrame): Bars with yfinance MultiIndex, 'Close_{ticker}' or plain columns.
+        ticker (str): Stock ticker symbol.
+    Returns:
+        pd.DataFrame: Bars with the available columns of FIELDS, sorted by date.
+    """
+    data = data.copy()
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = [col[0] for col in data.columns]
+    data.columns = [col[:-len(ticker) - 1] if col.endswith(f"_{ticker}") else col for col in data.columns]
+    data = data[[field for field in FIELDS if field in data.columns]]
+    data.index = pd.DatetimeIndex(data.index).tz_localize(None)
+    data.index.name = "Date"
+    return data.sort_index()
+
+
+def to_yfinance_format(data, ticker):
+    """
+    Convert single-level bars to the (Price, Ticker) MultiIndex layout returned by yf.download.
+    Args:
+        data (pd.DataFrame): Bars with single-level OHLCV columns.
+        ticker (str): Stock ticker symbol.
+    Returns:
+        pd.DataFrame: Bars with MultiIndex columns such as ('Close', ticker).
+    """
+    data = data.copy()
+    data.columns = pd.MultiIndex.from_tuples([(col, ticker) for col in data.columns], names=["Price", "Ticker"])
+    return data
+
+
+def build_price_panel(frames, fields=FIELDS):
+    """
+    Align many tickers' bars into one dates x tickers DataFrame per field.
+    Args:
+        frames (dict): Ticker to historical stock data (yfinance MultiIndex or flat columns).
+        fields (iterable): Fields to build panels for.
+    Returns:
+        dict: Field to a DataFrame indexed by the union of all dates with one column per ticker
+            (NaN where a ticker has no bar).
+    """
+    bars = {ticker: normalize_bars(data, ticker) for ticker, data in frames.items()}
+    return {
+        field: pd.DataFrame({ticker: data[field] for ticker, data in bars.items() if field in data.columns})
+        for field in fields
+    }
+
+
+def load_panel(tickers, fields=FIELDS, period="5y", interval="1d", **download_options):
+    """
+    Fetch many tickers through the cache and align them into dates x tickers panels.
+    Args:
+        tickers (list): Stock symbols.
+        fields (iterable): Fields to build panels for.
+        period (str): Lookback period (e.g., "5y").
+        interval (str): Data interval (e.g., "1d").
+        **download_options: Passed to fetch_many (max_workers, timeout, retries, batch_size).
+    Returns:
+        dict: Field to a dates x tickers DataFrame; tickers that failed to download are left out.
+    """
+    frames = fetch_many(tickers, period=period, interval=interval, **download_options)
+    return build_price_panel({ticker: data for ticker, data in frames.items() if data is not None}, fields)
+
+
+def period_start(period, end):
+    """
+    Translate a yfinance-style period into the first date it covers.
+    Args:
+        period (str): Lookback period such as "5d", "2wk", "6mo", "5y", "ytd" or "max".
+        end (pd.Timestamp): Date the period is counted back from.
+    Returns:
+        pd.Timestamp: First covered date, or None for "max".
+    """
+    end = pd.Timestamp(end).normalize()
+    if period in (None, "max"):
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=end.year, month=1, day=1)
+
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if match is None:
+        raise ValueError(f"Unsupported period '{period}'")
+    number, unit = int(match.group(1)), match.group(2)
+    offsets = {
+        "d": pd.DateOffset(days=number),
+        "wk": pd.DateOffset(weeks=number),
+        "mo": pd.DateOffset(months=number),
+        "y": pd.DateOffset(years=number),
+    }
+    return end - offsets[unit]
+
+
+def remove_stale_entries(directory, keep=None):
+    """
+    Delete replaced entry directories and leftovers of interrupted writes older than
+    STALE_ENTRY_SECONDS from a cache directory whose meta.json names its current entry.
+    Args:
+        directory (str): Cache directory, e.g. of one ticker and interval.
+        keep (str): Entry version to keep regardless of its age.
+    """
+    try:
+        with open(os.path.join(directory, "meta.json")) as f:
+            current = json.load(f).get("version")
+    except (OSError, ValueError):
+        return
+    if current is None:
+        # The entry was just rewritten in the flat layout, whose files must not be removed
+        return
+
+    now = time.time()
+    for name in os.listdir(directory):
+        if name in ("meta.json", keep, current):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if now - os.path.getmtime(path) <= STALE_ENTRY_SECONDS:
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+        except OSError:
+            # Removed by a concurrent writer
+            continue
+
+
+class MarketDataStore:
+    """
+    On-disk bar cache in front of a pluggable data source.
+    Bars are stored per (interval, ticker) as one .npy file per column plus the dates, so they
+    can be memory-mapped. Every write goes to a new entry directory and meta.json is then switched
+    to it, so concurrent writers (e.g. batch jobs for the same ticker) and readers never see a
+    mix of two entries. A request is served from disk when the cache covers the period and was
+    refreshed less than max_age_hours ago; otherwise only the missing tail is fetched.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, source=None, max_age_hours=12):
+        self.cache_dir = cache_dir
+        self.source = source if source is not None else YahooSource()
+        self.max_age_hours = max_age_hours
+
+    def _ticker_dir(self, ticker, interval):
+        return os.path.join(self.cache_dir, interval, ticker)
+
+    def read(self, ticker, interval="1d"):
+        """
+        Read the cached bars of a ticker.
+        Args:
+            ticker (str): Stock ticker symbol.
+            interval (str): Data interval.
+        Returns:
+            tuple: Bars as a single-level DataFrame and the cache metadata, or (None, None).
+        """
+        ticker_dir = self._ticker_dir(ticker, interval)
+        # A second attempt covers an entry that was replaced and removed while it was being read
+        for attempt in range(2):
+            meta = self.read_meta(ticker, interval)
+            if meta is None:
+                return None, None
+            # Entries written before versioned directories keep their files in the ticker directory
+            entry_dir = os.path.join(ticker_dir, meta["version"]) if "version" in meta else ticker_dir
+            try:
+                dates = np.load(os.path.join(entry_dir, "dates.npy"), mmap_mode="r")
+                columns = {
+                    field: np.load(os.path.join(entry_dir, f"{field}.npy"), mmap_mode="r")
+                    for field in meta["fields"]
+                }
+                break
+            except (OSError, ValueError):
+                continue
+        else:
+            return None, None
+        if any(len(values) != len(dates) or len(dates) != meta["rows"] for values in columns.values()):
+            # Interrupted write: treat the entry as missing
+            return None, None
+
+        index = pd.DatetimeIndex(dates.astype("datetime64[ns]"), name="Date")
+        return pd.DataFrame(columns, index=index), meta
+
+    def read_meta(self, ticker, interval="1d"):
+        """
+        Read the cache metadata of a ticker without loading its bars.
+        Args:
+            ticker (str): Stock ticker symbol.
+            interval (str): Data interval.
+        Returns:
+            dict: Metadata, including the 'version' that identifies the entry's bars, or None.
+        """
+        try:
+            with open(os.path.join(self._ticker_dir(ticker, interval), "meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write(self, ticker, data, interval="1d", covers_from=None):
+        """
+        Write the bars of a ticker to the cache, replacing the previous entry.
+        The columns go to a new, uniquely named entry directory and the entry is switched by
+        atomically replacing meta.json, so concurrent writes of the same ticker cannot collide.
+        Args:
+            ticker (str): Stock ticker symbol.
+            data (pd.DataFrame): Bars with single-level OHLCV columns.
+            interval (str): Data interval.
+            covers_from (str): ISO date the fetched history starts from, or "max".
+        """
+        ticker_dir = self._ticker_dir(ticker, interval)
+        version = uuid.uuid4().hex
+        entry_dir = os.path.join(ticker_dir, version)
+        os.makedirs(entry_dir)
+
+        arrays = {"dates": data.index.to_numpy(dtype="datetime64[ns]").view("int64")}
+        arrays.update({field: data[field].to_numpy() for field in data.columns})
+        for name, values in arrays.items():
+            np.save(os.path.join(entry_dir, f"{name}.npy"), values)
+
+        meta = {
+            "fields": list(data.columns),
+            "rows": len(data),
+            "covers_from": covers_from,
+            "fetched_at": time.time(),
+            "version": version,
+        }
+        tmp_path = os.path.join(ticker_dir, f"meta.{version}.tmp.json")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(ticker_dir, "meta.json"))
+        remove_stale_entries(ticker_dir, keep=version)
+
+    def get(self, ticker, period="5y", interval="1d"):
+        """
+        Return the bars of a ticker for the period, fetching only what the cache is missing.
+        Args:
+            ticker (str): Stock symbol (e.g., "AAPL").
+            period (str): Lookback period (e.g., "5y").
+            interval (str): Data interval (e.g., "1d").
+        Returns:
+            pd.DataFrame: Bars in the (Price, Ticker) MultiIndex layout of yf.download.
+        """
+        start = period_start(period, pd.Timestamp.now())
+        cached, meta = self.read(ticker, interval)
+
+        if self.needs_full_fetch(meta, start):
+            data = self.source.fetch(ticker, period=period, interval=interval)
+            if data.empty:
+                raise ValueError(f"No data found for {ticker}")
+            covers_from = "max" if start is None else start.date().isoformat()
+            self.write(ticker, data, interval, covers_from=covers_from)
+        elif time.time() - meta["fetched_at"] > self.max_age_hours * 3600:
+            # Refetch from the last cached bar, which may have been incomplete when it was stored
+            try:
+                tail = self.source.fetch(ticker, start=cached.index[-1], interval=interval)
+            except Exception as e:
+                # Keep the entry stale, so the next call tries the refresh again
+                print(f"Could not refresh {ticker}, using cached data: {e}")
+                data = cached
+            else:
+                data = pd.concat([cached[cached.index < cached.index[-1]], tail]) if not tail.empty else cached
+                self.write(ticker, data, interval, covers_from=meta["covers_from"])
+        else:
+            data = cached
+
+        if start is not None:
+            data = data[data.index >= start]
+        return to_yfinance_format(data, ticker)
+
+
+    def needs_full_fetch(self, meta, start):
+        """
+        Check whether a cache entry is missing or does not reach back to the requested start.
+        Args:
+            meta (dict): Cache metadata from read(), or None.
+            start (pd.Timestamp): First requested date, or None for the full history.
+        Returns:
+            bool: True if the whole period has to be downloaded.
+        """
+        if meta is None:
+            return True
+        if meta["covers_from"] == "max":
+            return False
+        return start is None or pd.Timestamp(meta["covers_from"]) > start
+
+    def prefetch(self, tickers, period="5y", interval="1d", batch_size=50):
+        """
+        Download the tickers missing from the cache with multi-symbol requests.
+        Args:
+            tickers (list): Stock symbols.
+            period (str): Lookback period (e.g., "5y").
+            interval (str): Data interval (e.g., "1d").
+            batch_size (int): Number of tickers per request.
+        """
+        start = period_start(period, pd.Timestamp.now())
+        missing = [ticker for ticker in tickers if self.needs_full_fetch(self.read(ticker, interval)[1], start)]
+        covers_from = "max" if start is None else start.date().isoformat()
+
+        for i in range(0, len(missing), batch_size):
+            batch = missing[i:i + batch_size]
+            try:
+                bars = self.source.fetch_many(batch, period=period, interval=interval)
+            except Exception as e:
+                # Leave the batch to the per-ticker fetches
+                print(f"Batch download of {len(batch)} tickers failed: {e}")
+                continue
+            for ticker, data in bars.items():
+                if not data.empty:
+                    self.write(ticker, data, interval, covers_from=covers_from)
+
+
+_default_store = None
+
+
+def get_default_store():
+    """
+    Return the shared MarketDataStore used by fetch_stock_data.
+    Returns:
+        MarketDataStore: Store backed by Yahoo Finance and the default cache directory.
+    """
+    global _default_store
+    if _default_store is None:
+        _default_store = MarketDataStore()
+    return _default_store
+
+
+def set_default_store(store):
+    """
+    Replace the shared store, e.g. with one backed by a CsvSource in tests.
+    Args:
+        store (MarketDataStore): Store to use for subsequent fetch_stock_data calls.
+    """
+    global _default_store
+    _default_store = store
+
+
+def fetch_stock_data(ticker, period="5y", interval="1d"):
+    """
+    Fetch historical stock data through the on-disk cache.
+    Args:
+        ticker (str): Stock symbol (e.g., "AAPL").
+        period (str): Lookback period (e.g., "5y").
+        interval (str): Data interval (e.g., "1d").
+    Returns:
+        pd.DataFrame: Historical stock data, or None if it could not be fetched.
+    """
+    try:
+        return get_default_store().get(ticker, period=period, interval=interval)
+    except Exception as e:
+        print(f"Error fetching data for {ticker}: {e}")
+        record_error("fetch_stock_data", e)
+        return None
+
+
+def fetch_many(tickers, period="5y", interval="1d", max_workers=8, timeout=60, retries=2, backoff=1.0,
+               batch_size=None):
+    """
+    Fetch many tickers concurrently through the on-disk cache.
+    Args:
+        tickers (list): Stock symbols.
+        period (str): Lookback period (e.g., "5y").
+        interval (str): Data interval (e.g., "1d").
+        max_workers (int): Maximum number of concurrent downloads.
+        timeout (float): Seconds a ticker may take, including retries, before it is given up.
+        retries (int): Number of retries after a failed download.
+        backoff (float): Initial delay between retries in seconds, doubled after each retry.
+        batch_size (int): If set, first download uncached tickers in multi-symbol batches of this size.
+    Returns:
+        dict: Ticker to historical stock data (None if it could not be fetched), in input order.
+    """
+    store = get_default_store()
+    if batch_size:
+        store.prefetch(tickers, period=period, interval=interval, batch_size=batch_size)
+
+    started = {}
+
+    def fetch_with_retry(ticker):
+        started[ticker] = time.monotonic()
+        for attempt in range(retries + 1):
+            try:
+                return store.get(ticker, period=period, interval=interval)
+            except Exception as e:
+                if attempt == retries:
+                    print(f"Error fetching data for {ticker}: {e}")
+                    return None
+                time.sleep(backoff * 2 ** attempt)
+
+    results = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {executor.submit(fetch_with_retry, ticker): ticker for ticker in tickers}
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+        for future in done:
+            results[futures[future]] = future.result()
+
+        now = time.monotonic()
+        for future in list(pending):
+            ticker = futures[future]
+            if ticker in started and now - started[ticker] > timeout:
+                print(f"Timed out fetching data for {ticker} after {timeout}s")
+                results[ticker] = None
+                pending.discard(future)
+    # Do not wait for timed-out downloads that are still running
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    return {ticker: results[ticker] for ticker in tickers}
@@ -1,26 +1,6 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
-
-
-def fetch_stock_data(ticker, period="5y", interval="1d"):
-    """
-    Fetch historical stock data from Yahoo Finance.
-    Args:
-        ticker (str): Stock symbol (e.g., "AAPL").
-        period (str): Lookback period (e.g., "6mo").
-        interval (str): Data interval (e.g., "1d").
-    Returns:
-        pd.DataFrame: Historical stock data.
-    """
-    try:
-        data = yf.download(ticker, period=period, interval=interval, progress=False)
-        if data.empty:
-            raise ValueError(f"No data found for {ticker}")
-        return data
-    except Exception as e:
-        print(f"Error fetching data for {ticker}: {e}")
-        return None
+from data.screening import stack_panel, compute_screen_metrics, screen_stocks, SCREENS, MIN_ROWS
 
 
 def calculate_metrics(data, ticker):
@@ -33,60 +13,13 @@ def calculate_metrics(data, ticker):
         dict: Metrics including average volume, volatility, ATR, and trend score.
     """
     try:
-        # Flatten MultiIndex columns if needed
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = [f"{col[0]}_{ticker}" if col[1] else col[0] for col in data.columns]
-            # print("Flattened columns:", data.columns)
+        metrics = compute_screen_metrics(*stack_panel({ticker: data})).iloc[0]
 
         # Ensure sufficient data
-        if len(data) < 50:
-            raise ValueError("Insufficient data for moving averages (less than 50 rows)")
-
-        # Debugging the data before calculating EMA_50
-        # print(f"First few rows before EMA_50 calculation for {ticker}:")
-        # print(data.head())
-
-        # Calculate average volume and daily percentage volatility
-        avg_volume = data[f'Volume_{ticker}']
-        avg_volume = avg_volume.mean()
-        daily_pct_change = data[f'Close_{ticker}'].pct_change()
-        volatility = daily_pct_change.std() * 100
+        if metrics["rows"] < MIN_ROWS:
+            raise ValueError(f"Insufficient data for moving averages (less than {MIN_ROWS} rows)")
 
-        # Calculate ATR (Average True Range)
-        data[f'High-Low_{ticker}'] = data[f'High_{ticker}'] - data[f'Low_{ticker}']
-        data[f'High-Close_{ticker}'] = np.abs(data[f'High_{ticker}'] - data[f'Close_{ticker}'].shift(1))
-        data[f'Low-Close_{ticker}'] = np.abs(data[f'Low_{ticker}'] - data[f'Close_{ticker}'].shift(1))
-        data[f'True Range_{ticker}'] = data[
-            [f'High-Low_{ticker}', f'High-Close_{ticker}', f'Low-Close_{ticker}']
-        ].max(axis=1)
-        atr = data[f'True Range_{ticker}'].rolling(window=14).mean().iloc[-1] if len(data) >= 14 else 0
-
-        # Calculate EMA_50
-        sma_initial = data[f'Close_{ticker}'].iloc[:50].mean()  # Initial SMA for the first 50 rows
-        data[f'EMA_50_{ticker}'] = data[f'Close_{ticker}'].ewm(span=50, adjust=False).mean()
-        # data.iloc[49, data.columns.get_loc(f'EMA_50_{ticker}')] = sma_initial
-
-        # Debugging after calculating EMA_50
-        # print(f"EMA_50 head before handling SMA for {ticker}:")
-        # print(data[f'EMA_50_{ticker}'].head())
-        # print(f"NaN count in EMA_50 before SMA initialization for {ticker}:", data[f'EMA_50_{ticker}'].isna().sum())
-
-        # Drop rows with NaN in EMA_50
-        data = data.dropna(subset=[f'EMA_50_{ticker}'])
-
-        # Calculate trend score
-        trend_score = (data[f'Close_{ticker}'] > data[f'EMA_50_{ticker}']).mean() * 100
-
-        # Calculate average price
-        avg_price = data[f'Close_{ticker}'].mean()
-
-        return {
-            "avg_volume": avg_volume,
-            "volatility": volatility,
-            "atr": atr,
-            "trend_score": trend_score,
-            "avg_price": avg_price
-        }
+        return metrics[SCREENS["moving_average"][1]].to_dict()
 
     except Exception as e:
         print(f"Error calculating metrics for {ticker}: {e}")
@@ -108,7 +41,8 @@ def fetch_sp500_tickers():
         return []
 
 
-def filter_moving_average_stocks(stock_list, volume_threshold=1_000_000, volatility_range=(2, 5), trend_score_threshold=50):
+def filter_moving_average_stocks(stock_list, volume_threshold=1_000_000, volatility_range=(2, 5), trend_score_threshold=50,
+                                 max_workers=None, timeout=60, retries=2, batch_size=None, features=None):
     """
     Filter stocks suitable for a moving average strategy.
     Args:
@@ -116,39 +50,20 @@ def filter_moving_average_stocks(stock_list, volume_threshold=1_000_000, volatil
         volume_threshold (int): Minimum average volume.
         volatility_range (tuple): Acceptable range for daily volatility (%).
         trend_score_threshold (float): Minimum trend alignment score (%).
+        max_workers (int): Download this many tickers concurrently; None downloads one after another.
+        timeout (float): Seconds per ticker before a concurrent download is given up.
+        retries (int): Retries per ticker for concurrent downloads.
+        batch_size (int): Download uncached tickers in multi-symbol batches of this size.
+        features (FeatureStore): Serve the screen indicators from this store.
     Returns:
         pd.DataFrame: Filtered stocks and their metrics.
     """
-    filtered_stocks = []
-    for ticker in stock_list:
-        print(f"Processing {ticker}...")
-        try:
-            data = fetch_stock_data(ticker)
-            if data is None:
-                continue
-
-            metrics = calculate_metrics(data, ticker)
-            if metrics is None:
-                continue
-
-            # Check if the stock meets criteria
-            if (
-                metrics["avg_volume"] >= volume_threshold and
-                volatility_range[0] <= metrics["volatility"] <= volatility_range[1] and
-                metrics["trend_score"] >= trend_score_threshold
-            ):
-                filtered_stocks.append({
-                    "ticker": ticker,
-                    "avg_volume": metrics["avg_volume"],
-                    "volatility": metrics["volatility"],
-                    "atr": metrics["atr"],
-                    "trend_score": metrics["trend_score"],
-                    "avg_price": metrics["avg_price"]
-                })
-        except Exception as e:
-            print(f"Error processing {ticker}: {e}")
-
-    return pd.DataFrame(filtered_stocks)
+    return screen_stocks(
+        stock_list,
+        {"moving_average": dict(volume_threshold=volume_threshold, volatility_range=volatility_range,
+                                trend_score_threshold=trend_score_threshold)},
+        features=features, max_workers=max_workers, timeout=timeout, retries=retries, batch_size=batch_size,
+    )["moving_average"]
 
 
 if __name__ == "__main__":
@@ -161,7 +76,9 @@ if __name__ == "__main__":
         stock_list,
         volume_threshold=5_000_000,
         volatility_range=(3, 4.5),
-        trend_score_threshold=70
+        trend_score_threshold=70,
+        max_workers=16,
+        batch_size=100
     )
 
     # Save filtered stocks to a CSV file
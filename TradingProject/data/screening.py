@@ -0,0 +1,261 @@
+import numpy as np
+import pandas as pd
+from data.market_data import fetch_stock_data, fetch_many, FIELDS
+
+MIN_ROWS = 50
+ATR_WINDOW = 14
+HIGH_WINDOW = 20
+TREND_EMA_SPAN = 50
+METRIC_COLUMNS = ["rows", "avg_volume", "volatility", "atr", "recent_high", "current_price",
+                  "proximity_to_high", "trend_score", "avg_price"]
+
+
+def stack_panel(frames):
+    """
+    Stack per-ticker bars into right-aligned ticker x time arrays.
+    Each row ends with the ticker's most recent bar and is left-padded with NaN, so windows
+    over the last N columns cover the last N bars of every ticker whatever its history length.
+    Args:
+        frames (dict): Ticker to historical stock data (yfinance MultiIndex or flat columns).
+    Returns:
+        tuple: List of tickers and a dict of field to np.ndarray with shape (n_tickers, n_bars).
+    """
+    tickers = list(frames)
+    length = max((len(data) for data in frames.values()), default=0)
+
+    panel = {field: np.full((len(tickers), length), np.nan) for field in FIELDS}
+    for row, ticker in enumerate(tickers):
+        data = frames[ticker]
+        for field in FIELDS:
+            values = _field_values(data, field, ticker)
+            if values is not None and len(values):
+                panel[field][row, length - len(values):] = values
+    return tickers, panel
+
+
+def _field_values(data, field, ticker):
+    """
+    Look up one field of a ticker's bars as a float array, whatever the column layout.
+    """
+    for key in ((field, ticker), f"{field}_{ticker}", field):
+        if key in data.columns:
+            values = data[key]
+            if isinstance(values, pd.DataFrame):
+                values = values.iloc[:, 0]
+            return values.to_numpy(dtype=float)
+    return None
+
+
+def stack_features(frames, features, length=None):
+    """
+    Look up the screen indicators of every ticker in a feature store, right-aligned like stack_panel.
+    Args:
+        frames (dict): Ticker to historical stock data.
+        features (FeatureStore): Store serving the indicators.
+        length (int): Number of columns (defaults to the longest history).
+    Returns:
+        dict: 'atr' and 'ema' arrays with shape (n_tickers, length).
+    """
+    length = length or max((len(data) for data in frames.values()), default=0)
+    indicators = {name: np.full((len(frames), length), np.nan) for name in ("atr", "ema")}
+    for row, (ticker, data) in enumerate(frames.items()):
+        if len(data):
+            indicators["atr"][row, length - len(data):] = features.get(ticker, data, "atr", ATR_WINDOW).to_numpy()
+            indicators["ema"][row, length - len(data):] = features.get(ticker, data, "ema", TREND_EMA_SPAN).to_numpy()
+    return indicators
+
+
+def compute_screen_metrics(tickers, panel, indicators=None):
+    """
+    Compute the union of all screen metrics for every ticker in one vectorized pass.
+    Args:
+        tickers (list): Tickers in row order of the panel.
+        panel (dict): Field to right-aligned array from stack_panel.
+        indicators (dict): Precomputed 'atr' and 'ema' arrays from stack_features; computed here when None.
+    Returns:
+        pd.DataFrame: One row per ticker with 'rows', 'avg_volume', 'volatility', 'atr',
+            'recent_high', 'current_price', 'proximity_to_high', 'trend_score' and 'avg_price'.
+    """
+    close, high, low, volume = panel["Close"], panel["High"], panel["Low"], panel["Volume"]
+    if close.shape[1] == 0:
+        return pd.DataFrame(columns=METRIC_COLUMNS, index=pd.Index(tickers, name="ticker"), dtype=float)
+    valid = ~np.isnan(close)
+    rows = valid.sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prev_close = np.roll(close, 1, axis=1)
+        prev_close[:, 0] = np.nan
+        daily_pct_change = close / prev_close - 1
+
+        # True range: the largest of the three ranges, ignoring the missing previous close on the first bar
+        if indicators is not None:
+            atr = indicators["atr"][:, -1]
+        else:
+            true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+            atr = true_range[:, -ATR_WINDOW:].mean(axis=1)
+
+        recent_high = close[:, -HIGH_WINDOW:].max(axis=1)
+        current_price = close[:, -1]
+
+        # EMA-50 per ticker; pandas starts each column at its first valid close
+        if indicators is not None:
+            ema = indicators["ema"]
+        else:
+            ema = pd.DataFrame(close.T).ewm(span=TREND_EMA_SPAN, adjust=False).mean().to_numpy().T
+        trend_score = np.where(valid, close > ema, False).sum(axis=1) / rows * 100
+
+        metrics = pd.DataFrame({
+            "rows": rows,
+            "avg_volume": _nan_mean(volume),
+            "volatility": _nan_std(daily_pct_change) * 100,
+            "atr": atr,
+            "recent_high": recent_high,
+            "current_price": current_price,
+            "proximity_to_high": (recent_high - current_price) / recent_high,
+            "trend_score": trend_score,
+            "avg_price": _nan_mean(close),
+        }, index=pd.Index(tickers, name="ticker"))
+    return metrics
+
+
+def _nan_mean(values):
+    valid = ~np.isnan(values)
+    return np.where(valid, values, 0.0).sum(axis=1) / valid.sum(axis=1)
+
+
+def _nan_std(values):
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1)
+    mean = _nan_mean(values)
+    squared = np.where(valid, (values - mean[:, None]) ** 2, 0.0)
+    return np.sqrt(squared.sum(axis=1) / (count - 1))
+
+
+def breakout_screen(metrics, volume_threshold=1_000_000, volatility_threshold=2, atr_threshold=1.5,
+                    proximity_threshold=0.05):
+    """
+    Stocks suitable for a breakout strategy: liquid, volatile and close to their 20-day high.
+    """
+    return (
+        (metrics["avg_volume"] >= volume_threshold)
+        & (metrics["volatility"] >= volatility_threshold)
+        & (metrics["atr"] >= atr_threshold)
+        & (metrics["proximity_to_high"] <= proximity_threshold)
+    )
+
+
+def moving_average_screen(metrics, volume_threshold=1_000_000, volatility_range=(2, 5), trend_score_threshold=50):
+    """
+    Stocks suitable for a moving average strategy: liquid, moderately volatile and trending above the EMA-50.
+    """
+    return (
+        (metrics["avg_volume"] >= volume_threshold)
+        & metrics["volatility"].between(volatility_range[0], volatility_range[1])
+        & (metrics["trend_score"] >= trend_score_threshold)
+    )
+
+
+# Screen name -> (predicate over the metrics table, output columns)
+SCREENS = {
+    "breakout": (
+        breakout_screen,
+        ["avg_volume", "volatility", "atr", "recent_high", "current_price", "proximity_to_high"],
+    ),
+    "moving_average": (
+        moving_average_screen,
+        ["avg_volume", "volatility", "atr", "trend_score", "avg_price"],
+    ),
+}
+
+
+def apply_screens(metrics, screens):
+    """
+    Apply screens to a metrics table as boolean masks.
+    Args:
+        metrics (pd.DataFrame): Output of compute_screen_metrics.
+        screens (dict): Screen name (a key of SCREENS) to a dict of threshold keyword arguments.
+    Returns:
+        dict: Screen name to a DataFrame of the passing tickers and the screen's columns.
+    """
+    eligible = metrics[metrics["rows"] >= MIN_ROWS]
+    results = {}
+    for name, thresholds in screens.items():
+        predicate, columns = SCREENS[name]
+        passed = eligible[predicate(eligible, **thresholds)]
+        results[name] = passed[columns].reset_index()
+    return results
+
+
+def load_frames(stock_list, max_workers=None, timeout=60, retries=2, batch_size=None):
+    """
+    Fetch the bars of every ticker, skipping those that fail.
+    Args:
+        stock_list (list): List of stock tickers.
+        max_workers (int): Download this many tickers concurrently; None downloads one after another.
+        timeout (float): Seconds per ticker before a concurrent download is given up.
+        retries (int): Retries per ticker for concurrent downloads.
+        batch_size (int): Download uncached tickers in multi-symbol batches of this size.
+    Returns:
+        dict: Ticker to historical stock data, in stock_list order.
+    """
+    if max_workers or batch_size:
+        print(f"Downloading {len(stock_list)} tickers...")
+        fetched = fetch_many(stock_list, max_workers=max_workers or 1, timeout=timeout, retries=retries,
+                             batch_size=batch_size)
+    else:
+        fetched = {}
+        for ticker in stock_list:
+            print(f"Processing {ticker}...")
+            fetched[ticker] = fetch_stock_data(ticker)
+    return {ticker: data for ticker, data in fetched.items() if data is not None}
+
+
+def screen_stocks(stock_list, screens, features=None, **download_options):
+    """
+    Download a universe once and run several screens over it in one metrics pass.
+    Args:
+        stock_list (list): List of stock tickers.
+        screens (dict): Screen name (a key of SCREENS) to a dict of threshold keyword arguments.
+        features (FeatureStore): Serve the ATR and EMA-50 from this store, so repeated screens only
+            compute indicators for new bars.
+        **download_options: Passed to load_frames (max_workers, timeout, retries, batch_size).
+    Returns:
+        dict: Screen name to a DataFrame of the passing tickers and their metrics.
+    """
+    frames = load_frames(stock_list, **download_options)
+    tickers, panel = stack_panel(frames)
+    indicators = stack_features(frames, features) if features is not None else None
+    metrics = compute_screen_metrics(tickers, panel, indicators)
+
+    short = metrics.index[metrics["rows"] < MIN_ROWS]
+    if len(short):
+        print(f"Skipping {len(short)} tickers with less than {MIN_ROWS} rows: {', '.join(short)}")
+    return apply_screens(metrics, screens)
+
+
+if __name__ == "__main__":
+    from data.break_out_stocks import fetch_sp500_tickers
+    from data.feature_store import get_default_feature_store
+
+    stock_list = fetch_sp500_tickers()
+    print(f"Fetched {len(stock_list)} tickers from S&P 500")
+
+    # Both screens share one download and one metrics pass
+    results = screen_stocks(
+        stock_list,
+        {
+            "breakout": dict(volume_threshold=2_000_000, volatility_threshold=2.5, atr_threshold=2,
+                             proximity_threshold=0.02),
+            "moving_average": dict(volume_threshold=5_000_000, volatility_range=(3, 4.5),
+                                   trend_score_threshold=70),
+        },
+        features=get_default_feature_store(),
+        max_workers=16,
+        batch_size=100,
+    )
+    for name, output_file in (("breakout", "breakout_stocks.csv"), ("moving_average", "moving_average_stocks.csv")):
+        if not results[name].empty:
+            results[name].to_csv(output_file, index=False)
+            print(f"Filtered stocks saved to '{output_file}'")
+        else:
+            print(f"No stocks met the {name} criteria.")
@@ -0,0 +1,224 @@
+# instrumentation.py
+import io
+import json
+import time
+import pstats
+import cProfile
+import platform
+import functools
+import traceback
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Instrumentation:
+    """
+    Collect stage timings, counters and errors for one run, with optional cProfile and
+    tracemalloc capture.
+    Timers and counters are always on; they cost a clock read or a dict update per call.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Drop everything recorded so far and stop any active profiling.
+        """
+        if getattr(self, "profiler", None) is not None:
+            self.profiler.disable()
+        if getattr(self, "trace_memory", False) and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.stages = {}
+        self.order = []
+        self.counters = {}
+        self.errors = []
+        self.profiler = None
+        self.trace_memory = False
+        self.peaks = []  # [memory at start, peak so far] of the running timers, innermost last
+        self.started = time.time()
+        self.start_time = time.perf_counter()
+        self.end_time = None
+
+    def start(self, profile=False, trace_memory=False):
+        """
+        Start a run.
+        Args:
+            profile (bool): Capture a cProfile of the whole run.
+            trace_memory (bool): Record the peak traced memory of every stage with tracemalloc.
+        """
+        self.reset()
+        if trace_memory:
+            tracemalloc.start()
+            self.trace_memory = True
+        if profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self):
+        """
+        End the run: stop the profiler and memory tracing but keep everything recorded.
+        """
+        self.end_time = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.trace_memory = False
+
+    @contextmanager
+    def timer(self, name):
+        """
+        Time a block of code as the stage `name`. Nested stages are timed independently.
+        With memory tracing, the stage's peak is reported as the memory allocated on top of what
+        was in use when it started.
+        """
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.peaks:
+                self.peaks[-1][1] = max(self.peaks[-1][1], peak)
+            tracemalloc.reset_peak()
+            self.peaks.append([current, current])
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if name not in self.stages:
+                self.stages[name] = {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+                self.order.append(name)
+            stage = self.stages[name]
+            stage["calls"] += 1
+            stage["total_seconds"] += seconds
+            stage["max_seconds"] = max(stage["max_seconds"], seconds)
+
+            if self.trace_memory:
+                start_memory, peak = self.peaks.pop()
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                if self.peaks:
+                    self.peaks[-1][1] = max(self.peaks[-1][1], peak)
+                stage["peak_mb"] = max(stage.get("peak_mb", 0.0), (peak - start_memory) / 2 ** 20)
+
+    def timed(self, name=None):
+        """
+        Decorator that times every call of a function as a stage (the function name by default).
+        """
+        def decorator(func):
+            stage_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, n=1):
+        """
+        Add n to the counter `name`.
+        """
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record_error(self, stage, error):
+        """
+        Record a handled exception with its traceback, so errors that are printed and skipped
+        still appear in the run report.
+        Args:
+            stage (str): Where the error happened.
+            error (Exception): The exception being handled.
+        """
+        self.errors.append({
+            "stage": stage,
+            "type": type(error).__name__,
+            "message": str(error),
+            "traceback": "".join(traceback.format_exception(type(error), error, error.__traceback__)),
+        })
+
+    def report(self, top=25):
+        """
+        Build the run report.
+        Args:
+            top (int): Number of functions of the cProfile capture to include.
+        Returns:
+            dict: Run information, stages (in first-call order), counters, errors and profile.
+        """
+        total = (self.end_time or time.perf_counter()) - self.start_time
+        report = {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "total_seconds": total,
+            "python": platform.python_version(),
+            "stages": [{"name": name, **self.stages[name]} for name in self.order],
+            "counters": dict(self.counters),
+            "errors": list(self.errors),
+        }
+        if self.profiler is not None:
+            report["profile"] = profile_summary(self.profiler, top)
+        return report
+
+    def save_report(self, path, top=25):
+        """
+        Write the run report as JSON.
+        Args:
+            path (str): Output file.
+            top (int): Number of profiled functions to include.
+        Returns:
+            dict: The report.
+        """
+        report = self.report(top)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        return report
+
+    def print_summary(self, top=10):
+        """
+        Print stage timings, counters, errors and the top profiled functions.
+        """
+        report = self.report(top)
+        total = report["total_seconds"]
+        print(f"\nRun summary ({total:.3f}s total)")
+        with_memory = any("peak_mb" in stage for stage in report["stages"])
+        print(f"{'Stage':40s} {'Calls':>6s} {'Total (s)':>10s} {'% run':>6s} {'Max (s)':>9s}"
+              + (f" {'Peak MB':>8s}" if with_memory else ""))
+        for stage in report["stages"]:
+            line = (f"{stage['name']:40s} {stage['calls']:6d} {stage['total_seconds']:10.4f} "
+                    f"{100 * stage['total_seconds'] / total if total else 0:6.1f} {stage['max_seconds']:9.4f}")
+            if "peak_mb" in stage:
+                line += f" {stage['peak_mb']:8.1f}"
+            print(line)
+        for name, value in report["counters"].items():
+            print(f"{name}: {value}")
+        for error in report["errors"]:
+            print(f"Error in {error['stage']}: {error['type']}: {error['message']}")
+        for row in report.get("profile", []):
+            print(f"{row['cumulative_seconds']:10.4f}s {row['calls']:8d} calls  {row['function']}")
+
+
+def profile_summary(profiler, top=25):
+    """
+    Summarize a cProfile capture as the functions with the highest cumulative time.
+    Reading the statistics disables the profiler.
+    Args:
+        profiler (cProfile.Profile): Profiler that has run.
+        top (int): Number of functions to keep.
+    Returns:
+        list: Dicts with 'function', 'calls', 'total_seconds' and 'cumulative_seconds'.
+    """
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({function})",
+            "calls": calls,
+            "total_seconds": total,
+            "cumulative_seconds": cumulative,
+        })
+    return sorted(rows, key=lambda row: row["cumulative_seconds"], reverse=True)[:top]
+
+
+# Shared instance used by the pipeline modules
+instrumentation = Instrumentation()
+timer = instrumentation.timer
+timed = instrumentation.timed
+count = instrumentation.count
+record_error = instrumentation.record_error
@@ -1,9 +1,14 @@
 import os
+import argparse
 import importlib
 import pandas as pd
-from data.moving_average_stocks import fetch_stock_data
+from data.market_data import fetch_stock_data
+from data.feature_store import get_default_feature_store
 from backtesting.backtest_engine import backtest_strategy
-from backtesting.performance import evaluate_strategy
+from backtesting.performance import evaluate_strategy, format_metric
+from backtesting.result_cache import cached_best_params, cached_backtest
+from backtesting.results_store import get_default_results_store
+from instrumentation import instrumentation, timer, count, record_error
 
 
 def load_strategy(strategy_name, strategies_folder="strategies"):
@@ -23,14 +28,60 @@ def load_strategy(strategy_name, strategies_folder="strategies"):
         return None
 
 
-if __name__ == "__main__":
-    # List available strategies
-    strategies_folder = "strategies"
-    available_strategies = [
+def list_strategies(strategies_folder="strategies"):
+    """
+    List the strategy modules available in the strategies folder.
+    Args:
+        strategies_folder (str): Path to the strategies folder.
+    Returns:
+        list: Strategy names (module names without the .py extension).
+    """
+    return [
         file[:-3]
         for file in os.listdir(strategies_folder)
         if file.endswith(".py") and not file.startswith("__")
     ]
+
+
+def generate_strategy_signals(strategy_module, strategy_name, data, best_params, ticker, features=None):
+    """
+    Generate signals for a strategy using its best parameters.
+    Args:
+        strategy_module (module): The loaded strategy module.
+        strategy_name (str): Name of the strategy.
+        data (pd.DataFrame): Historical stock data (a copy is passed to the strategy).
+        best_params (dict): Parameters returned by the strategy's get_best_params.
+        ticker (str): Stock ticker symbol.
+        features (FeatureStore): Feature store the strategy reads its indicators from, if any.
+    Returns:
+        pd.DataFrame: Data with the strategy's indicator and 'Signal' columns.
+    """
+    from strategies.moving_average import filter_params_for_function
+
+    generate_signals = getattr(strategy_module, "generate_signals", None)
+    if not generate_signals:
+        raise AttributeError(f"No generate_signals function found in strategy {strategy_name}.")
+
+    signal_params = filter_params_for_function(best_params, generate_signals)
+    if features is not None:
+        signal_params["features"] = features
+    count("dataframe_copies")
+    if strategy_name == "moving_average" and features is None:
+        return generate_signals(data.copy(), **signal_params)
+    return generate_signals(data.copy(), **signal_params, ticker=ticker)
+
+
+def run_pipeline(use_cache=True, export_csv=False):
+    """
+    Interactively choose a strategy, then optimize, backtest and evaluate it on one ticker.
+    Args:
+        use_cache (bool): Reuse optimizer and backtest results from the result cache and indicators
+            from the feature store.
+        export_csv (bool): Also write the full backtest results to a CSV file.
+    """
+    # List available strategies
+    strategies_folder = "strategies"
+    available_strategies = list_strategies(strategies_folder)
     print("Available Strategies:")
     for idx, strategy in enumerate(available_strategies, 1):
         print(f"{idx}. {strategy}")
@@ -42,7 +93,7 @@ if __name__ == "__main__":
             raise ValueError("Invalid choice.")
     except ValueError as e:
         print(f"Invalid input. {e}")
-        exit()
+        return
 
     chosen_strategy = available_strategies[choice]
     print(f"\nYou selected: {chosen_strategy}")
@@ -50,14 +101,15 @@ if __name__ == "__main__":
     # Load the chosen strategy module
     strategy_module = load_strategy(chosen_strategy, strategies_folder=strategies_folder)
     if not strategy_module:
-        exit()
+        return
 
     # Specify stock ticker
     stock_ticker = "KO"
     print(f"\nFetching data for {stock_ticker}...")
 
     # Fetch stock data
-    stock_data = fetch_stock_data(stock_ticker)
+    with timer("fetch_stock_data"):
+        stock_data = fetch_stock_data(stock_ticker)
     if stock_data is not None:
         print(f"Loaded data for {stock_ticker}.")
 
@@ -67,9 +119,13 @@ if __name__ == "__main__":
             get_best_params = getattr(strategy_module, "get_best_params", None)
             if not get_best_params:
                 print(f"No get_best_params function found in strategy {chosen_strategy}.")
-                exit()
+                return
 
-            best_params = get_best_params(stock_data,stock_ticker)
+            with timer("get_best_params"):
+                if use_cache:
+                    best_params = cached_best_params(strategy_module, stock_data, stock_ticker)
+                else:
+                    best_params = get_best_params(stock_data,stock_ticker)
             print("Best Parameters:")
             print(best_params)
 
@@ -78,46 +134,50 @@ if __name__ == "__main__":
             use_kelly = False
             # Generate signals
             print("Generating signals...")
-            generate_signals = getattr(strategy_module, "generate_signals", None)
-            if not generate_signals:
+            if not getattr(strategy_module, "generate_signals", None):
                 print(f"No generate_signals function found in strategy {chosen_strategy}.")
-                exit()
-
-            from strategies.moving_average import filter_params_for_function
-
-            signal_params = filter_params_for_function(best_params, generate_signals)
-            # Write code for if-else for different strategies
-            if chosen_strategy == "moving_average":
-                print("Using Moving Average strategy...")
-                optimized_data = generate_signals(stock_data.copy(), **signal_params)
-            elif chosen_strategy == "break_out":
-                print("Using Break Out strategy...")
-                optimized_data = generate_signals(stock_data.copy(), **signal_params, ticker = stock_ticker)
-            else:
-                print("Using Mean Reverting strategy...")
-                optimized_data = generate_signals(stock_data.copy(), **signal_params, ticker = stock_ticker)
-            # optimized_data = generate_signals(stock_data.copy(), **signal_params, ticker=stock_ticker)
-            # optimized_data = generate_signals(stock_data.copy(), **signal_params)
+                return
+            with timer("generate_signals"):
+                optimized_data = generate_strategy_signals(
+                    strategy_module, chosen_strategy, stock_data, best_params, stock_ticker,
+                    features=get_default_feature_store() if use_cache else None
+                )
 
             # Perform backtesting
             print("Performing backtest...")
-            backtest_results = backtest_strategy(
-                optimized_data, 
-                kelly_params=best_params.get("kelly_params", None), 
-                use_kelly=use_kelly
-            )
+            with timer("backtest_strategy"):
+                if use_cache:
+                    backtest_results = cached_backtest(
+                        strategy_module, stock_ticker, best_params, optimized_data,
+                        kelly_params=best_params.get("kelly_params", None),
+                        use_kelly=use_kelly
+                    )
+                else:
+                    backtest_results = backtest_strategy(
+                        optimized_data, 
+                        kelly_params=best_params.get("kelly_params", None), 
+                        use_kelly=use_kelly
+                    )
 
             # Save backtest results
-            results_file = f"backtest_results_{chosen_strategy}_{stock_ticker}.csv"
-            backtest_results.to_csv(results_file, index=False)
-            print(f"Backtest results saved to {results_file}")
+            with timer("save_results"):
+                run = get_default_results_store().save(
+                    chosen_strategy, stock_ticker, backtest_results, params=best_params,
+                    data_ref={"source": "fetch_stock_data", "ticker": stock_ticker, "period": "5y", "interval": "1d"}
+                )
+                print(f"Backtest results saved as run {run} of {chosen_strategy} on {stock_ticker}")
+                if export_csv:
+                    results_file = f"backtest_results_{chosen_strategy}_{stock_ticker}.csv"
+                    backtest_results.to_csv(results_file, index=False)
+                    print(f"Backtest results exported to {results_file}")
 
             # Evaluate performance
             print("Evaluating performance...")
-            performance_metrics = evaluate_strategy(backtest_results)
+            with timer("evaluate_strategy"):
+                performance_metrics = evaluate_strategy(backtest_results)
             print("Performance Metrics:")
             for metric, value in performance_metrics.items():
-                print(f"{metric}: {value:.2f}%")
+                print(f"{metric}: {format_metric(metric, value)}")
             
             # # Visualize backtest results
             # visualize_results = getattr(strategy_module, "visualize_results", None)
@@ -129,5 +189,26 @@ if __name__ == "__main__":
 
         except Exception as e:
             print(f"Error executing strategy {chosen_strategy}: {e}")
+            record_error(chosen_strategy, e)
     else:
         print(f"Failed to fetch data for {stock_ticker}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Optimize, backtest and evaluate a strategy.")
+    parser.add_argument("--profile", action="store_true", help="Capture a cProfile of the run.")
+    parser.add_argument("--trace-memory", action="store_true", help="Record peak memory per stage with tracemalloc.")
+    parser.add_argument("--report", default="run_report.json", help="JSON file for the run report.")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute instead of using the result cache and feature store.")
+    parser.add_argument("--export-csv", action="store_true",
+                        help="Also write backtest_results_<strategy>_<ticker>.csv with every column.")
+    args = parser.parse_args()
+    instrumentation.start(profile=args.profile, trace_memory=args.trace_memory)
+
+    try:
+        run_pipeline(use_cache=not args.no_cache, export_csv=args.export_csv)
+    finally:
+        instrumentation.stop()
+        instrumentation.print_summary()
+        instrumentation.save_report(args.report)
+        print(f"Run report saved to {args.report}")
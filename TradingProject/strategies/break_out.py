@@ -1,5 +1,24 @@
+import sys
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from backtesting.backtest_engine import signal_returns
+from backtesting.performance import sharpe_ratios
+from instrumentation import count
+
+OPTIMIZER_ENGINES = ("vectorized", "loop")
+
+# Parameter name -> values searched by get_best_params, in signal_grid argument order
+PARAM_GRID = {
+    "breakout_window": range(2, 100, 1),
+    "confirmation_window": range(0, 20, 1),
+}
+
+# Finer and larger space for the budgeted searches of backtesting.search
+SEARCH_SPACE = {
+    "breakout_window": range(2, 251),
+    "confirmation_window": range(0, 41),
+}
 
 def flatten_columns(data, ticker):
     """
@@ -14,7 +33,59 @@ def flatten_columns(data, ticker):
         data.columns = [f"{col[0]}_{ticker}" if col[1] else col[0] for col in data.columns]
     return data
 
-def generate_signals(data, breakout_window, confirmation_window, ticker):
+def breakout_signals(close, high_breakout, low_breakout, confirmation_window):
+    """
+    Signals of breakouts: 1 when the close is above the breakout high of confirmation_window bars
+    ago, -1 when below the breakout low of confirmation_window bars ago.
+    Args:
+        close (np.ndarray): Close prices.
+        high_breakout (np.ndarray): Rolling highs.
+        low_breakout (np.ndarray): Rolling lows.
+        confirmation_window (int): Number of periods for confirmation.
+    Returns:
+        np.ndarray: int8 signals (1, 0, -1).
+    """
+    signals = np.zeros(len(close), dtype=np.int8)
+    signals[close > shift_values(high_breakout, confirmation_window)] = 1
+    signals[close < shift_values(low_breakout, confirmation_window)] = -1
+    return signals
+
+
+def shift_values(values, periods):
+    """
+    Shift an array forward by periods bars, filling the start with NaN like `Series.shift`.
+    """
+    if periods == 0:
+        return values
+    shifted = np.full(len(values), np.nan)
+    shifted[periods:] = values[:len(values) - periods]
+    return shifted
+
+
+def compute_signals(close, high, low, breakout_window, confirmation_window, return_indicators=False):
+    """
+    Compute the breakout signals from price arrays without touching any DataFrame.
+    Args:
+        close (np.ndarray): Close prices (read only).
+        high (np.ndarray): High prices (read only).
+        low (np.ndarray): Low prices (read only).
+        breakout_window (int): Number of periods to calculate breakout levels.
+        confirmation_window (int): Number of periods for confirmation.
+        return_indicators (bool): Also return the breakout levels.
+    Returns:
+        np.ndarray: int8 signals (1, 0, -1). With return_indicators, a tuple of the signals and a
+            dict with the 'High_Breakout' and 'Low_Breakout' arrays.
+    """
+    close = np.asarray(close, dtype=float)
+    high_breakout = pd.Series(np.asarray(high, dtype=float)).rolling(window=breakout_window).max().to_numpy()
+    low_breakout = pd.Series(np.asarray(low, dtype=float)).rolling(window=breakout_window).min().to_numpy()
+    signals = breakout_signals(close, high_breakout, low_breakout, confirmation_window)
+    if return_indicators:
+        return signals, {"High_Breakout": high_breakout, "Low_Breakout": low_breakout}
+    return signals
+
+
+def generate_signals(data, breakout_window, confirmation_window, ticker, features=None):
     """
     Generate buy and sell signals based on breakout levels.
     Args:
@@ -22,6 +93,7 @@ def generate_signals(data, breakout_window, confirmation_window, ticker):
         breakout_window (int): Number of periods to calculate breakout levels.
         confirmation_window (int): Number of periods for confirmation.
         ticker (str): Stock ticker symbol.
+        features (FeatureStore): Serve the breakout levels from this store instead of computing them.
     Returns:
         pd.DataFrame: Updated data with breakout levels and signals.
     """
@@ -31,25 +103,140 @@ def generate_signals(data, breakout_window, confirmation_window, ticker):
             raise ValueError("Ticker is required when data has MultiIndex columns.")
         data.columns = [f"{col[0]}_{ticker}" if col[1] == ticker else col[0] for col in data.columns]
 
-    # Use ticker to identify specific columns
-    close_col = f"Close_{ticker}" if f"Close_{ticker}" in data.columns else "Close"
-    high_col = f"High_{ticker}" if f"High_{ticker}" in data.columns else "High"
-    low_col = f"Low_{ticker}" if f"Low_{ticker}" in data.columns else "Low"
+    close, high, low = (series.to_numpy(dtype=float) for series in get_price_series(data, ticker))
 
-    # Calculate breakout levels
-    data["High_Breakout"] = data[high_col].rolling(window=breakout_window).max()
-    data["Low_Breakout"] = data[low_col].rolling(window=breakout_window).min()
-
-    # Generate signals
-    data["Signal"] = 0
-    data.loc[data[close_col] > data["High_Breakout"].shift(confirmation_window), "Signal"] = 1
-    data.loc[data[close_col] < data["Low_Breakout"].shift(confirmation_window), "Signal"] = -1
+    # Calculate breakout levels and signals
+    if features is not None:
+        indicators = {
+            "High_Breakout": features.get(ticker, data, "rolling_max", breakout_window).to_numpy(),
+            "Low_Breakout": features.get(ticker, data, "rolling_min", breakout_window).to_numpy(),
+        }
+        signals = breakout_signals(close, indicators["High_Breakout"], indicators["Low_Breakout"],
+                                   confirmation_window)
+    else:
+        signals, indicators = compute_signals(close, high, low, breakout_window, confirmation_window,
+                                              return_indicators=True)
 
+    data["High_Breakout"] = indicators["High_Breakout"]
+    data["Low_Breakout"] = indicators["Low_Breakout"]
+    data["Signal"] = signals
     return data
 
 
+def generate_panel_signals(close, high, low, breakout_window, confirmation_window):
+    """
+    Generate breakout signals for many tickers at once.
+    Args:
+        close (pd.DataFrame): Close prices, dates x tickers.
+        high (pd.DataFrame): High prices with the same shape.
+        low (pd.DataFrame): Low prices with the same shape.
+        breakout_window (int): Number of periods to calculate breakout levels.
+        confirmation_window (int): Number of periods for confirmation.
+    Returns:
+        pd.DataFrame: int8 signals (1, 0, -1) with the same shape as close.
+    """
+    high_breakout = high.rolling(window=breakout_window).max().shift(confirmation_window).to_numpy()
+    low_breakout = low.rolling(window=breakout_window).min().shift(confirmation_window).to_numpy()
+    prices = close.to_numpy()
+
+    signals = np.zeros(close.shape, dtype=np.int8)
+    signals[prices > high_breakout] = 1
+    signals[prices < low_breakout] = -1
+    return pd.DataFrame(signals, index=close.index, columns=close.columns)
+
+
+def get_price_series(data, ticker):
+    """
+    Return the close, high and low prices without modifying the given DataFrame.
+    Args:
+        data (pd.DataFrame): Historical stock data with MultiIndex or single-level columns.
+        ticker (str): Stock ticker symbol.
+    Returns:
+        tuple: Close, high and low prices as pd.Series.
+    """
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data.copy(deep=False)
+        data.columns = [f"{col[0]}_{ticker}" if col[1] == ticker else col[0] for col in data.columns]
+
+    return tuple(
+        data[f"{field}_{ticker}"] if f"{field}_{ticker}" in data.columns else data[field]
+        for field in ("Close", "High", "Low")
+    )
+
+
+def compute_rolling_extremes(values, windows, func=np.maximum):
+    """
+    Compute the rolling max (or min) for many windows from one sparse table.
+    The table holds the extreme of every power-of-two block, so each window is answered by
+    two overlapping blocks in O(n). Values match `rolling(window).max()`: the first
+    window - 1 bars and any window containing a NaN are NaN.
+    Args:
+        values (np.ndarray): Input series.
+        windows (iterable): Window lengths.
+        func (np.ufunc): np.maximum for rolling highs, np.minimum for rolling lows.
+    Returns:
+        np.ndarray: Rolling extremes with shape (n_windows, n_bars).
+    """
+    values = np.asarray(values, dtype=float)
+    windows = list(windows)
+    n = len(values)
 
-def optimize_strategy(data, breakout_window_range, confirmation_window_range, ticker):
+    # table[k][i] holds the extreme of values[i:i + 2 ** k]
+    table = [values]
+    while 2 ** len(table) <= min(max(windows), n):
+        prev, half = table[-1], 2 ** (len(table) - 1)
+        table.append(func(prev[:-half], prev[half:]))
+
+    extremes = np.full((len(windows), n), np.nan)
+    for row, window in enumerate(windows):
+        if window > n:
+            continue
+        level = window.bit_length() - 1
+        block = table[level]
+        size = 2 ** level
+        extremes[row, window - 1:] = func(block[:n - window + 1], block[window - size:n - size + 1])
+    return extremes
+
+
+def signal_grid(data, breakout_window_range, confirmation_window_range, ticker):
+    """
+    Generate the breakout signals of every (breakout, confirmation) pair.
+    Rolling highs and lows are computed once per breakout window; every confirmation window
+    then reads the shifted levels from a sliding-window view instead of recomputing them.
+    Yields one block per breakout window, with the confirmation windows in their original order.
+    Args:
+        data (pd.DataFrame): Historical stock data.
+        breakout_window_range (range): Range of breakout window values to test.
+        confirmation_window_range (range): Range of confirmation window values to test.
+        ticker (str): Stock ticker to reference correct columns.
+    Yields:
+        tuple: List of (breakout_window, confirmation_window) pairs and an int8 signal matrix
+            with shape (n_pairs, n_bars).
+    """
+    close, high, low = (series.to_numpy(dtype=float) for series in get_price_series(data, ticker))
+    confirmation_windows = list(confirmation_window_range)
+    n = len(close)
+
+    highs = compute_rolling_extremes(high, breakout_window_range, np.maximum)
+    lows = compute_rolling_extremes(low, breakout_window_range, np.minimum)
+
+    # Row max_shift - c of the sliding view over the NaN-padded level is the level shifted by c
+    max_shift = max(confirmation_windows)
+    rows = [max_shift - confirmation_window for confirmation_window in confirmation_windows]
+    padding = np.full(max_shift, np.nan)
+
+    for row, breakout_window in enumerate(breakout_window_range):
+        high_levels = sliding_window_view(np.concatenate([padding, highs[row]]), n)[rows]
+        low_levels = sliding_window_view(np.concatenate([padding, lows[row]]), n)[rows]
+
+        signals = np.zeros(high_levels.shape, dtype=np.int8)
+        signals[close > high_levels] = 1
+        signals[close < low_levels] = -1
+        yield [(breakout_window, confirmation_window) for confirmation_window in confirmation_windows], signals
+
+
+def optimize_strategy(data, breakout_window_range, confirmation_window_range, ticker, engine="vectorized",
+                      return_surface=False):
     """
     Optimize the breakout strategy by testing different breakout and confirmation windows.
     Args:
@@ -57,24 +244,40 @@ def optimize_strategy(data, breakout_window_range, confirmation_window_range, ti
         breakout_window_range (range): Range of breakout window values to test.
         confirmation_window_range (range): Range of confirmation window values to test.
         ticker (str): Stock ticker to reference correct columns.
+        engine (str): "vectorized" scores all pairs from precomputed rolling extremes,
+            "loop" runs the original per-pair reference loop.
+        return_surface (bool): Also return the Sharpe ratio of every grid point.
     Returns:
-        dict: Best parameters and corresponding performance metrics.
+        dict: Best parameters and corresponding performance metrics. With return_surface, a tuple
+            of the best parameters and a DataFrame of Sharpe ratios (breakout window rows,
+            confirmation window columns).
     """
+    if engine not in OPTIMIZER_ENGINES:
+        raise ValueError(f"Unknown optimizer engine '{engine}'. Expected one of {OPTIMIZER_ENGINES}.")
+    if engine == "vectorized":
+        best_params, surface = _optimize_vectorized(data, breakout_window_range, confirmation_window_range, ticker)
+        return (best_params, surface) if return_surface else best_params
+
     best_params = None
     best_sharpe = -np.inf
+    surface = pd.DataFrame(np.nan, index=list(breakout_window_range), columns=list(confirmation_window_range))
+    close, high, low = get_price_series(data, ticker)
+    prices = [series.to_numpy(dtype=float) for series in (close, high, low)]
+    daily_returns = close.pct_change()
 
     for breakout_window in breakout_window_range:
         for confirmation_window in confirmation_window_range:
-            temp_data = generate_signals(data.copy(), breakout_window, confirmation_window, ticker)
-            temp_data['Position'] = temp_data['Signal'].shift().fillna(0)
-            temp_data['Daily Returns'] = temp_data[f'Close_{ticker}'].pct_change()
-            temp_data['Strategy Returns'] = temp_data['Position'] * temp_data['Daily Returns']
+            count("optimizer_evaluations")
+            signals = compute_signals(*prices, breakout_window, confirmation_window)
+            position = pd.Series(signals, index=close.index).shift().fillna(0)
+            strategy_returns = position * daily_returns
 
             # Calculate Sharpe ratio
-            if temp_data['Strategy Returns'].std() != 0:
-                sharpe_ratio = temp_data['Strategy Returns'].mean() / temp_data['Strategy Returns'].std() * (252 ** 0.5)
+            if strategy_returns.std() != 0:
+                sharpe_ratio = strategy_returns.mean() / strategy_returns.std() * (252 ** 0.5)
             else:
                 sharpe_ratio = -np.inf
+            surface.loc[breakout_window, confirmation_window] = sharpe_ratio
             
             if sharpe_ratio > best_sharpe:
                 best_sharpe = sharpe_ratio
@@ -84,24 +287,67 @@ def optimize_strategy(data, breakout_window_range, confirmation_window_range, ti
                     "sharpe_ratio": sharpe_ratio
                 }
 
-    return best_params
+    return (best_params, surface) if return_surface else best_params
+
 
-def get_best_params(data, ticker):
+def _optimize_vectorized(data, breakout_window_range, confirmation_window_range, ticker):
+    """
+    Score every (breakout, confirmation) pair at once and return the best parameters and Sharpe surface.
+    Pairs are visited in the same order as the reference loop and only a strictly better
+    Sharpe ratio replaces the current best, so ties resolve identically.
+    """
+    close = get_price_series(data, ticker)[0].to_numpy(dtype=float)
+    best_params = None
+    best_sharpe = -np.inf
+    surface = pd.DataFrame(np.nan, index=list(breakout_window_range), columns=list(confirmation_window_range))
+
+    for pairs, signals in signal_grid(data, breakout_window_range, confirmation_window_range, ticker):
+        count("optimizer_evaluations", len(pairs))
+        sharpe = sharpe_ratios(signal_returns(close, signals), zero_std_value=-np.inf)
+        surface.loc[pairs[0][0], [confirmation_window for _, confirmation_window in pairs]] = sharpe
+        candidates = np.where(np.isnan(sharpe), -np.inf, sharpe)
+        best = int(np.argmax(candidates))
+
+        if sharpe[best] > best_sharpe:
+            best_sharpe = sharpe[best]
+            breakout_window, confirmation_window = pairs[best]
+            best_params = {
+                "breakout_window": breakout_window,
+                "confirmation_window": confirmation_window,
+                "sharpe_ratio": sharpe[best]
+            }
+
+    return best_params, surface
+
+def get_best_params(data, ticker, search="grid", max_evals=300, time_budget=None, return_surface=False):
     """
     Wrapper to get the best parameters for the breakout strategy.
     Args:
         data (pd.DataFrame): Historical stock data.
         ticker (str): Stock ticker to reference correct columns.
+        search (str): "grid" tries every combination of PARAM_GRID; "random" and "halving" search the
+            larger SEARCH_SPACE within the budget (see backtesting.search.search_params).
+        max_evals (int): Evaluation budget of "random" and "halving".
+        time_budget (float): Time budget in seconds of "random" and "halving"; None for no limit.
+        return_surface (bool): Also return the Sharpe surface the grid search computed
+            (None for the other searches).
     Returns:
-        dict: Best parameters for the strategy.
+        dict: Best parameters for the strategy. With return_surface, a tuple of the best
+            parameters and the Sharpe surface.
     """
-    breakout_window_range = range(2, 100, 1)
-    confirmation_window_range =  range(0, 20, 1)
-    best_params = optimize_strategy(data, breakout_window_range, confirmation_window_range, ticker)
-    return {
+    surface = None
+    if search == "grid":
+        best_params, surface = optimize_strategy(data, PARAM_GRID["breakout_window"],
+                                                 PARAM_GRID["confirmation_window"], ticker, return_surface=True)
+    else:
+        from backtesting.search import search_params
+
+        best_params = search_params(sys.modules[__name__], data, ticker, search, SEARCH_SPACE, max_evals, time_budget)
+    best_params = {
         "breakout_window": best_params["breakout_window"],
         "confirmation_window": best_params["confirmation_window"]
     }
+    return (best_params, surface) if return_surface else best_params
 
 def filter_params_for_function(best_params, func):
     """
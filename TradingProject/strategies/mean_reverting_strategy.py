@@ -1,30 +1,166 @@
-import yfinance as yf
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from backtesting.backtest_engine import signal_returns
+from backtesting.performance import sharpe_ratios
+from instrumentation import count
+from data.market_data import fetch_stock_data
 
-def fetch_stock_data(ticker, period="5y", interval="1d"):
+OPTIMIZER_ENGINES = ("vectorized", "loop")
+
+# Parameter name -> values searched by get_best_params, in signal_grid argument order
+PARAM_GRID = {
+    "lookback_window": range(5, 50, 1),  # Every lookback from 5 to 49 days.
+    "threshold": np.arange(0.01, 0.1, 0.0025),  # Thresholds from 1% to 9.75% in 0.25% steps.
+}
+
+# Finer and larger space for the budgeted searches of backtesting.search
+SEARCH_SPACE = {
+    "lookback_window": range(5, 121),
+    "threshold": np.arange(0.005, 0.15, 0.0005),
+}
+
+# Dummy Kelly parameters for demonstration (optional)
+KELLY_PARAMS = {"win_rate": 0.55, "avg_win": 0.015, "avg_loss": 0.01}
+
+def get_close_series(data, ticker):
     """
-    Fetch historical stock data from Yahoo Finance.
+    Extract the close price as a Series.
+    
+    Uses the ticker-specific column if it exists and handles MultiIndex columns,
+    where selecting 'Close' returns a DataFrame.
     
     Args:
-        ticker (str): Stock symbol (e.g., "AAPL").
-        period (str): Lookback period (e.g., "5y").
-        interval (str): Data interval (e.g., "1d").
+        data (pd.DataFrame): Historical stock data.
+        ticker (str): Stock ticker symbol.
         
     Returns:
-        pd.DataFrame: Historical stock data.
+        pd.Series: Close prices.
     """
-    try:
-        data = yf.download(ticker, period=period, interval=interval, progress=False)
-        if data.empty:
-            raise ValueError(f"No data found for {ticker}")
-        return data
-    except Exception as e:
-        print(f"Error fetching data for {ticker}: {e}")
-        return None
+    close_col = f"Close_{ticker}" if f"Close_{ticker}" in data.columns else "Close"
+    close_series = data[close_col]
+    if isinstance(close_series, pd.DataFrame):
+        close_series = close_series.iloc[:, 0]
+    return close_series
 
-def generate_signals(data, lookback_window, threshold, ticker):
+def generate_panel_signals(close, lookback_window, threshold):
+    """
+    Generate mean reversion signals for many tickers at once.
+    
+    Args:
+        close (pd.DataFrame): Close prices, dates x tickers.
+        lookback_window (int): Number of periods to calculate the SMA.
+        threshold (float): Deviation threshold (in decimal, e.g., 0.05 for 5%).
+        
+    Returns:
+        pd.DataFrame: int8 signals (1, 0, -1) with the same shape as close.
+    """
+    sma = close.rolling(window=lookback_window).mean()
+    deviation = ((close - sma) / sma).to_numpy()
+    
+    signals = np.zeros(close.shape, dtype=np.int8)
+    signals[deviation < -threshold] = 1
+    signals[deviation > threshold] = -1
+    return pd.DataFrame(signals, index=close.index, columns=close.columns)
+
+def compute_deviation_matrix(close, lookback_windows):
+    """
+    Compute the percentage deviation from the SMA for every lookback window at once.
+    
+    The SMAs come from one cumulative sum of the closes, so each lookback costs a single
+    vectorized difference instead of a rolling pass. As with `rolling(lookback).mean()`,
+    the SMA is NaN until a full window of valid closes is available.
+    
+    Args:
+        close (np.ndarray): Close prices.
+        lookback_windows (iterable): SMA lookback windows.
+        
+    Returns:
+        np.ndarray: Deviations (Close - SMA) / SMA with shape (n_lookbacks, n_bars).
+    """
+    close = np.asarray(close, dtype=float)
+    valid = ~np.isnan(close)
+    cumulative_sum = np.concatenate([[0.0], np.cumsum(np.where(valid, close, 0.0))])
+    cumulative_count = np.concatenate([[0], np.cumsum(valid)])
+    
+    deviations = np.full((len(lookback_windows), len(close)), np.nan)
+    for row, lookback_window in enumerate(lookback_windows):
+        if lookback_window > len(close):
+            continue
+        window_sum = cumulative_sum[lookback_window:] - cumulative_sum[:-lookback_window]
+        window_count = cumulative_count[lookback_window:] - cumulative_count[:-lookback_window]
+        sma = np.where(window_count == lookback_window, window_sum / lookback_window, np.nan)
+        deviations[row, lookback_window - 1:] = (close[lookback_window - 1:] - sma) / sma
+    return deviations
+
+def signal_grid(data, lookback_range, threshold_range, ticker=""):
+    """
+    Generate the mean reversion signals of every (lookback, threshold) pair.
+    
+    The deviation matrix is built once; all thresholds of a lookback window are then
+    compared against its deviation row in a single broadcasted comparison.
+    Yields one block per lookback window, with the thresholds in their original order.
+    
+    Args:
+        data (pd.DataFrame): Historical stock data.
+        lookback_range (range): Range of lookback window values to test.
+        threshold_range (iterable): Iterable of threshold values.
+        ticker (str): Stock ticker for column reference.
+        
+    Yields:
+        tuple: List of (lookback_window, threshold) pairs and an int8 signal matrix with
+            shape (n_pairs, n_bars).
+    """
+    close = get_close_series(data, ticker).to_numpy(dtype=float)
+    lookback_windows = list(lookback_range)
+    thresholds = list(threshold_range)
+    threshold_column = np.asarray(thresholds, dtype=float)[:, None]
+    deviations = compute_deviation_matrix(close, lookback_windows)
+    
+    for row, lookback_window in enumerate(lookback_windows):
+        signals = np.zeros((len(thresholds), len(close)), dtype=np.int8)
+        signals[deviations[row] < -threshold_column] = 1
+        signals[deviations[row] > threshold_column] = -1
+        yield [(lookback_window, threshold) for threshold in thresholds], signals
+
+def deviation_signals(deviation, threshold):
+    """
+    Signals of deviations from the SMA: 1 below -threshold, -1 above threshold.
+    Args:
+        deviation (np.ndarray): Deviations (Close - SMA) / SMA.
+        threshold (float): Deviation threshold (in decimal, e.g., 0.05 for 5%).
+    Returns:
+        np.ndarray: int8 signals (1, 0, -1).
+    """
+    signals = np.zeros(len(deviation), dtype=np.int8)
+    signals[deviation < -threshold] = 1
+    signals[deviation > threshold] = -1
+    return signals
+
+def compute_signals(close, lookback_window, threshold, return_indicators=False):
+    """
+    Compute the mean reversion signals from a price array without touching any DataFrame.
+    
+    Args:
+        close (np.ndarray): Close prices (read only).
+        lookback_window (int): Number of periods to calculate the SMA.
+        threshold (float): Deviation threshold (in decimal, e.g., 0.05 for 5%).
+        return_indicators (bool): Also return the SMA and the deviation.
+        
+    Returns:
+        np.ndarray: int8 signals (1, 0, -1). With return_indicators, a tuple of the signals and a
+            dict with the 'SMA' and 'Deviation' arrays.
+    """
+    close = np.asarray(close, dtype=float)
+    sma = pd.Series(close).rolling(window=lookback_window).mean().to_numpy()
+    deviation = (close - sma) / sma
+    signals = deviation_signals(deviation, threshold)
+    if return_indicators:
+        return signals, {"SMA": sma, "Deviation": deviation}
+    return signals
+
+def generate_signals(data, lookback_window, threshold, ticker, features=None):
     """
     Generate buy and sell signals for a mean reversion strategy.
     
@@ -39,36 +175,27 @@ def generate_signals(data, lookback_window, threshold, ticker):
         lookback_window (int): Number of periods to calculate the SMA.
         threshold (float): Deviation threshold (in decimal, e.g., 0.05 for 5%).
         ticker (str): Stock ticker symbol.
+        features (FeatureStore): Serve the SMA from this store instead of computing it.
         
     Returns:
         pd.DataFrame: Updated data with 'SMA', 'Deviation', and 'Signal' columns.
     """
-    # Determine the close price column: if a ticker-specific column exists, use it.
-    close_col = f"Close_{ticker}" if f"Close_{ticker}" in data.columns else "Close"
-    
-    # Extract the close price as a Series (handle MultiIndex issues if necessary)
-    close_series = data[close_col]
-    if isinstance(close_series, pd.DataFrame):
-        close_series = close_series.iloc[:, 0]
-    
-    # Calculate the Simple Moving Average (SMA) over the specified lookback window.
-    data['SMA'] = close_series.rolling(window=lookback_window).mean()
-    
-    # Calculate the percentage deviation from the SMA: (Close - SMA) / SMA.
-    data['Deviation'] = (close_series - data['SMA']) / data['SMA']
+    close = get_close_series(data, ticker).to_numpy(dtype=float)
     
-    # Initialize the Signal column to 0 (neutral).
-    data['Signal'] = 0
-    
-    # Generate a buy signal when the deviation is less than -threshold.
-    data.loc[data['Deviation'] < -threshold, 'Signal'] = 1
-    
-    # Generate a sell signal when the deviation is greater than threshold.
-    data.loc[data['Deviation'] > threshold, 'Signal'] = -1
+    if features is not None:
+        sma = features.get(ticker, data, "sma", lookback_window).to_numpy()
+        deviation = (close - sma) / sma
+        signals, indicators = deviation_signals(deviation, threshold), {"SMA": sma, "Deviation": deviation}
+    else:
+        signals, indicators = compute_signals(close, lookback_window, threshold, return_indicators=True)
     
+    data['SMA'] = indicators["SMA"]
+    data['Deviation'] = indicators["Deviation"]
+    data['Signal'] = signals
     return data
 
-def optimize_strategy(data, lookback_range, threshold_range, initial_capital=10000, ticker=""):
+def optimize_strategy(data, lookback_range, threshold_range, initial_capital=10000, ticker="",
+                      engine="vectorized", return_surface=False):
     """
     Optimize the mean reversion strategy by testing different lookback windows and thresholds.
     
@@ -81,28 +208,42 @@ def optimize_strategy(data, lookback_range, threshold_range, initial_capital=100
         threshold_range (iterable): Iterable of threshold values (e.g., np.arange(0.01, 0.1, 0.01)).
         initial_capital (float): Starting capital for backtesting.
         ticker (str): Stock ticker for column reference.
+        engine (str): "vectorized" scores the whole grid from one deviation matrix,
+            "loop" runs the original per-pair reference loop.
+        return_surface (bool): Also return the Sharpe ratio of every grid point.
         
     Returns:
-        dict: Best parameters and performance metrics.
+        dict: Best parameters and performance metrics. With return_surface, a tuple of the
+            best parameters and a DataFrame of Sharpe ratios (lookback rows, threshold columns).
     """
+    if engine not in OPTIMIZER_ENGINES:
+        raise ValueError(f"Unknown optimizer engine '{engine}'. Expected one of {OPTIMIZER_ENGINES}.")
+    if engine == "vectorized":
+        best_params, surface = _optimize_vectorized(data, lookback_range, threshold_range, ticker)
+        return (best_params, surface) if return_surface else best_params
+    
     best_params = None
     best_sharpe = -np.inf
+    surface = pd.DataFrame(index=list(lookback_range), columns=list(threshold_range), dtype=float)
+    
+    close = get_close_series(data, ticker)
+    close_values = close.to_numpy(dtype=float)
+    daily_returns = close.pct_change()
     
     for lookback_window in lookback_range:
         for threshold in threshold_range:
-            temp_data = generate_signals(data.copy(), lookback_window, threshold, ticker)
+            count("optimizer_evaluations")
+            signals = compute_signals(close_values, lookback_window, threshold)
             # Simulate entering positions on the next day.
-            temp_data['Position'] = temp_data['Signal'].shift().fillna(0)
-            close_col = f"Close_{ticker}" if f"Close_{ticker}" in temp_data.columns else "Close"
-            temp_data['Daily Returns'] = temp_data[close_col].pct_change()
-            temp_data['Strategy Returns'] = temp_data['Position'] * temp_data['Daily Returns']
-            temp_data['Portfolio Value'] = (1 + temp_data['Strategy Returns']).cumprod() * initial_capital
+            position = pd.Series(signals, index=close.index).shift().fillna(0)
+            strategy_returns = position * daily_returns
             
-            std_returns = temp_data['Strategy Returns'].std()
+            std_returns = strategy_returns.std()
             if std_returns != 0:
-                sharpe_ratio = temp_data['Strategy Returns'].mean() / std_returns * (252 ** 0.5)
+                sharpe_ratio = strategy_returns.mean() / std_returns * (252 ** 0.5)
             else:
                 sharpe_ratio = -np.inf
+            surface.loc[lookback_window, threshold] = sharpe_ratio
             
             if sharpe_ratio > best_sharpe:
                 best_sharpe = sharpe_ratio
@@ -110,10 +251,41 @@ def optimize_strategy(data, lookback_range, threshold_range, initial_capital=100
                     "lookback_window": lookback_window,
                     "threshold": threshold,
                     "sharpe_ratio": sharpe_ratio,
-                    # Dummy Kelly parameters for demonstration (optional)
-                    "kelly_params": {"win_rate": 0.55, "avg_win": 0.015, "avg_loss": 0.01},
+                    "kelly_params": dict(KELLY_PARAMS),
                 }
-    return best_params
+    return (best_params, surface) if return_surface else best_params
+
+def _optimize_vectorized(data, lookback_range, threshold_range, ticker):
+    """
+    Score every (lookback, threshold) pair and return the best parameters and Sharpe surface.
+    
+    Pairs are visited in the same order as the reference loop and only a strictly better
+    Sharpe ratio replaces the current best, so ties resolve identically.
+    """
+    close = get_close_series(data, ticker).to_numpy(dtype=float)
+    best_params = None
+    best_sharpe = -np.inf
+    rows = []
+    
+    for pairs, signals in signal_grid(data, lookback_range, threshold_range, ticker):
+        count("optimizer_evaluations", len(pairs))
+        sharpe = sharpe_ratios(signal_returns(close, signals), zero_std_value=-np.inf)
+        rows.append(sharpe)
+        candidates = np.where(np.isnan(sharpe), -np.inf, sharpe)
+        best = int(np.argmax(candidates))
+        
+        if sharpe[best] > best_sharpe:
+            best_sharpe = sharpe[best]
+            lookback_window, threshold = pairs[best]
+            best_params = {
+                "lookback_window": lookback_window,
+                "threshold": threshold,
+                "sharpe_ratio": sharpe[best],
+                "kelly_params": dict(KELLY_PARAMS),
+            }
+    
+    surface = pd.DataFrame(rows, index=list(lookback_range), columns=list(threshold_range))
+    return best_params, surface
 
 def filter_params_for_function(params, function):
     """
@@ -132,7 +304,7 @@ def filter_params_for_function(params, function):
     valid_keys = inspect.signature(function).parameters.keys()
     return {key: value for key, value in params.items() if key in valid_keys}
 
-def get_best_params(data, ticker):
+def get_best_params(data, ticker, search="grid", max_evals=300, time_budget=None, return_surface=False):
     """
     Wrapper function to obtain the best parameters for the mean reversion strategy.
     
@@ -141,18 +313,32 @@ def get_best_params(data, ticker):
     Args:
         data (pd.DataFrame): Historical stock data.
         ticker (str): Stock ticker for column references.
+        search (str): "grid" tries every combination of PARAM_GRID; "random" and "halving" search the
+            larger SEARCH_SPACE within the budget (see backtesting.search.search_params).
+        max_evals (int): Evaluation budget of "random" and "halving".
+        time_budget (float): Time budget in seconds of "random" and "halving"; None for no limit.
+        return_surface (bool): Also return the Sharpe surface the grid search computed
+            (None for the other searches).
         
     Returns:
-        dict: Best parameters for the strategy.
+        dict: Best parameters for the strategy. With return_surface, a tuple of the best
+            parameters and the Sharpe surface.
     """
-    lookback_range = range(5, 50, 5)  # For example: 5, 10, 15, ... 45 days.
-    threshold_range = np.arange(0.01, 0.1, 0.01)  # Thresholds from 1% to 9%.
-    best_params = optimize_strategy(data, lookback_range, threshold_range, ticker=ticker)
-    return {
+    surface = None
+    if search == "grid":
+        best_params, surface = optimize_strategy(data, PARAM_GRID["lookback_window"], PARAM_GRID["threshold"],
+                                                 ticker=ticker, return_surface=True)
+    else:
+        from backtesting.search import search_params
+        
+        best_params = search_params(sys.modules[__name__], data, ticker, search, SEARCH_SPACE, max_evals, time_budget)
+        best_params["kelly_params"] = dict(KELLY_PARAMS)
+    best_params = {
         "lookback_window": best_params["lookback_window"],
         "threshold": best_params["threshold"],
         "kelly_params": best_params["kelly_params"],
     }
+    return (best_params, surface) if return_surface else best_params
 
 def visualize_results(data, ticker, title="Mean Reversion Strategy Results"):
     """
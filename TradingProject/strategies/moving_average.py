@@ -1,27 +1,166 @@
+import sys
 import pandas as pd
 import numpy as np
+from backtesting.backtest_engine import signal_returns
+from backtesting.performance import sharpe_ratios
+from instrumentation import count
 
+OPTIMIZER_ENGINES = ("vectorized", "loop")
 
-def generate_signals(data, short_window, long_window):
+# Parameter name -> values searched by get_best_params, in signal_grid argument order
+PARAM_GRID = {
+    "short_window": range(5, 30, 3),
+    "long_window": range(20, 200, 5),
+}
+
+# Finer and larger space for the budgeted searches of backtesting.search
+SEARCH_SPACE = {
+    "short_window": range(2, 61),
+    "long_window": range(10, 301),
+}
+
+# Dummy Kelly parameters for demonstration
+KELLY_PARAMS = {"win_rate": 0.6, "avg_win": 0.02, "avg_loss": 0.01}
+
+
+def crossover_signals(ema_short, ema_long):
+    """
+    Signals of EMA crossovers: 1 while the short EMA is above the long one, -1 while below.
+    Args:
+        ema_short (np.ndarray): Short EMA.
+        ema_long (np.ndarray): Long EMA, of the same shape or stacked as (n_pairs, n_bars).
+    Returns:
+        np.ndarray: int8 signals in the broadcast shape.
+    """
+    signals = np.zeros(np.broadcast_shapes(np.shape(ema_short), np.shape(ema_long)), dtype=np.int8)
+    signals[ema_short > ema_long] = 1
+    signals[ema_short < ema_long] = -1
+    return signals
+
+
+def compute_signals(close, short_window, long_window, return_indicators=False):
+    """
+    Compute the moving average crossover signals from a price array without touching any DataFrame.
+    Args:
+        close (np.ndarray): Close prices (read only).
+        short_window (int): Period for the short EMA.
+        long_window (int): Period for the long EMA.
+        return_indicators (bool): Also return the EMAs.
+    Returns:
+        np.ndarray: int8 signals (1, 0, -1). With return_indicators, a tuple of the signals and a
+            dict with the 'EMA_Short' and 'EMA_Long' arrays.
+    """
+    close = pd.Series(np.asarray(close, dtype=float))
+    ema_short = close.ewm(span=short_window, adjust=False).mean().to_numpy()
+    ema_long = close.ewm(span=long_window, adjust=False).mean().to_numpy()
+    signals = crossover_signals(ema_short, ema_long)
+    if return_indicators:
+        return signals, {"EMA_Short": ema_short, "EMA_Long": ema_long}
+    return signals
+
+
+def generate_signals(data, short_window, long_window, ticker=None, features=None):
     """
     Generate buy and sell signals based on moving average crossovers.
     Args:
         data (pd.DataFrame): Historical stock data.
         short_window (int): Period for the short EMA.
         long_window (int): Period for the long EMA.
+        ticker (str): Stock ticker symbol (needed with features).
+        features (FeatureStore): Serve the EMAs from this store instead of computing them.
     Returns:
         pd.DataFrame: Updated data with EMA and signal columns.
     """
-    
-    data['EMA_Short'] = data['Close'].ewm(span=short_window, adjust=False).mean()
-    data['EMA_Long'] = data['Close'].ewm(span=long_window, adjust=False).mean()
-    data['Signal'] = 0
-    data.loc[data['EMA_Short'] > data['EMA_Long'], 'Signal'] = 1
-    data.loc[data['EMA_Short'] < data['EMA_Long'], 'Signal'] = -1
+    if features is not None:
+        indicators = {
+            "EMA_Short": features.get(ticker, data, "ema", short_window).to_numpy(),
+            "EMA_Long": features.get(ticker, data, "ema", long_window).to_numpy(),
+        }
+        signals = crossover_signals(indicators["EMA_Short"], indicators["EMA_Long"])
+    else:
+        signals, indicators = compute_signals(get_close_series(data).to_numpy(), short_window, long_window,
+                                              return_indicators=True)
+
+    data['EMA_Short'] = indicators["EMA_Short"]
+    data['EMA_Long'] = indicators["EMA_Long"]
+    data['Signal'] = signals
     return data
 
 
-def optimize_strategy(data, short_window_range, long_window_range, initial_capital=10000):
+def generate_panel_signals(close, short_window, long_window):
+    """
+    Generate moving average crossover signals for many tickers at once.
+    Args:
+        close (pd.DataFrame): Close prices, dates x tickers.
+        short_window (int): Period for the short EMA.
+        long_window (int): Period for the long EMA.
+    Returns:
+        pd.DataFrame: int8 signals (1, 0, -1) with the same shape as close.
+    """
+    ema_short = close.ewm(span=short_window, adjust=False).mean().to_numpy()
+    ema_long = close.ewm(span=long_window, adjust=False).mean().to_numpy()
+    signals = np.zeros(close.shape, dtype=np.int8)
+    signals[ema_short > ema_long] = 1
+    signals[ema_short < ema_long] = -1
+    return pd.DataFrame(signals, index=close.index, columns=close.columns)
+
+
+def get_close_series(data):
+    """
+    Return the close prices as a Series, also for yfinance frames with MultiIndex columns.
+    Args:
+        data (pd.DataFrame): Historical stock data.
+    Returns:
+        pd.Series: Close prices.
+    """
+    close = data['Close']
+    if isinstance(close, pd.DataFrame):
+        close = close.iloc[:, 0]
+    return close
+
+
+def compute_ema_matrix(close, spans):
+    """
+    Compute the EMA of every span once and stack them into a 2-D array.
+    Args:
+        close (pd.Series): Close prices.
+        spans (iterable): EMA spans to compute.
+    Returns:
+        dict: Mapping of span to row index, and np.ndarray with shape (n_spans, n_bars).
+    """
+    spans = sorted(set(spans))
+    emas = np.empty((len(spans), len(close)), dtype=float)
+    for row, span in enumerate(spans):
+        emas[row] = close.ewm(span=span, adjust=False).mean().to_numpy()
+    return {span: row for row, span in enumerate(spans)}, emas
+
+
+def signal_grid(data, short_window_range, long_window_range):
+    """
+    Generate the crossover signals of every valid (short, long) pair from cached EMAs.
+    Yields one block per short window, with the long windows in their original order.
+    Args:
+        data (pd.DataFrame): Historical stock data.
+        short_window_range (range): Range of short window values to test.
+        long_window_range (range): Range of long window values to test.
+    Yields:
+        tuple: List of (short_window, long_window) pairs and an int8 signal matrix with
+            shape (n_pairs, n_bars).
+    """
+    close = get_close_series(data)
+    rows, emas = compute_ema_matrix(close, list(short_window_range) + list(long_window_range))
+
+    for short_window in short_window_range:
+        long_windows = [long_window for long_window in long_window_range if short_window < long_window]
+        if not long_windows:
+            continue
+        ema_short = emas[rows[short_window]]
+        ema_long = emas[[rows[long_window] for long_window in long_windows]]
+        yield [(short_window, long_window) for long_window in long_windows], crossover_signals(ema_short, ema_long)
+
+
+def optimize_strategy(data, short_window_range, long_window_range, initial_capital=10000, engine="vectorized",
+                      return_surface=False):
     """
     Optimize the moving average crossover strategy by tuning short and long windows.
     Args:
@@ -29,24 +168,39 @@ def optimize_strategy(data, short_window_range, long_window_range, initial_capit
         short_window_range (range): Range of short window values to test.
         long_window_range (range): Range of long window values to test.
         initial_capital (float): Initial capital for backtesting.
+        engine (str): "vectorized" scores all pairs from cached EMAs with NumPy,
+            "loop" runs the original per-pair reference loop.
+        return_surface (bool): Also return the Sharpe ratio of every grid point.
     Returns:
-        dict: Best parameters and corresponding performance metrics.
+        dict: Best parameters and corresponding performance metrics. With return_surface, a tuple
+            of the best parameters and a DataFrame of Sharpe ratios (short window rows, long window
+            columns; NaN where the short window is not below the long one).
     """
+    if engine not in OPTIMIZER_ENGINES:
+        raise ValueError(f"Unknown optimizer engine '{engine}'. Expected one of {OPTIMIZER_ENGINES}.")
+    if engine == "vectorized":
+        best_params, surface = _optimize_vectorized(data, short_window_range, long_window_range)
+        return (best_params, surface) if return_surface else best_params
+
     best_params = None
     best_sharpe = -np.inf
+    surface = pd.DataFrame(np.nan, index=list(short_window_range), columns=list(long_window_range))
+    close = get_close_series(data)
+    close_values = close.to_numpy(dtype=float)
+    daily_returns = close.pct_change()
 
     for short_window in short_window_range:
         for long_window in long_window_range:
             if short_window >= long_window:  # Ensure short_window < long_window
                 continue
-            temp_data = generate_signals(data.copy(), short_window, long_window)
-            temp_data['Position'] = temp_data['Signal'].shift().fillna(0)
-            temp_data['Daily Returns'] = temp_data['Close'].pct_change()
-            temp_data['Strategy Returns'] = temp_data['Position'] * temp_data['Daily Returns']
-            temp_data['Portfolio Value'] = (1 + temp_data['Strategy Returns']).cumprod() * initial_capital
+            count("optimizer_evaluations")
+            signals = compute_signals(close_values, short_window, long_window)
+            position = pd.Series(signals, index=close.index).shift().fillna(0)
+            strategy_returns = position * daily_returns
 
             # Calculate Sharpe ratio
-            sharpe_ratio = temp_data['Strategy Returns'].mean() / temp_data['Strategy Returns'].std() * (252 ** 0.5)
+            sharpe_ratio = strategy_returns.mean() / strategy_returns.std() * (252 ** 0.5)
+            surface.loc[short_window, long_window] = sharpe_ratio
 
             # Update best parameters
             if sharpe_ratio > best_sharpe:
@@ -55,11 +209,41 @@ def optimize_strategy(data, short_window_range, long_window_range, initial_capit
                     "short_window": short_window,
                     "long_window": long_window,
                     "sharpe_ratio": sharpe_ratio,
-                    # Adding dummy Kelly parameters for demonstration
-                    "kelly_params": {"win_rate": 0.6, "avg_win": 0.02, "avg_loss": 0.01},
+                    "kelly_params": dict(KELLY_PARAMS),
                 }
 
-    return best_params
+    return (best_params, surface) if return_surface else best_params
+
+
+def _optimize_vectorized(data, short_window_range, long_window_range):
+    """
+    Score every (short, long) pair at once and return the best parameters and Sharpe surface.
+    Pairs are visited in the same order as the reference loop and only a strictly better
+    Sharpe ratio replaces the current best, so ties resolve identically.
+    """
+    close = get_close_series(data).to_numpy(dtype=float)
+    best_params = None
+    best_sharpe = -np.inf
+    surface = pd.DataFrame(np.nan, index=list(short_window_range), columns=list(long_window_range))
+
+    for pairs, signals in signal_grid(data, short_window_range, long_window_range):
+        count("optimizer_evaluations", len(pairs))
+        sharpe = sharpe_ratios(signal_returns(close, signals))
+        surface.loc[pairs[0][0], [long_window for _, long_window in pairs]] = sharpe
+        candidates = np.where(np.isnan(sharpe), -np.inf, sharpe)
+        best = int(np.argmax(candidates))
+
+        if sharpe[best] > best_sharpe:
+            best_sharpe = sharpe[best]
+            short_window, long_window = pairs[best]
+            best_params = {
+                "short_window": short_window,
+                "long_window": long_window,
+                "sharpe_ratio": sharpe[best],
+                "kelly_params": dict(KELLY_PARAMS),
+            }
+
+    return best_params, surface
 
 
 def filter_params_for_function(params, function):
@@ -77,24 +261,38 @@ def filter_params_for_function(params, function):
     return {key: value for key, value in params.items() if key in valid_keys}
 
 
-def get_best_params(data,ticker):
+def get_best_params(data, ticker, search="grid", max_evals=300, time_budget=None, return_surface=False):
     """
     Wrapper to get the best parameters for the moving average strategy.
     Args:
         data (pd.DataFrame): Historical stock data.
+        search (str): "grid" tries every combination of PARAM_GRID; "random" and "halving" search the
+            larger SEARCH_SPACE within the budget (see backtesting.search.search_params).
+        max_evals (int): Evaluation budget of "random" and "halving".
+        time_budget (float): Time budget in seconds of "random" and "halving"; None for no limit.
+        return_surface (bool): Also return the Sharpe surface the grid search computed
+            (None for the other searches).
     Returns:
-        dict: Best parameters for the strategy.
+        dict: Best parameters for the strategy. With return_surface, a tuple of the best
+            parameters and the Sharpe surface.
     """
-    short_window_range = range(5, 30, 3)
-    long_window_range = range(20, 200, 5)
-    best_params = optimize_strategy(data, short_window_range, long_window_range)
+    surface = None
+    if search == "grid":
+        best_params, surface = optimize_strategy(data, PARAM_GRID["short_window"], PARAM_GRID["long_window"],
+                                                 return_surface=True)
+    else:
+        from backtesting.search import search_params
+
+        best_params = search_params(sys.modules[__name__], data, ticker, search, SEARCH_SPACE, max_evals, time_budget)
+        best_params["kelly_params"] = dict(KELLY_PARAMS)
 
     # Return only the parameters relevant for the strategy
-    return {
+    best_params = {
         "short_window": best_params["short_window"],
         "long_window": best_params["long_window"],
         "kelly_params": best_params["kelly_params"],  # Include Kelly parameters
     }
+    return (best_params, surface) if return_surface else best_params
 
 import matplotlib.pyplot as plt
 
@@ -0,0 +1,162 @@
+# streaming/indicators.py
+import math
+from collections import deque
+
+
+class StreamingEMA:
+    """
+    Exponential moving average updated one value at a time.
+    Follows pandas' `ewm(span=span, adjust=False).mean()` step by step, including its handling
+    of missing values, so the streamed values equal the batch ones exactly.
+    """
+
+    def __init__(self, span):
+        self.span = span
+        alpha = 1.0 / (1.0 + (span - 1) / 2)
+        self.alpha = alpha
+        self.old_weight_factor = 1.0 - alpha
+        self.old_weight = 1.0
+        self.value = math.nan
+
+    def update(self, x):
+        """
+        Add one value.
+        Args:
+            x (float): New observation (NaN for a missing bar).
+        Returns:
+            float: The EMA after the update (NaN until the first observation).
+        """
+        if self.value == self.value:
+            self.old_weight *= self.old_weight_factor
+            if x == x:
+                if self.value != x:
+                    self.value = (self.old_weight * self.value + self.alpha * x) / (self.old_weight + self.alpha)
+                self.old_weight = 1.0
+        elif x == x:
+            self.value = x
+        return self.value
+
+
+class RollingExtreme:
+    """
+    Rolling maximum or minimum over a fixed window, using a monotonic deque.
+    Like pandas' `rolling(window).max()` / `.min()`, the value is NaN until the window is full
+    and while it contains a missing value.
+    """
+
+    def __init__(self, window, mode="max"):
+        if mode not in ("max", "min"):
+            raise ValueError(f"Unknown mode '{mode}'. Expected 'max' or 'min'.")
+        self.window = window
+        self.mode = mode
+        self.candidates = deque()  # (bar number, value), values monotonic from the oldest
+        self.missing = deque()  # bar numbers of the missing values in the window
+        self.count = 0
+        self.value = math.nan
+
+    def update(self, x):
+        """
+        Add one value and drop the one leaving the window.
+        Args:
+            x (float): New observation (NaN for a missing bar).
+        Returns:
+            float: The rolling extreme after the update.
+        """
+        position = self.count
+        self.count += 1
+        oldest = position - self.window + 1
+
+        if x != x:
+            self.missing.append(position)
+        else:
+            if self.mode == "max":
+                while self.candidates and self.candidates[-1][1] <= x:
+                    self.candidates.pop()
+            else:
+                while self.candidates and self.candidates[-1][1] >= x:
+                    self.candidates.pop()
+            self.candidates.append((position, x))
+
+        while self.candidates and self.candidates[0][0] < oldest:
+            self.candidates.popleft()
+        while self.missing and self.missing[0] < oldest:
+            self.missing.popleft()
+
+        full = self.count >= self.window and not self.missing
+        self.value = self.candidates[0][1] if full else math.nan
+        return self.value
+
+
+class RollingMean:
+    """
+    Simple moving average over a fixed window, kept as a running sum.
+    Ports pandas' rolling mean kernel: Kahan-compensated adds and removes, the negative-value
+    count that clips sign flips caused by rounding, and the rule that a window of identical values
+    returns that value. The streamed values therefore equal `rolling(window).mean()` exactly.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.nobs = 0
+        self.negative_count = 0
+        self.total = 0.0
+        self.add_compensation = 0.0
+        self.remove_compensation = 0.0
+        self.same_value_count = 0
+        self.previous = math.nan
+        self.value = math.nan
+
+    def update(self, x):
+        """
+        Add one value and drop the one leaving the window.
+        Args:
+            x (float): New observation (NaN for a missing bar).
+        Returns:
+            float: The mean after the update (NaN until the window holds `window` values).
+        """
+        if len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self.values.append(x)
+        self._add(x)
+
+        if self.nobs >= self.window:
+            result = self.total / self.nobs
+            if self.same_value_count >= self.nobs:
+                result = self.previous
+            elif self.negative_count == 0 and result < 0:
+                result = 0.0
+            elif self.negative_count == self.nobs and result > 0:
+                result = 0.0
+            self.value = result
+        else:
+            self.value = math.nan
+        return self.value
+
+    def _add(self, x):
+        if x != x:
+            return
+        self.nobs += 1
+        y = x - self.add_compensation
+        t = self.total + y
+        self.add_compensation = t - self.total - y
+        self.total = t
+        if math.copysign(1.0, x) < 0:
+            self.negative_count += 1
+
+        if x == self.previous:
+            self.same_value_count += 1
+        else:
+            self.same_value_count = 1
+        self.previous = x
+
+    def _remove(self, x):
+        if x != x:
+            return
+        self.nobs -= 1
+        y = -x - self.remove_compensation
+        t = self.total + y
+        self.remove_compensation = t - self.total - y
+        self.total = t
+        if math.copysign(1.0, x) < 0:
+            self.negative_count -= 1
@@ -0,0 +1,70 @@
+# streaming/replay.py
+import time
+import argparse
+import pandas as pd
+from data.market_data import CsvSource
+from streaming.signals import STREAMING_STRATEGIES, create_stream
+
+
+def replay(stream, bars, delay=0.0):
+    """
+    Feed bars to a streaming engine one at a time, as a live feed would.
+    Args:
+        stream (object): Streaming engine with a push(bar) -> signal method.
+        bars (pd.DataFrame): Bars with single-level OHLCV columns, oldest first.
+        delay (float): Seconds to wait between bars, to pace an intraday replay.
+    Yields:
+        tuple: Timestamp of the bar and its signal.
+    """
+    for timestamp, bar in zip(bars.index, bars.to_dict("records")):
+        yield timestamp, stream.push(bar)
+        if delay:
+            time.sleep(delay)
+
+
+def replay_csv(strategy_name, params, ticker, directory, start=None, delay=0.0):
+    """
+    Replay locally saved '{ticker}.csv' bars through a strategy's streaming engine.
+    Args:
+        strategy_name (str): Strategy module name.
+        params (dict): Strategy parameters.
+        ticker (str): Stock ticker symbol.
+        directory (str): Folder with the CSV files (see data.market_data.CsvSource).
+        start (pd.Timestamp): First bar to replay; all bars when None.
+        delay (float): Seconds to wait between bars.
+    Returns:
+        pd.Series: Signal per bar.
+    """
+    bars = CsvSource(directory).fetch(ticker, start=start)
+    stream = create_stream(strategy_name, params)
+    signals = dict(replay(stream, bars, delay))
+    return pd.Series(signals, name="Signal", dtype="int8")
+
+
+def parse_params(pairs):
+    """
+    Parse 'name=value' strings into a parameter dict with numeric values.
+    """
+    params = {}
+    for pair in pairs:
+        name, value = pair.split("=", 1)
+        params[name] = float(value) if "." in value else int(value)
+    return params
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay saved bars through a streaming strategy.")
+    parser.add_argument("strategy", choices=sorted(STREAMING_STRATEGIES))
+    parser.add_argument("ticker")
+    parser.add_argument("--directory", default=".", help="Folder with '{ticker}.csv' bar files.")
+    parser.add_argument("--params", nargs="+", default=[], help="Strategy parameters as name=value.")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait between bars.")
+    args = parser.parse_args()
+
+    stream = create_stream(args.strategy, parse_params(args.params))
+    bars = CsvSource(args.directory).fetch(args.ticker)
+    previous = None
+    for timestamp, signal in replay(stream, bars, args.delay):
+        if signal != previous:
+            print(f"{timestamp}: signal {signal}")
+            previous = signal
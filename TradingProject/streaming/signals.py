@@ -0,0 +1,123 @@
+# streaming/signals.py
+import math
+from collections import deque
+from streaming.indicators import StreamingEMA, RollingExtreme, RollingMean
+
+
+class MovingAverageStream:
+    """
+    Streaming version of strategies.moving_average.generate_signals.
+    """
+
+    def __init__(self, short_window, long_window):
+        self.ema_short = StreamingEMA(short_window)
+        self.ema_long = StreamingEMA(long_window)
+        self.signal = 0
+
+    def push(self, bar):
+        """
+        Update the EMAs with one bar.
+        Args:
+            bar (Mapping): Bar with a 'Close' value (e.g. a row of the bars DataFrame).
+        Returns:
+            int: Signal for the bar (1 buy, -1 sell, 0 neutral).
+        """
+        close = float(bar["Close"])
+        ema_short = self.ema_short.update(close)
+        ema_long = self.ema_long.update(close)
+
+        self.signal = 0
+        if ema_short > ema_long:
+            self.signal = 1
+        if ema_short < ema_long:
+            self.signal = -1
+        return self.signal
+
+
+class BreakoutStream:
+    """
+    Streaming version of strategies.break_out.generate_signals.
+    """
+
+    def __init__(self, breakout_window, confirmation_window):
+        self.high_breakout = RollingExtreme(breakout_window, "max")
+        self.low_breakout = RollingExtreme(breakout_window, "min")
+        # Breakout levels of the last confirmation_window + 1 bars; the oldest is the shifted level
+        self.levels = deque(maxlen=confirmation_window + 1)
+        self.signal = 0
+
+    def push(self, bar):
+        """
+        Update the breakout levels with one bar.
+        Args:
+            bar (Mapping): Bar with 'Close', 'High' and 'Low' values.
+        Returns:
+            int: Signal for the bar (1 buy, -1 sell, 0 neutral).
+        """
+        close = float(bar["Close"])
+        self.levels.append((self.high_breakout.update(float(bar["High"])),
+                            self.low_breakout.update(float(bar["Low"]))))
+        high_level, low_level = self.levels[0] if len(self.levels) == self.levels.maxlen else (math.nan, math.nan)
+
+        self.signal = 0
+        if close > high_level:
+            self.signal = 1
+        if close < low_level:
+            self.signal = -1
+        return self.signal
+
+
+class MeanReversionStream:
+    """
+    Streaming version of strategies.mean_reverting_strategy.generate_signals.
+    """
+
+    def __init__(self, lookback_window, threshold):
+        self.sma = RollingMean(lookback_window)
+        self.threshold = threshold
+        self.signal = 0
+
+    def push(self, bar):
+        """
+        Update the SMA with one bar.
+        Args:
+            bar (Mapping): Bar with a 'Close' value.
+        Returns:
+            int: Signal for the bar (1 buy, -1 sell, 0 neutral).
+        """
+        close = float(bar["Close"])
+        sma = self.sma.update(close)
+        deviation = (close - sma) / sma if sma != 0 else math.nan
+
+        self.signal = 0
+        if deviation < -self.threshold:
+            self.signal = 1
+        if deviation > self.threshold:
+            self.signal = -1
+        return self.signal
+
+
+# Strategy module name -> streaming class
+STREAMING_STRATEGIES = {
+    "moving_average": MovingAverageStream,
+    "break_out": BreakoutStream,
+    "mean_reverting_strategy": MeanReversionStream,
+}
+
+
+def create_stream(strategy_name, params):
+    """
+    Create the streaming engine of a strategy.
+    Args:
+        strategy_name (str): Strategy module name (a key of STREAMING_STRATEGIES).
+        params (dict): Parameters, e.g. from the strategy's get_best_params; extra keys are ignored.
+    Returns:
+        object: Streaming engine with a push(bar) -> signal method.
+    """
+    from strategies.moving_average import filter_params_for_function
+
+    if strategy_name not in STREAMING_STRATEGIES:
+        raise ValueError(f"No streaming engine for strategy '{strategy_name}'. "
+                         f"Expected one of {tuple(STREAMING_STRATEGIES)}.")
+    stream_class = STREAMING_STRATEGIES[strategy_name]
+    return stream_class(**filter_params_for_function(params, stream_class))